@@ -0,0 +1,110 @@
+"""Baseline window search benchmark.
+
+Evaluates every 365-day window ending on a day of the last two years of three years of synthetic daily data per
+meter. Compares `search_baseline_windows` (with and without the warm started refine) with building a fresh
+`MandVDataModel` for every window and fitting it with `MandVEnergyChangepointEstimator`.
+
+    python benchmarks/baseline_windows.py [--meters 3] [--model 4P] [--repeat 1]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from mandvmodeling.core.baselines import search_baseline_windows, window_ends
+from mandvmodeling.core.estimator import MandVEnergyChangepointEstimator
+from mandvmodeling.core.pmodels import get_model_function
+from mandvmodeling.core.schemas import MandVDataModel
+
+DAYS = 3 * 365
+
+
+def make_meters(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    timestamps = np.arange("2021-01-01", DAYS, dtype="datetime64[D]")
+    day = np.arange(DAYS)
+    meters = []
+    for _ in range(n):
+        T = 55 + 25 * np.sin(2 * np.pi * (day / 365 - 0.3)) + rng.normal(0, 5, DAYS)
+        y = (
+            100
+            + 3 * np.maximum(T - 65, 0)
+            + 2 * np.maximum(50 - T, 0)
+            + rng.normal(0, 5, DAYS)
+        )
+        meters.append(MandVDataModel(X=T, y=y, sensor_reading_timestamps=timestamps))
+    return meters
+
+
+def search(model: str, data_model: MandVDataModel) -> np.ndarray:
+    return search_baseline_windows(data_model, model).cvrmse
+
+
+def search_refined(model: str, data_model: MandVDataModel) -> np.ndarray:
+    return search_baseline_windows(data_model, model, refine=True).cvrmse
+
+
+def fit_per_window(model: str, data_model: MandVDataModel) -> np.ndarray:
+    X = data_model.X.reshape(-1)
+    ts = data_model.sensor_reading_timestamps.astype("datetime64[s]")
+    cvrmse = []
+    for end in window_ends(data_model):
+        keep = (ts >= end - np.timedelta64(365, "D")) & (ts < end)
+        window = MandVDataModel(
+            X=X[keep], y=data_model.y[keep], sensor_reading_timestamps=ts[keep]
+        )
+        cvrmse.append(
+            MandVEnergyChangepointEstimator(get_model_function(model))
+            .fit(window)
+            .cvrmse()
+        )
+    return np.array(cvrmse)
+
+
+def best_of(fn, model, meters, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for data_model in meters:
+            fn(model, data_model)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--meters", type=int, default=3)
+    parser.add_argument("--model", default="4P")
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    meters = make_meters(args.meters)
+    n_windows = len(window_ends(meters[0]))
+    difference = np.nanmax(
+        np.abs(
+            search_refined(args.model, meters[0])
+            - fit_per_window(args.model, meters[0])
+        )
+    )
+    print(
+        "{} meters x {} windows of {}, max cvrmse difference of refine {:.2e}".format(
+            args.meters, n_windows, args.model, difference
+        )
+    )
+    print("{:<16} {:>12} {:>14}".format("", "ms/meter", "windows/s"))
+    for name, fn in (
+        ("search", search),
+        ("search refine", search_refined),
+        ("fit per window", fit_per_window),
+    ):
+        elapsed = best_of(fn, args.model, meters, args.repeat)
+        print(
+            "{:<16} {:>12.2f} {:>14.0f}".format(
+                name, elapsed / args.meters * 1e3, args.meters * n_windows / elapsed
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Import time benchmark.
+
+Times each import statement in a fresh interpreter, since imports are cached within a process, and reports the
+minimum and median wall time over several runs together with the heavy dependencies the statement loaded.
+
+    python benchmarks/import_time.py [--repeat 10]
+
+Run `python -X importtime -c "import mandvmodeling.core.estimator"` to see where the time of one statement goes.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+STATEMENTS = [
+    "pass",
+    "import mandvmodeling",
+    "import mandvmodeling.core.calc.kernels",
+    "import mandvmodeling.core.calc.bounds",
+    "from mandvmodeling.core import MandVDataModel",
+    "from mandvmodeling.core import MandVEnergyChangepointEstimator",
+    "import mandvmodeling.cli",
+]
+
+HEAVY = ["scipy.optimize", "scipy.stats", "sklearn", "pydantic", "changepointmodel"]
+
+SCRIPT = """
+import sys, time, json
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+print(json.dumps([elapsed, [m for m in {heavy!r} if m in sys.modules]]))
+"""
+
+
+def time_statement(statement: str, repeat: int):
+    times = []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", SCRIPT.format(statement=statement, heavy=HEAVY)],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        elapsed, loaded = json.loads(out)
+        times.append(elapsed)
+    return min(times), statistics.median(times), loaded
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    print("{:<64} {:>9} {:>9}  {}".format("statement", "min ms", "median ms", "loaded"))
+    for statement in STATEMENTS:
+        best, median, loaded = time_statement(statement, args.repeat)
+        print(
+            "{:<64} {:>9.1f} {:>9.1f}  {}".format(
+                statement, best * 1e3, median * 1e3, ", ".join(loaded)
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""TOWT benchmark.
+
+Fits the hourly time-of-week and temperature model to a year of synthetic hourly data (8760 readings) per meter, and
+compares the sparse design matrix and lsmr solve of `TOWTEstimator` with building the same design matrix densely and
+solving it with `numpy.linalg.lstsq`. Reports the time and memory of the design matrices per meter.
+
+    python benchmarks/towt.py [--meters 20] [--repeat 3]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from mandvmodeling.core.estimator import TOWTEstimator
+from mandvmodeling.core.pmodels.towt import (
+    HOURS_PER_WEEK,
+    TOWTModelFunction,
+    temperature_segments,
+    time_of_week,
+)
+from mandvmodeling.core.schemas import MandVDataModel
+
+HOURS_PER_YEAR = 8760
+
+
+def make_meters(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    timestamps = np.arange("2023-01-01T00", HOURS_PER_YEAR, dtype="datetime64[h]")
+    tow = time_of_week(timestamps)
+    hours = np.arange(HOURS_PER_YEAR)
+    meters = []
+    for _ in range(n):
+        T = (
+            55
+            + 25 * np.sin(2 * np.pi * (hours / HOURS_PER_YEAR - 0.3))
+            + 8 * np.sin(2 * np.pi * hours / 24)
+            + rng.normal(0, 3, HOURS_PER_YEAR)
+        )
+        profile = rng.uniform(20, 80, HOURS_PER_WEEK)
+        y = (
+            profile[tow]
+            + 1.5 * np.maximum(T - 65, 0)
+            + 0.8 * np.maximum(45 - T, 0)
+            + rng.normal(0, 2, HOURS_PER_YEAR)
+        )
+        meters.append(MandVDataModel(X=T, y=y, sensor_reading_timestamps=timestamps))
+    return meters
+
+
+def fit_sparse(model: TOWTModelFunction, data_model: MandVDataModel) -> np.ndarray:
+    return TOWTEstimator(model).fit(data_model).coeffs
+
+
+def fit_dense(model: TOWTModelFunction, data_model: MandVDataModel) -> np.ndarray:
+    n = len(data_model.y)
+    A = np.zeros((n, model.n_params))
+    A[np.arange(n), time_of_week(data_model.sensor_reading_timestamps)] = 1.0
+    A[:, HOURS_PER_WEEK:] = temperature_segments(data_model.X, model.knots)
+    return np.linalg.lstsq(A, data_model.y, rcond=None)[0]
+
+
+def fit_dense_pred(model: TOWTModelFunction, data_model: MandVDataModel) -> np.ndarray:
+    coeffs = fit_dense(model, data_model)
+    return (
+        model.design_matrix(data_model.X, data_model.sensor_reading_timestamps) @ coeffs
+    )
+
+
+def best_of(fn, model, meters, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for data_model in meters:
+            fn(model, data_model)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--meters", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    model = TOWTModelFunction()
+    meters = make_meters(args.meters)
+    A = model.design_matrix(meters[0].X, meters[0].sensor_reading_timestamps)
+    sparse_bytes = A.data.nbytes + A.indices.nbytes + A.indptr.nbytes
+    dense_bytes = A.shape[0] * A.shape[1] * 8
+
+    difference = np.max(
+        np.abs(
+            TOWTEstimator(model).fit(meters[0]).pred_y
+            - fit_dense_pred(model, meters[0])
+        )
+    )
+    print(
+        "{} meters x {} hours, {} coefficients, max prediction difference {:.2e}".format(
+            args.meters, HOURS_PER_YEAR, model.n_params, difference
+        )
+    )
+    print("{:<8} {:>12} {:>14} {:>14}".format("", "ms/meter", "meters/s", "design KiB"))
+    for name, fn, nbytes in (
+        ("sparse", fit_sparse, sparse_bytes),
+        ("dense", fit_dense, dense_bytes),
+    ):
+        elapsed = best_of(fn, model, meters, args.repeat)
+        print(
+            "{:<8} {:>12.2f} {:>14.1f} {:>14.0f}".format(
+                name,
+                elapsed / args.meters * 1e3,
+                args.meters / elapsed,
+                nbytes / 1024,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
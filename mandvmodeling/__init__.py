@@ -1,7 +1,22 @@
+from typing import TYPE_CHECKING
+from ._lazy import attach
 from ._version import VERSION
 
 __version__ = VERSION
 
-from mandvmodeling.core import calc, estimator, schemas
+# calc, estimator, schemas and selection are imported on first use
+__getattr__, __dir__ = attach(
+    __name__,
+    modules={
+        "calc": ".core.calc",
+        "estimator": ".core.estimator",
+        "schemas": ".core.schemas",
+        "selection": ".core.selection",
+    },
+    attributes={},
+)
 
-__all__ = ["calc", "estimator", "schemas"]
+if TYPE_CHECKING:
+    from mandvmodeling.core import calc, estimator, schemas, selection
+
+__all__ = ["calc", "estimator", "schemas", "selection"]
@@ -0,0 +1,4 @@
+import sys
+from mandvmodeling.cli import main
+
+sys.exit(main())
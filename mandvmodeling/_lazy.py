@@ -0,0 +1,47 @@
+"""Lazy loading of package attributes.
+
+The packages of mandvmodeling define a module-level `__getattr__` (PEP 562) with `attach` instead of importing their
+submodules eagerly, so `import mandvmodeling` does not pull in scipy, sklearn, pydantic and changepointmodel until
+something that needs them is used. Every attribute is imported on first access and then cached in the package's
+namespace, so later accesses are plain lookups.
+"""
+
+from typing import Any, Callable, Dict, List, Tuple
+import importlib
+import sys
+
+
+def attach(
+    package: str, modules: Dict[str, str], attributes: Dict[str, str]
+) -> Tuple[Callable[[str], Any], Callable[[], List[str]]]:
+    """
+    Builds the `__getattr__` and `__dir__` of a package.
+
+    Args:
+      package: str: The `__name__` of the package
+      modules: Dict[str, str]: Names of modules to the module paths to import, relative to the package if they start
+        with "."
+      attributes: Dict[str, str]: Names of attributes to the module paths that define them
+
+    Returns:
+      Tuple[Callable[[str], Any], Callable[[], List[str]]]: `__getattr__` and `__dir__`
+    """
+
+    def __getattr__(name: str) -> Any:
+        if name in modules:
+            value = importlib.import_module(modules[name], package)
+        elif name in attributes:
+            value = getattr(importlib.import_module(attributes[name], package), name)
+        else:
+            raise AttributeError(
+                "module {!r} has no attribute {!r}".format(package, name)
+            )
+        setattr(sys.modules[package], name, value)
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(
+            set(sys.modules[package].__dict__) | set(modules) | set(attributes)
+        )
+
+    return __getattr__, __dir__
@@ -0,0 +1,354 @@
+"""Command line batch fitting of meter readings.
+
+    python -m mandvmodeling INPUT --output results.jsonl [--model auto] [--workers 4]
+
+INPUT is a file or directory of CSV, Parquet or fixture-style JSON files (see `mandvmodeling.core.readers`). Every
+meter is fitted with `mandvmodeling.core.selection.fit_model` and its scores (see
+`mandvmodeling.core.diagnostics.score_record`) are appended to the output as one JSON line as soon as it finishes.
+
+After a result is written, its source file (as an absolute path) and meter id are appended to a checkpoint log, so
+meters with the same id in different files are kept apart. Rerunning the same command, with the input spelled as a
+relative or absolute path, resumes an interrupted run: meters in the checkpoint are not refitted, and results written
+after the last checkpoint entry are dropped from the output. Meters whose fit raised an error are not checkpointed, so
+a resumed run retries them. Pass --restart to start over.
+
+With --sorted, files sorted by meter are streamed so memory stays bounded however large they are. With --day-types,
+the weekdays and weekends of every meter are fitted separately.
+"""
+
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, TextIO, Tuple
+import argparse
+import json
+import os
+import sys
+import time
+from mandvmodeling.core.diagnostics import score_record
+from mandvmodeling.core.pmodels.builtin import MODEL_NAMES
+from mandvmodeling.core.readers import (
+    ReaderColumns,
+    find_meter_files,
+    make_data_model,
+    read_meter_file,
+    split_day_types,
+    stream_meter_file,
+)
+from mandvmodeling.core.schemas import MandVDataModel
+from mandvmodeling.core.selection import fit_model
+
+Task = Tuple[str, str, List[float], List[float], List[str]]
+MeterKey = Tuple[str, str]
+
+
+def fit_meter(
+    task: Task, model: str = "auto", bounds: str = "default"
+) -> Dict[str, Any]:
+    """
+    Fits one meter. Errors are recorded in the result rather than raised so one bad meter does not stop a run.
+
+    Args:
+      task: Task: The meter id, source file, X, y and dates
+      model: str: The model name or "auto". Defaults to "auto".
+      bounds: str: The bounds strategy. Defaults to "default".
+
+    Returns:
+      Dict[str, Any]: The result line
+    """
+    meter_id, source, X, y, dates = task
+    result: Dict[str, Any] = {"meter_id": meter_id, "source": source}
+    try:
+        est = fit_model(make_data_model(X, y, dates), model=model, bounds=bounds)
+        result.update(score_record(est))
+    except Exception as e:
+        result.update({"name": None, "status": "error", "error": str(e)})
+    return result
+
+
+def _task(meter_id: str, source: Path, data: MandVDataModel) -> Task:
+    # plain lists pickle cheaply to the worker processes
+    return (
+        meter_id,
+        str(source),
+        data.X.reshape(-1).tolist(),
+        data.y.tolist(),
+        data.sensor_reading_timestamps.astype(str).tolist(),
+    )
+
+
+def iter_tasks(
+    files: Sequence[Path],
+    columns: ReaderColumns,
+    done: Set[MeterKey],
+    stream: bool = False,
+    day_types: bool = False,
+) -> Iterator[Task]:
+    """
+    Reads the meters of the files that are not done.
+
+    Args:
+      files: Sequence[Path]: The meter files
+      columns: ReaderColumns: The column names
+      done: Set[MeterKey]: The (source file, meter id) pairs to skip
+      stream: bool: Stream files sorted by meter with `stream_meter_file`. Defaults to False.
+      day_types: bool: Split every meter into weekdays and weekends. Defaults to False.
+
+    Yields:
+      Task: The meters to fit
+    """
+    read = stream_meter_file if stream else read_meter_file
+    for path in files:
+        meters = read(path, columns)
+        if day_types:
+            meters = split_day_types(meters)
+        for meter_id, data in meters:
+            if _meter_key(str(path), meter_id) not in done:
+                yield _task(meter_id, path, data)
+
+
+def _meter_key(source: str, meter_id: str) -> MeterKey:
+    # the same file is the same meter however its path was spelled on the command line
+    return str(Path(source).resolve()), str(meter_id)
+
+
+def _checkpoint_key(line: str) -> MeterKey:
+    source, meter_id = json.loads(line)
+    return _meter_key(source, meter_id)
+
+
+def load_checkpoint(checkpoint: Path, output: Path) -> Set[MeterKey]:
+    """
+    Reads the completed meters and drops output lines of meters that are not in the checkpoint, which were written
+    by an interrupted run after its last checkpoint entry.
+
+    Args:
+      checkpoint: Path: The checkpoint log of JSON [absolute source file, meter id] lines
+      output: Path: The results file
+
+    Returns:
+      Set[MeterKey]: The (source file, meter id) pairs of the completed meters
+    """
+    done: Set[MeterKey] = set()
+    if checkpoint.exists():
+        with open(checkpoint, "r") as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    continue
+                try:
+                    done.add(_checkpoint_key(line))
+                except (ValueError, TypeError):
+                    # a plain meter id of an older checkpoint does not say which file it came from
+                    continue
+    if not output.exists():
+        return done
+
+    kept = []
+    dropped = False
+    with open(output, "r") as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+                complete = (
+                    line.endswith("\n")
+                    and _meter_key(result["source"], result["meter_id"]) in done
+                )
+            except (ValueError, KeyError, TypeError):
+                complete = False
+            if complete:
+                kept.append(line)
+            else:
+                dropped = True
+    if dropped:
+        tmp = output.with_name(output.name + ".tmp")
+        with open(tmp, "w") as f:
+            f.writelines(kept)
+        os.replace(tmp, output)
+    return done
+
+
+class Progress:
+    """Reports the number of fitted meters and the throughput at most every `interval` seconds.
+
+    Attributes:
+        stream (TextIO): Where to report.
+        interval (float): The minimum seconds between reports.
+        fitted (int): The meters fitted by this run.
+        errors (int): The meters that failed.
+        skipped (int): The meters skipped from the checkpoint.
+    """
+
+    def __init__(self, stream: TextIO, interval: float, skipped: int = 0):
+        self.stream = stream
+        self.interval = interval
+        self.fitted = 0
+        self.errors = 0
+        self.skipped = skipped
+        self._start = time.perf_counter()
+        self._last = self._start
+
+    def update(self, result: Dict[str, Any]) -> None:
+        self.fitted += 1
+        if result.get("status") == "error":
+            self.errors += 1
+        now = time.perf_counter()
+        if now - self._last >= self.interval:
+            self._last = now
+            self.report()
+
+    @property
+    def throughput(self) -> float:
+        elapsed = time.perf_counter() - self._start
+        return self.fitted / elapsed if elapsed > 0 else 0.0
+
+    def report(self, prefix: str = "") -> None:
+        self.stream.write(
+            "{}{} meters fitted ({} errors, {} skipped), {:.1f} meters/s\n".format(
+                prefix, self.fitted, self.errors, self.skipped, self.throughput
+            )
+        )
+        self.stream.flush()
+
+
+def _run(
+    tasks: Iterator[Task],
+    model: str,
+    bounds: str,
+    workers: int,
+    on_result: Any,
+) -> None:
+    if workers == 1:
+        for task in tasks:
+            on_result(fit_meter(task, model, bounds))
+        return
+
+    # keep a bounded number of meters in flight so a huge input is never read into memory at once
+    max_in_flight = workers * 4
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending: Set[Future] = set()
+        for task in tasks:
+            pending.add(pool.submit(fit_meter, task, model, bounds))
+            if len(pending) >= max_in_flight:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    on_result(future.result())
+        for future in wait(pending).done:
+            on_result(future.result())
+
+
+def run(args: argparse.Namespace, stream: TextIO = sys.stderr) -> Progress:
+    """
+    Fits every meter of args.input and writes the results.
+
+    Args:
+      args: argparse.Namespace: The parsed command line
+      stream: TextIO: Where to report progress. Defaults to sys.stderr.
+
+    Returns:
+      Progress: The final counts
+    """
+    output = Path(args.output)
+    checkpoint = Path(args.checkpoint or str(output) + ".checkpoint")
+    if args.restart:
+        for path in (output, checkpoint):
+            if path.exists():
+                path.unlink()
+
+    files = find_meter_files(args.input)
+    columns = ReaderColumns(
+        meter=args.meter_column, date=args.date_column, X=args.x_column, y=args.y_column
+    )
+    done = load_checkpoint(checkpoint, output)
+    progress = Progress(stream, args.progress_interval, skipped=len(done))
+
+    with open(output, "a") as out, open(checkpoint, "a") as log:
+
+        def on_result(result: Dict[str, Any]) -> None:
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+            if result.get("status") != "error":
+                # errors are left out of the checkpoint so a resumed run retries them
+                log.write(
+                    json.dumps(list(_meter_key(result["source"], result["meter_id"])))
+                    + "\n"
+                )
+                log.flush()
+            progress.update(result)
+
+        _run(
+            iter_tasks(
+                files, columns, done, stream=args.sorted, day_types=args.day_types
+            ),
+            args.model,
+            args.bounds,
+            args.workers,
+            on_result,
+        )
+
+    progress.report(prefix="done: ")
+    return progress
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m mandvmodeling",
+        description="Fit changepoint models to every meter in a file or directory of readings.",
+    )
+    parser.add_argument(
+        "input", help="A CSV, Parquet or JSON file, or a directory of them"
+    )
+    parser.add_argument(
+        "-o", "--output", required=True, help="The JSON lines results file"
+    )
+    parser.add_argument(
+        "--model",
+        default="auto",
+        choices=["auto", *MODEL_NAMES],
+        help="The model to fit, or auto to select one (default: auto)",
+    )
+    parser.add_argument("--bounds", default="default", choices=["default", "daily"])
+    parser.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Worker processes",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        default=None,
+        help="The checkpoint log (default: OUTPUT.checkpoint)",
+    )
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="Discard the output and checkpoint and start over",
+    )
+    parser.add_argument("--meter-column", default="meter_id")
+    parser.add_argument("--date-column", default="date")
+    parser.add_argument("--x-column", default="X")
+    parser.add_argument("--y-column", default="y")
+    parser.add_argument(
+        "--sorted",
+        action="store_true",
+        help="Stream files sorted by meter instead of reading each file into memory",
+    )
+    parser.add_argument(
+        "--day-types",
+        action="store_true",
+        help="Fit weekdays and weekends of every meter separately",
+    )
+    parser.add_argument(
+        "--progress-interval",
+        type=float,
+        default=5.0,
+        help="Seconds between progress reports",
+    )
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.workers < 1:
+        build_parser().error("--workers must be at least 1")
+    run(args)
+    return 0
@@ -1,10 +1,37 @@
-from .estimator import MandVEnergyChangepointEstimator, MandVCurvefitEstimator
-from .pmodels import MandVParameterModelFunction
-from .schemas import MandVDataModel
+from typing import TYPE_CHECKING
+from mandvmodeling._lazy import attach
+
+# the estimators and schemas are imported on first use
+__getattr__, __dir__ = attach(
+    __name__,
+    modules={},
+    attributes={
+        "MandVEnergyChangepointEstimator": ".estimator",
+        "MandVCurvefitEstimator": ".estimator",
+        "TOWTEstimator": ".estimator",
+        "MandVParameterModelFunction": ".pmodels",
+        "MandVDataModel": ".schemas",
+        "ModelFilter": ".selection",
+        "select_model": ".selection",
+    },
+)
+
+if TYPE_CHECKING:
+    from .estimator import (
+        MandVEnergyChangepointEstimator,
+        MandVCurvefitEstimator,
+        TOWTEstimator,
+    )
+    from .pmodels import MandVParameterModelFunction
+    from .schemas import MandVDataModel
+    from .selection import ModelFilter, select_model
 
 __all__ = [
     "MandVEnergyChangepointEstimator",
     "MandVCurvefitEstimator",
+    "TOWTEstimator",
     "MandVParameterModelFunction",
     "MandVDataModel",
+    "ModelFilter",
+    "select_model",
 ]
@@ -0,0 +1,387 @@
+"""Searches the candidate baseline windows of a meter, e.g. every 365-day window ending in a date range, for the one
+with the best fit.
+
+Fitting a fresh `MandVDataModel` per window repeats the same work for every window: it sorts the readings again and
+runs a nonlinear fit from scratch. `search_baseline_windows` orders the readings by time once (see
+`MandVDataModel.time_index`), so every window is a contiguous range of positions found by binary search. With its
+changepoints held fixed, a changepoint model is linear (see `mandvmodeling.core.calc.piecewise`), and the weighted
+normal equations of a window are the difference of two prefix sums over time. The least squares fit of every
+changepoint candidate in every window is then solved from these sufficient statistics without revisiting the
+readings, and the best candidate within the bounds of each window is kept.
+
+With `refine`, the best candidate of every window is polished by curve_fit, as in
+`MandVEnergyChangepointEstimator.fit_robust`. Each polish is warm started from the previous window's coefficients or
+the window's own grid fit, whichever fits the window better. Consecutive windows share almost all of their readings,
+so the previous window's coefficients are usually already close to optimal.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Optional, Tuple, Union
+import numpy as np
+import numpy.typing as npt
+from .calc import piecewise, robust
+from .calc.init_guesses import clip_to_bounds
+from .estimator import MandVCurvefitEstimator, FitStatus, _builtin_kind
+from .pmodels import MandVParameterModelFunction, get_model_function
+from .schemas import MandVDataModel
+from .weather import _tolerance_seconds
+
+Duration = Union[np.timedelta64, str]
+
+# the largest prefix sum array of a chunk of changepoint candidates, in bytes
+_CHUNK_BYTES = 2**25
+
+
+@dataclass(frozen=True)
+class BaselineWindows:
+    """The fits of the candidate baseline windows of a meter. The scores follow `FitStatistics` and are NaN for
+    windows that could not be fit (too few readings or no changepoint candidate within the bounds).
+
+    Attributes:
+        kind (str): The model kind.
+        starts (npt.NDArray[np.datetime64]): The first timestamp of every window.
+        ends (npt.NDArray[np.datetime64]): The first timestamp after every window.
+        n (npt.NDArray[np.intp]): The number of readings of every window.
+        coeffs (npt.NDArray[np.float64]): The coefficients of every window in the order of the model function, of
+            shape (windows, number of coefficients).
+        sse (npt.NDArray[np.float64]): The (weighted) sum of squared residuals of every window.
+        sst (npt.NDArray[np.float64]): The (weighted) total sum of squares of every window.
+        y_mean (npt.NDArray[np.float64]): The (weighted) mean of y of every window.
+        refined (bool): Whether the coefficients were polished by curve_fit or are the best of the changepoint grid.
+    """
+
+    kind: str
+    starts: npt.NDArray[np.datetime64]
+    ends: npt.NDArray[np.datetime64]
+    n: npt.NDArray[np.intp]
+    coeffs: npt.NDArray[np.float64]
+    sse: npt.NDArray[np.float64]
+    sst: npt.NDArray[np.float64]
+    y_mean: npt.NDArray[np.float64]
+    refined: bool = False
+
+    def __len__(self) -> int:
+        return len(self.ends)
+
+    @property
+    def r2(self) -> npt.NDArray[np.float64]:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r2 = 1.0 - self.sse / self.sst
+        # a constant y has an r2 of 1.0 for a perfect fit and 0.0 otherwise, as in FitStatistics
+        constant = self.sst == 0
+        r2[constant] = np.where(self.sse[constant] == 0, 1.0, 0.0)
+        return r2
+
+    @property
+    def rmse(self) -> npt.NDArray[np.float64]:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.sqrt(self.sse / self.n)
+
+    @property
+    def cvrmse(self) -> npt.NDArray[np.float64]:
+        return self.rmse / self.y_mean
+
+    def best(self, metric: str = "cvrmse") -> int:
+        """
+        The index of the window with the best score. Windows that could not be fit are ignored.
+
+        Args:
+          metric: str: "cvrmse" or "rmse" (lowest is best) or "r2" (highest is best). Defaults to "cvrmse".
+
+        Returns:
+          int: The index of the window
+        """
+        if metric not in ("cvrmse", "rmse", "r2"):
+            raise ValueError(
+                "Unknown metric {}. Must be one of ('cvrmse', 'rmse', 'r2')".format(
+                    metric
+                )
+            )
+        scores = getattr(self, metric)
+        if metric == "r2":
+            scores = -scores
+        if np.all(np.isnan(scores)):
+            raise ValueError("None of the windows could be fit")
+        return int(np.nanargmin(scores))
+
+
+def window_ends(
+    data_model: MandVDataModel,
+    length: Duration = "365D",
+    step: Duration = "1D",
+    first_end: Any = None,
+    last_end: Any = None,
+) -> npt.NDArray[np.datetime64]:
+    """
+    The ends of the candidate windows of a data model, every step from first_end to last_end.
+
+    Args:
+      data_model: MandVDataModel: The data
+      length: Duration: The length of a window as a np.timedelta64 or a string such as "365D". Defaults to "365D".
+      step: Duration: The distance between the ends of consecutive windows. Defaults to "1D".
+      first_end: Any: The first end, as anything np.datetime64 accepts. Defaults to the first reading plus length.
+      last_end: Any: The last end. Defaults to the last reading plus step, so the last window includes it.
+
+    Returns:
+      npt.NDArray[np.datetime64]: The ends in seconds
+    """
+    length_seconds, step_seconds = _tolerance_seconds(length), _tolerance_seconds(step)
+    if step_seconds == 0:
+        raise ValueError("step must be positive")
+    _, times = data_model.time_index()
+    if len(times) == 0:
+        return np.empty(0, dtype="datetime64[s]")
+    first = (
+        times[0] + np.timedelta64(length_seconds, "s")
+        if first_end is None
+        else np.datetime64(first_end, "s")
+    )
+    last = (
+        times[-1] + np.timedelta64(step_seconds, "s")
+        if last_end is None
+        else np.datetime64(last_end, "s")
+    )
+    if last < first:
+        return np.empty(0, dtype="datetime64[s]")
+    n_ends = int((last - first).astype(np.int64) // step_seconds) + 1
+    return first + np.arange(n_ends) * np.timedelta64(step_seconds, "s")
+
+
+def search_baseline_windows(
+    data_model: MandVDataModel,
+    model: Union[str, MandVParameterModelFunction] = "4P",
+    length: Duration = "365D",
+    ends: Optional[npt.ArrayLike] = None,
+    step: Duration = "1D",
+    n_grid: int = 40,
+    refine: bool = False,
+) -> BaselineWindows:
+    """
+    Fits a built-in model to every window [end - length, end) of a data model.
+
+    The changepoints are searched on a grid of the X values within the union of the changepoint bounds of the
+    windows, and every window only considers the candidates within its own bounds (the bounds of the model computed
+    from the X of the window). The slope bounds are only enforced by `refine`. The sigma or counts of the data model
+    (see `MandVDataModel.fit_sigma`) weight the fits. Use `MandVDataModel.slice_by_date` with the best window to fit
+    it with an estimator.
+
+    Args:
+      data_model: MandVDataModel: The data
+      model: Union[str, MandVParameterModelFunction]: A built-in model or its name. Defaults to "4P".
+      length: Duration: The length of a window as a np.timedelta64 or a string such as "365D". Defaults to "365D".
+      ends: Optional[npt.ArrayLike]: The ends of the windows (the first timestamp after a window). Defaults to
+        `window_ends` with step.
+      step: Duration: The distance between the default ends. Defaults to "1D".
+      n_grid: int: The maximum number of candidates per changepoint. Defaults to 40.
+      refine: bool: Whether to polish the best candidate of every window by a warm started curve_fit within the
+        bounds. Defaults to False.
+
+    Returns:
+      BaselineWindows: The fits of the windows in the order of ends
+    """
+    if isinstance(model, str):
+        model = get_model_function(model)
+    kind = _builtin_kind(model.f)
+    if kind is None:
+        raise ValueError("Baseline window searches only support the built-in models")
+    p = piecewise.N_PARAMS[kind]
+    n_cp = piecewise.N_CHANGEPOINTS[kind]
+    n_linear = p - n_cp
+
+    if ends is None:
+        ends = window_ends(data_model, length, step)
+    ends = np.asarray(ends, dtype="datetime64[s]").reshape(-1)
+    starts = ends - np.timedelta64(_tolerance_seconds(length), "s")
+
+    # every window is a contiguous range lo:hi of the readings in time order
+    permutation, times = data_model.time_index()
+    X = data_model.X.reshape(-1)[permutation]
+    y = data_model.y[permutation]
+    sigma = data_model.fit_sigma()
+    sigma = None if sigma is None else sigma[permutation]
+    w = np.ones_like(y) if sigma is None else sigma**-2
+    lo = np.searchsorted(times, starts)
+    hi = np.maximum(np.searchsorted(times, ends), lo)
+    n = hi - lo
+
+    # the bounds of every window, from its sorted X as in a fit
+    lower = np.full((len(ends), p), np.nan)
+    upper = np.full((len(ends), p), np.nan)
+    for i in np.flatnonzero(n > p):
+        try:
+            bounds = (
+                model.bounds(np.sort(X[lo[i] : hi[i]]))
+                if callable(model.bounds)
+                else model.bounds
+            )
+        except IndexError:
+            continue
+        lower[i], upper[i] = (np.broadcast_to(b, (p,)) for b in bounds)
+    fittable = ~np.isnan(lower[:, 0])
+
+    coeffs = np.full((len(ends), p), np.nan)
+    sse = np.full(len(ends), np.nan)
+    if fittable.any():
+        grid = robust._changepoint_grid(
+            kind,
+            X,
+            np.nanmin(lower[fittable], axis=0),
+            np.nanmax(upper[fittable], axis=0),
+            n_grid,
+        )
+        allowed = np.all(
+            (grid >= lower[:, None, n_linear:]) & (grid <= upper[:, None, n_linear:]),
+            axis=-1,
+        )
+        allowed &= fittable[:, None]
+        coeffs, sse = _grid_search(kind, X, y, w, lo, hi, grid, allowed)
+
+    # the weighted sums of every window, after centering y on its overall mean to limit cancellation
+    center = np.dot(w, y) / np.sum(w) if len(y) else 0.0
+    yc = y - center
+    sw, swy, swyy = (_window_sums(v, lo, hi) for v in (w, w * yc, w * yc * yc))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        y_mean = center + swy / sw
+        sst = swyy - swy**2 / sw
+
+    if refine:
+        coeffs, sse = _refine(
+            kind, model, X, y, sigma, lo, hi, lower, upper, coeffs, sse
+        )
+
+    # weights scaled to a mean of 1 per window, as in FitStatistics
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scale = n / sw
+    return BaselineWindows(
+        kind=kind,
+        starts=starts,
+        ends=ends,
+        n=n,
+        coeffs=coeffs,
+        sse=np.maximum(sse, 0.0) * scale,
+        sst=np.where(np.isnan(sse), np.nan, np.maximum(sst, 0.0) * scale),
+        y_mean=np.where(np.isnan(sse), np.nan, y_mean),
+        refined=refine,
+    )
+
+
+def _window_sums(
+    values: npt.NDArray[np.float64], lo: npt.NDArray[np.intp], hi: npt.NDArray[np.intp]
+) -> npt.NDArray[np.float64]:
+    """
+    Helper that sums values[lo:hi] of every window through a prefix sum over the leading axis.
+    """
+    prefix = np.zeros((len(values) + 1,) + values.shape[1:])
+    np.cumsum(values, axis=0, out=prefix[1:])
+    return prefix[hi] - prefix[lo]
+
+
+def _grid_search(
+    kind: str,
+    X: npt.NDArray[np.float64],
+    y: npt.NDArray[np.float64],
+    w: npt.NDArray[np.float64],
+    lo: npt.NDArray[np.intp],
+    hi: npt.NDArray[np.intp],
+    grid: npt.NDArray[np.float64],
+    allowed: npt.NDArray[np.bool_],
+) -> Tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+    """
+    Helper that solves the weighted least squares fit of every allowed changepoint candidate in every window from
+    prefix sums of the normal equations, and returns the coefficients (windows, p) and weighted sum of squared
+    residuals (windows,) of the best candidate of every window, NaN where no candidate is allowed.
+    """
+    n_windows, n_linear = len(lo), piecewise.N_PARAMS[kind] - grid.shape[1]
+    center = np.dot(w, y) / np.sum(w)
+    yc = y - center
+    swyy = _window_sums(w * yc * yc, lo, hi)
+
+    best_sse = np.full(n_windows, np.inf)
+    best_beta = np.full((n_windows, n_linear), np.nan)
+    best_k = np.zeros(n_windows, dtype=np.intp)
+    chunk = max(1, _CHUNK_BYTES // (8 * (len(y) + 1) * n_linear * (n_linear + 1)))
+    for first in range(0, len(grid), chunk):
+        cps = grid[first : first + chunk]
+        A = np.stack([piecewise.design_matrix(kind, X, c) for c in cps])
+        # the normal equations G beta = b of every window and candidate
+        G = _window_sums(np.einsum("knp,n,knq->nkpq", A, w, A), lo, hi)
+        b = _window_sums(np.einsum("knp,n,n->nkp", A, w, yc), lo, hi)
+        # only the allowed candidates of every window are solved
+        sel = allowed[:, first : first + chunk]
+        beta = np.zeros(b.shape)
+        try:
+            beta[sel] = np.linalg.solve(G[sel], b[sel][..., None])[..., 0]
+        except np.linalg.LinAlgError:
+            # pinv copes with candidates that leave a column of a window empty
+            beta[sel] = np.einsum("ipq,iq->ip", np.linalg.pinv(G[sel]), b[sel])
+        # b lies in the range of G, so G beta = b and the residual sum of squares is yy - beta.b
+        sse = np.where(sel, swyy[:, None] - np.einsum("wkp,wkp->wk", beta, b), np.inf)
+        k = np.argmin(sse, axis=1)
+        rows = np.arange(n_windows)
+        better = sse[rows, k] < best_sse
+        best_sse[better] = sse[better, k[better]]
+        best_beta[better] = beta[better, k[better]]
+        best_k[better] = first + k[better]
+
+    found = np.isfinite(best_sse)
+    best_beta[:, 0] += center
+    coeffs = np.concatenate([best_beta, grid[best_k]], axis=1)
+    coeffs[~found] = np.nan
+    return coeffs, np.where(found, best_sse, np.nan)
+
+
+def _refine(
+    kind: str,
+    model: MandVParameterModelFunction,
+    X: npt.NDArray[np.float64],
+    y: npt.NDArray[np.float64],
+    sigma: Optional[npt.NDArray[np.float64]],
+    lo: npt.NDArray[np.intp],
+    hi: npt.NDArray[np.intp],
+    lower: npt.NDArray[np.float64],
+    upper: npt.NDArray[np.float64],
+    coeffs: npt.NDArray[np.float64],
+    sse: npt.NDArray[np.float64],
+) -> Tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+    """
+    Helper that polishes the grid fit of every window by curve_fit within its bounds, warm started from the previous
+    window's coefficients or the window's grid fit, whichever has the smaller sum of squared residuals.
+    """
+    coeffs, sse = coeffs.copy(), sse.copy()
+    previous = None
+    for i in np.flatnonzero(~np.isnan(sse)):
+        Xw, yw = X[lo[i] : hi[i]], y[lo[i] : hi[i]]
+        ww = np.ones_like(yw) if sigma is None else sigma[lo[i] : hi[i]] ** -2
+
+        def window_sse(c: npt.NDArray[np.float64]) -> float:
+            r = yw - robust.piecewise_predict(kind, Xw, c)
+            return float(np.dot(ww * r, r))
+
+        p0 = coeffs[i]
+        if previous is not None and window_sse(previous) < sse[i]:
+            p0 = previous
+        # the grid search only respects the changepoint bounds
+        p0 = clip_to_bounds(p0, (lower[i], upper[i]))
+        order = np.argsort(Xw, kind="stable")
+        estimator = MandVCurvefitEstimator(
+            model_func=model.f,
+            bounds=(lower[i], upper[i]),
+            p0=p0,
+            jac=getattr(model, "jac", None),
+        )
+        estimator.fit(
+            Xw[order].reshape(-1, 1),
+            yw[order],
+            None if sigma is None else sigma[lo[i] : hi[i]][order],
+            False,
+            budget=model.fit_budget,
+        )
+        if estimator.fit_status_ in (
+            FitStatus.OK,
+            FitStatus.MAX_NFEV,
+            FitStatus.TIMEOUT,
+        ):
+            coeffs[i] = estimator.popt_
+            sse[i] = window_sse(coeffs[i])
+            previous = coeffs[i]
+    return coeffs, sse
@@ -0,0 +1,305 @@
+"""Bootstrap uncertainty for fitted changepoint models and the savings computed from them.
+
+Resamples keep X fixed and add resampled residuals to the fitted pred_y, either independently (`"residual"`) or in
+contiguous blocks of time to preserve autocorrelation between neighbouring days (`"block"`). All resamples are drawn
+at once as a B x n array.
+
+An estimator fit with sigma (or the counts of its data model) has residuals of different variances. Its residuals are
+standardized by their sigma before resampling and scaled by the sigma of the point they are added to, and every
+resample is refit with the same sigma, so the intervals agree with the weighted fit.
+
+Resamples are refit in one of two ways:
+
+- `"linear"`: the changepoints are held at their fitted values and all B resamples are solved as one least squares
+  problem with B right hand sides. This is the fastest option but ignores the uncertainty of the changepoints.
+- `"full"`: every resample is refit with `MandVCurvefitEstimator`, warm-started from the base fit. Resamples are split
+  into chunks which run in parallel worker processes when `n_jobs > 1`.
+"""
+
+import functools
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Optional, Tuple
+import numpy as np
+import numpy.typing as npt
+from changepointmodel.core.nptypes import OneDimNDArray
+from .budget import FitBudget
+from .calc import kernels, piecewise
+from .estimator import (
+    FitStatus,
+    MandVCurvefitEstimator,
+    MandVEnergyChangepointEstimator,
+)
+
+
+@dataclass(frozen=True)
+class BootstrapResult:
+    """The coefficient distribution of a bootstrapped estimator.
+
+    Attributes:
+        base_coefficients (OneDimNDArray[np.float64]): The coefficients of the original fit.
+        coefficients (npt.NDArray[np.float64]): A B x p array with the coefficients of every resample. Resamples that
+            could not be fit are NaN.
+        statuses (npt.NDArray[np.str_]): The FitStatus value of every resample.
+    """
+
+    base_coefficients: OneDimNDArray[np.float64]
+    coefficients: npt.NDArray[np.float64]
+    statuses: npt.NDArray[np.str_]
+
+    def interval(
+        self, confidence: float = 0.8
+    ) -> Tuple[OneDimNDArray[np.float64], OneDimNDArray[np.float64]]:
+        """
+        Percentile confidence intervals of the coefficients.
+
+        Args:
+          confidence: float: The confidence level. Defaults to 0.8.
+
+        Returns:
+          Tuple[OneDimNDArray[np.float64], OneDimNDArray[np.float64]]: The lower and upper bound of every coefficient
+        """
+        return _percentile_interval(self.coefficients, confidence)
+
+
+@dataclass(frozen=True)
+class SavingsBootstrapResult:
+    """The distribution of the adjusted savings of a pre and post retrofit pair.
+
+    Attributes:
+        total_savings (float): The adjusted savings of the original fits.
+        distribution (OneDimNDArray[np.float64]): The adjusted savings of every resample of the pre retrofit fit.
+        lower (float): The lower bound of the confidence interval.
+        upper (float): The upper bound of the confidence interval.
+        confidence (float): The confidence level of the interval.
+        coefficients (BootstrapResult): The bootstrapped pre retrofit coefficients.
+    """
+
+    total_savings: float
+    distribution: OneDimNDArray[np.float64]
+    lower: float
+    upper: float
+    confidence: float
+    coefficients: BootstrapResult
+
+
+def _percentile_interval(
+    values: npt.NDArray[np.float64], confidence: float
+) -> Tuple[Any, Any]:
+    if not 0 < confidence < 1:
+        raise ValueError("confidence must be between 0 and 1")
+    alpha = (1 - confidence) / 2
+    lower, upper = np.nanpercentile(values, [100 * alpha, 100 * (1 - alpha)], axis=0)
+    return lower, upper
+
+
+def resample_y(
+    estimator: MandVEnergyChangepointEstimator,
+    n_resamples: int = 1000,
+    method: str = "residual",
+    block_length: int = 7,
+    random_state: Optional[int] = None,
+) -> npt.NDArray[np.float64]:
+    """
+    Draws bootstrap resamples of y from a fitted estimator.
+
+    Args:
+      estimator: MandVEnergyChangepointEstimator: A fitted estimator
+      n_resamples: int: The number of resamples B. Defaults to 1000.
+      method: str: `"residual"` or `"block"`. Defaults to "residual".
+      block_length: int: The number of consecutive days in a block for `"block"`. Defaults to 7.
+      random_state: Optional[int]: The seed. Defaults to None.
+
+    Returns:
+      npt.NDArray[np.float64]: A B x n array of resampled y in the order of the estimator's X
+    """
+    rng = np.random.default_rng(random_state)
+    residuals = estimator.statistics.residuals
+    pred_y = estimator.pred_y
+    n = len(residuals)
+    # standardized residuals for a weighted fit, scaled back by the sigma of the point they are added to
+    sigma = (
+        np.ones(n)
+        if estimator.sigma_ is None
+        else np.asarray(estimator.sigma_, dtype=np.float64)
+    )
+    residuals = residuals / sigma
+
+    if method == "residual":
+        return pred_y + sigma * residuals[rng.integers(0, n, size=(n_resamples, n))]
+
+    if method == "block":
+        if block_length < 1:
+            raise ValueError("block_length must be a positive integer")
+        # moving blocks over the residuals in time order, wrapping around at the end
+        order = np.argsort(estimator.sensor_reading_timestamps, kind="stable")
+        n_blocks = -(-n // block_length)
+        starts = rng.integers(0, n, size=(n_resamples, n_blocks, 1))
+        positions = ((starts + np.arange(block_length)) % n).reshape(n_resamples, -1)
+        resampled = np.empty((n_resamples, n))
+        resampled[:, order] = residuals[order][positions[:, :n]]
+        return pred_y + sigma * resampled
+
+    raise ValueError('method must be "residual" or "block"')
+
+
+def _refit_chunk(
+    f: Callable[..., Any],
+    X: npt.NDArray[np.float64],
+    Y: npt.NDArray[np.float64],
+    p0: Tuple[float, ...],
+    bounds: Any,
+    budget: FitBudget,
+    sigma: Optional[npt.NDArray[np.float64]] = None,
+    absolute_sigma: bool = False,
+) -> Tuple[npt.NDArray[np.float64], npt.NDArray[np.str_]]:
+    """
+    Helper that refits every row of Y. Runs in a worker process when n_jobs > 1.
+    """
+    coefficients = np.empty((len(Y), len(p0)))
+    statuses = np.empty(len(Y), dtype="U16")
+    est = MandVCurvefitEstimator(model_func=f, p0=p0, bounds=bounds)
+    for i, y in enumerate(Y):
+        est.fit(X, y, sigma=sigma, absolute_sigma=absolute_sigma, budget=budget)
+        coefficients[i] = est.popt_
+        statuses[i] = est.fit_status_.value
+    return coefficients, statuses
+
+
+def bootstrap_coefficients(
+    estimator: MandVEnergyChangepointEstimator,
+    n_resamples: int = 1000,
+    method: str = "residual",
+    block_length: int = 7,
+    refit: str = "full",
+    n_jobs: int = 1,
+    budget: Optional[FitBudget] = None,
+    random_state: Optional[int] = None,
+) -> BootstrapResult:
+    """
+    Bootstraps the coefficients of a fitted estimator.
+
+    Args:
+      estimator: MandVEnergyChangepointEstimator: A fitted estimator
+      n_resamples: int: The number of resamples B. Defaults to 1000.
+      method: str: `"residual"` or `"block"`. See `resample_y`. Defaults to "residual".
+      block_length: int: The number of consecutive days in a block for `"block"`. Defaults to 7.
+      refit: str: `"full"` or `"linear"`. `"linear"` requires one of the built-in changepoint models.
+        Defaults to "full".
+      n_jobs: int: The number of worker processes for `"full"`. Defaults to 1.
+      budget: Optional[FitBudget]: The FitBudget of every refit for `"full"`. Defaults to the model's fit_budget. If
+        neither is set, refits that do not converge keep their best coefficients instead of raising.
+      random_state: Optional[int]: The seed. Defaults to None.
+
+    Returns:
+      BootstrapResult: The coefficient distribution
+    """
+    if estimator.fit_status is FitStatus.NOT_FITTABLE:
+        raise ValueError("Cannot bootstrap an estimator that was not fittable.")
+
+    Y = resample_y(
+        estimator,
+        n_resamples=n_resamples,
+        method=method,
+        block_length=block_length,
+        random_state=random_state,
+    )
+    base = np.asarray(estimator.coeffs, dtype=np.float64)
+    X = estimator.X
+    sigma = estimator.sigma_
+
+    if refit == "linear":
+        kind = piecewise.model_kind(estimator.model.f)
+        _, changepoints = piecewise.split_coefficients(kind, base)
+        A = piecewise.design_matrix(kind, X, changepoints)
+        if sigma is not None:
+            # weighted least squares by scaling the rows with 1 / sigma
+            A = A / sigma[:, None]
+            Y = Y / sigma
+        linear = np.linalg.lstsq(A, Y.T, rcond=None)[0].T
+        coefficients = np.hstack(
+            (linear, np.broadcast_to(changepoints, (len(Y), len(changepoints))))
+        )
+        statuses = np.full(len(Y), FitStatus.OK.value, dtype="U16")
+        return BootstrapResult(base, coefficients, statuses)
+
+    if refit != "full":
+        raise ValueError('refit must be "full" or "linear"')
+
+    model = estimator.model
+    # X never changes between resamples so the bounds only need to be resolved once
+    bounds = model.bounds(X) if callable(model.bounds) else model.bounds
+    if budget is None:
+        budget = model.fit_budget or FitBudget()
+    refit_chunk = functools.partial(
+        _refit_chunk,
+        model.f,
+        X,
+        p0=tuple(base),
+        bounds=bounds,
+        budget=budget,
+        sigma=sigma,
+        absolute_sigma=estimator.absolute_sigma_,
+    )
+
+    if n_jobs == 1:
+        coefficients, statuses = refit_chunk(Y)
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            results = list(pool.map(refit_chunk, np.array_split(Y, n_jobs)))
+        coefficients = np.vstack([c for c, _ in results])
+        statuses = np.concatenate([s for _, s in results])
+
+    return BootstrapResult(base, coefficients, statuses)
+
+
+def bootstrap_savings(
+    pre: MandVEnergyChangepointEstimator,
+    post: MandVEnergyChangepointEstimator,
+    confidence: float = 0.8,
+    **kwargs: Any,
+) -> SavingsBootstrapResult:
+    """
+    Bootstraps the adjusted savings of a pre and post retrofit pair. The adjusted savings are the pre retrofit model
+    predicted on the post retrofit X minus the post retrofit y, so only the pre retrofit fit is resampled: the post
+    retrofit y enters as a fixed total and the distribution does not include the uncertainty of the post retrofit
+    fit. For the built-in models the predictions of all B resampled coefficient sets are evaluated as one B x n array
+    with `kernels.predict`.
+
+    Args:
+      pre: MandVEnergyChangepointEstimator: The fitted pre retrofit estimator
+      post: MandVEnergyChangepointEstimator: The fitted post retrofit estimator
+      confidence: float: The confidence level of the interval. Defaults to 0.8.
+      **kwargs: Passed on to `bootstrap_coefficients`.
+
+    Returns:
+      SavingsBootstrapResult: The savings distribution and confidence interval
+    """
+    result = bootstrap_coefficients(pre, **kwargs)
+    total_post_y = post.total_y()
+    f = pre.model.f
+
+    kind = piecewise.MODEL_KINDS.get(f)
+    if kind is not None:
+        # resamples that could not be fit have NaN coefficients and so NaN savings
+        predicted = kernels.predict(kind, post.X.reshape(-1), result.coefficients)
+        distribution = np.sum(predicted, axis=1) - total_post_y
+    else:
+        distribution = np.array(
+            [
+                np.sum(f(post.X, *coeffs)) - total_post_y
+                if np.isfinite(coeffs).all()
+                else np.nan
+                for coeffs in result.coefficients
+            ]
+        )
+    lower, upper = _percentile_interval(distribution, confidence)
+
+    return SavingsBootstrapResult(
+        total_savings=float(np.sum(pre.predict(post.X)) - total_post_y),
+        distribution=distribution,
+        lower=float(lower),
+        upper=float(upper),
+        confidence=confidence,
+        coefficients=result,
+    )
@@ -0,0 +1,77 @@
+"""Evaluation budgets and wall-clock deadlines for curve fits.
+
+A `FitBudget` caps the number of model function evaluations and the wall-clock time a single fit may take. When a
+budget is exhausted the fit ends with the best coefficients seen so far instead of raising a `RuntimeError`.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Optional, Tuple
+from collections.abc import Callable
+import time
+import numpy as np
+import numpy.typing as npt
+
+
+@dataclass(frozen=True)
+class FitBudget:
+    """Limits for a single fit.
+
+    Attributes:
+        max_nfev (Optional[int]): The maximum number of function evaluations passed on to `scipy.optimize.least_squares`.
+            Defaults to None which uses scipy's default.
+        timeout (Optional[float]): The wall-clock time in seconds a fit may take. Defaults to None for no limit.
+    """
+
+    max_nfev: Optional[int] = None
+    timeout: Optional[float] = None
+
+    def __post_init__(self):
+        if self.max_nfev is not None and self.max_nfev < 1:
+            raise ValueError("max_nfev must be a positive integer")
+        if self.timeout is not None and self.timeout <= 0:
+            raise ValueError("timeout must be a positive number of seconds")
+
+
+class DeadlineExceeded(Exception):
+    """Raised from inside the optimizer when a fit runs past its deadline."""
+
+
+class EvaluationTracker:
+    """Wraps a model function to count evaluations, keep the coefficients with the lowest sum of squared residuals
+    seen so far and raise `DeadlineExceeded` once the deadline has passed.
+
+    Every call is counted, including the calls made for finite difference jacobians.
+    """
+
+    def __init__(
+        self,
+        f: Callable[..., npt.NDArray[np.float64]],
+        y: npt.NDArray[np.float64],
+        sigma: Optional[npt.NDArray[np.float64]] = None,
+        timeout: Optional[float] = None,
+    ):
+        self.f = f
+        self.y = y
+        self.sigma = sigma
+        self.deadline = None if timeout is None else time.perf_counter() + timeout
+        self.nfev = 0
+        self.best_sse = np.inf
+        self.best_params: Optional[Tuple[float, ...]] = None
+        self.__name__ = getattr(f, "__name__", type(f).__name__)
+
+    def __call__(self, X: Any, *params: float) -> npt.NDArray[np.float64]:
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            raise DeadlineExceeded()
+
+        pred_y = self.f(X, *params)
+        self.nfev += 1
+
+        residuals = pred_y - self.y
+        if self.sigma is not None:
+            residuals = residuals / self.sigma
+        sse = np.dot(residuals, residuals)
+        if sse < self.best_sse:
+            self.best_sse = sse
+            self.best_params = params
+
+        return pred_y
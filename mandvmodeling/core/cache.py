@@ -0,0 +1,47 @@
+"""A small least recently used cache with hit and miss counters, shared by the caches of
+`mandvmodeling.core.normalization`, `mandvmodeling.core.degree_days` and `mandvmodeling.core.weather`.
+"""
+
+from collections import OrderedDict
+from typing import Generic, Hashable, Optional, TypeVar
+
+V = TypeVar("V")
+
+
+class LRUCache(Generic[V]):
+    """A least recently used cache.
+
+    Args:
+        maxsize (Optional[int]): The maximum number of values to keep. Defaults to 256. None for no limit.
+    """
+
+    def __init__(self, maxsize: Optional[int] = 256):
+        if maxsize is not None and maxsize < 1:
+            raise ValueError("maxsize must be a positive integer")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, V]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Optional[V]:
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: V) -> None:
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if self.maxsize is not None and len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.hits = self.misses = 0
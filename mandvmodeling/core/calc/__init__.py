@@ -1,3 +1,32 @@
-from . import bounds, init_guesses
+from typing import TYPE_CHECKING
+from mandvmodeling._lazy import attach
 
-__all__ = ["bounds", "init_guesses"]
+__all__ = [
+    "bounds",
+    "checks",
+    "init_guesses",
+    "intervals",
+    "jit",
+    "kernels",
+    "piecewise",
+    "robust",
+    "statistics",
+]
+
+# the submodules are imported on first use
+__getattr__, __dir__ = attach(
+    __name__, modules={name: "." + name for name in __all__}, attributes={}
+)
+
+if TYPE_CHECKING:
+    from . import (
+        bounds,
+        checks,
+        init_guesses,
+        intervals,
+        jit,
+        kernels,
+        piecewise,
+        robust,
+        statistics,
+    )
@@ -0,0 +1,143 @@
+"""Fast pre-checks that decide whether X and y can be handed to `scipy.optimize.curve_fit` at all.
+
+Degenerate meters (non-finite or constant data, too few points) either run trf until `max_nfev` is exhausted or make the
+bounds callables in `mandvmodeling.core.calc.bounds` raise an `IndexError`. These checks are vectorized and cheap enough
+to run before every fit so that such meters can be rejected without ever starting the optimizer.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Optional, Union
+import numpy as np
+from changepointmodel.core.nptypes import OneDimNDArray, NByOneNDArray
+
+NONFINITE = "nonfinite"
+INVALID_SIGMA = "invalid_sigma"
+TOO_FEW_POINTS = "too_few_points"
+CONSTANT_X = "constant_x"
+CONSTANT_Y = "constant_y"
+EMPTY_CHANGEPOINT_RANGE = "empty_changepoint_range"
+
+
+@dataclass(frozen=True)
+class FittabilityCheck:
+    """The outcome of a pre-fit check.
+
+    Attributes:
+        fittable (bool): Whether the data can be passed to `scipy.optimize.curve_fit`.
+        reason (Optional[str]): One of the reason constants in this module if the data is not fittable.
+        message (Optional[str]): A human readable explanation if the data is not fittable.
+    """
+
+    fittable: bool
+    reason: Optional[str] = None
+    message: Optional[str] = None
+
+
+FITTABLE = FittabilityCheck(fittable=True)
+
+
+def _not_fittable(reason: str, message: str) -> FittabilityCheck:
+    return FittabilityCheck(fittable=False, reason=reason, message=message)
+
+
+def check_fittable(
+    X: Union[OneDimNDArray[np.float64], NByOneNDArray[np.float64]],
+    y: OneDimNDArray[np.float64],
+    n_params: Optional[int] = None,
+    sigma: Optional[OneDimNDArray[np.float64]] = None,
+) -> FittabilityCheck:
+    """Checks X and y for the degenerate cases that make a curve fit pointless.
+
+    Args:
+        X (Union[OneDimNDArray,NByOneNDArray]): A numpy X array. NByOneNDArray's will be squeezed internally.
+        y (OneDimNDArray[np.float64]): A numpy y array.
+        n_params (Optional[int], optional): The number of coefficients of the model. If given, there must be more
+            points than coefficients. Defaults to None.
+        sigma (Optional[OneDimNDArray[np.float64]], optional): The uncertainty in y. If given it must be finite and
+            strictly positive. Defaults to None.
+
+    Returns:
+        FittabilityCheck: The result of the check.
+    """
+    X = np.asarray(X, dtype=np.float64).reshape(-1)
+    y = np.asarray(y, dtype=np.float64).reshape(-1)
+
+    if not (np.isfinite(X).all() and np.isfinite(y).all()):
+        return _not_fittable(NONFINITE, "X and y must not contain NaN or inf values.")
+
+    if sigma is not None:
+        sigma = np.asarray(sigma, dtype=np.float64).reshape(-1)
+        if not (np.isfinite(sigma).all() and (sigma > 0).all()):
+            return _not_fittable(
+                INVALID_SIGMA, "sigma must be finite and strictly positive."
+            )
+
+    if n_params is not None and len(X) <= n_params:
+        return _not_fittable(
+            TOO_FEW_POINTS,
+            "{} points are not enough to fit {} coefficients.".format(len(X), n_params),
+        )
+
+    if len(X) == 0 or X.min() == X.max():
+        return _not_fittable(CONSTANT_X, "X is constant.")
+
+    if y.min() == y.max():
+        return _not_fittable(CONSTANT_Y, "y is constant.")
+
+    return FITTABLE
+
+
+def check_changepoint_ranges(
+    X: Union[OneDimNDArray[np.float64], NByOneNDArray[np.float64]],
+    bounds: Any,
+    n_changepoints: int,
+    min_points: int = 1,
+) -> FittabilityCheck:
+    """Checks that every changepoint has a valid search range with data inside of it.
+
+    The changepoints are the last n_changepoints coefficients, as in the built-in changepoint models (see
+    `mandvmodeling.core.calc.piecewise.N_CHANGEPOINTS`). A changepoint that is open on either side always has data in
+    its range.
+
+    Args:
+        X (Union[OneDimNDArray,NByOneNDArray]): A numpy X array. NByOneNDArray's will be squeezed internally.
+        bounds (Any): A resolved `(lower, upper)` bounds tuple as passed to `scipy.optimize.curve_fit`.
+        n_changepoints (int): The number of changepoints at the end of the coefficients.
+        min_points (int, optional): The minimum number of X values that must fall within each changepoint range.
+            Defaults to 1.
+
+    Returns:
+        FittabilityCheck: The result of the check.
+    """
+    X = np.asarray(X, dtype=np.float64).reshape(-1)
+    lower, upper = np.broadcast_arrays(
+        np.asarray(bounds[0], dtype=np.float64), np.asarray(bounds[1], dtype=np.float64)
+    )
+    if n_changepoints == 0:
+        return FITTABLE
+    lower, upper = (
+        lower.reshape(-1)[-n_changepoints:],
+        upper.reshape(-1)[-n_changepoints:],
+    )
+
+    is_changepoint = np.isfinite(lower) & np.isfinite(upper)
+    if not is_changepoint.any():
+        return FITTABLE
+
+    lower, upper = lower[is_changepoint], upper[is_changepoint]
+    if (lower >= upper).any():
+        return _not_fittable(
+            EMPTY_CHANGEPOINT_RANGE,
+            "A changepoint lower bound is not strictly less than its upper bound.",
+        )
+
+    in_range = (X[:, None] >= lower) & (X[:, None] <= upper)
+    if (np.count_nonzero(in_range, axis=0) < min_points).any():
+        return _not_fittable(
+            EMPTY_CHANGEPOINT_RANGE,
+            "Fewer than {} points fall between the changepoint bounds.".format(
+                min_points
+            ),
+        )
+
+    return FITTABLE
@@ -5,7 +5,7 @@ Array return types correspond directly to coeffs in the method signature. Detail
 array can be read in the docs for `scipy.optimize.curve_fit`.
 """
 
-from typing import Tuple, Union
+from typing import Any, Tuple, Union
 from collections.abc import Callable
 import numpy as np
 from changepointmodel.core.nptypes import OneDimNDArray, NByOneNDArray
@@ -125,3 +125,66 @@ def fivep(
         np.median(X) - ((X[-1] - X[0]) * 0.25),
         np.median(X) + ((X[-1] - X[0]) * 0.25),
     )
+
+
+def clip_to_bounds(guess: InitialGuessTuple, bounds: Any) -> InitialGuessTuple:
+    """Clips an initial guess into bounds. trf and dogbox reject an initial guess outside the bounds.
+
+    Guesses that are not finite, like the 0 / 0 slope `fourp` guesses when the lowest y is at the first X, are replaced
+    by curve_fit's own default for p0=None: the midpoint of two finite bounds, one away from a single finite bound
+    and 1 otherwise.
+
+    Args:
+        guess (InitialGuessTuple): The initial guess.
+        bounds (Any): The bounds as passed to curve_fit.
+
+    Returns:
+        InitialGuessTuple: The clipped initial guess.
+    """
+    guess = np.asarray(guess, dtype=np.float64)
+    lower, upper = (
+        np.broadcast_to(np.asarray(b, dtype=np.float64), guess.shape) for b in bounds
+    )
+    finite_lower, finite_upper = np.isfinite(lower), np.isfinite(upper)
+    with np.errstate(invalid="ignore"):
+        default = np.select(
+            [finite_lower & finite_upper, finite_lower, finite_upper],
+            [(lower + upper) / 2, lower + 1, upper - 1],
+            1.0,
+        )
+    guess = np.where(np.isfinite(guess), guess, default)
+    return tuple(np.clip(guess, lower, upper))
+
+
+class BoundedInitialGuess:
+    """An initial guess function that clips the guesses of another one into the bounds of a model, since the guesses
+    of this module are not bound aware. A 5P guess of the right changepoint can land above its upper bound, for example.
+
+    Attributes:
+        guess (OpenInitialGuessCallable): The initial guess function.
+        bounds (Any): The bounds function of the model, or its bounds.
+    """
+
+    def __init__(self, guess: OpenInitialGuessCallable, bounds: Any):
+        self.guess = guess
+        self.bounds = bounds
+
+    def __call__(
+        self,
+        X: Union[OneDimNDArray[np.float64], NByOneNDArray[np.float64]],
+        y: OneDimNDArray[np.float64],
+    ) -> InitialGuessTuple:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # non-finite guesses are replaced by clip_to_bounds
+            guess = self.guess(X, y)
+        try:
+            bounds = self.bounds(X) if callable(self.bounds) else self.bounds
+        except IndexError:
+            # too few points for the bounds, which the fit reports itself
+            return guess
+        return clip_to_bounds(guess, bounds)
+
+    def __repr__(self) -> str:
+        return "BoundedInitialGuess({})".format(
+            getattr(self.guess, "__name__", self.guess)
+        )
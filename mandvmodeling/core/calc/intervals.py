@@ -0,0 +1,145 @@
+"""Confidence and prediction bands of fitted changepoint models from the coefficient covariance.
+
+By the delta method, the variance of the mean prediction at x is J(x) @ pcov @ J(x).T, where J(x) is the Jacobian of
+the model function with respect to its coefficients. The bands at a confidence level are
+
+    confidence: pred_y +/- t * sqrt(J pcov J')
+    prediction: pred_y +/- t * sqrt(J pcov J' + s2)
+
+with t the two-sided quantile of the t distribution with n - p degrees of freedom and s2 = sse / (n - p) the
+residual variance. For a weighted fit, sse is weighted by 1 / sigma**2 with the weights scaled to a mean of 1, so s2 is
+the variance of an observation of average weight.
+
+The Jacobians of the built-in models are analytic. Any other model function gets a forward difference Jacobian.
+The models are not differentiable with respect to a changepoint at X == cp, where that derivative is taken as 0.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Callable, Sequence
+import numpy as np
+import numpy.typing as npt
+from scipy import stats
+
+
+@dataclass(frozen=True)
+class Bands:
+    """Predictions with confidence and prediction bands. Every array has the shape of the predictions.
+
+    Attributes:
+        pred_y (npt.NDArray[np.float64]): The predictions.
+        confidence_lower (npt.NDArray[np.float64]): The lower bound of the confidence band of the mean prediction.
+        confidence_upper (npt.NDArray[np.float64]): The upper bound of the confidence band of the mean prediction.
+        prediction_lower (npt.NDArray[np.float64]): The lower bound of the prediction band of a new observation.
+        prediction_upper (npt.NDArray[np.float64]): The upper bound of the prediction band of a new observation.
+    """
+
+    pred_y: npt.NDArray[np.float64]
+    confidence_lower: npt.NDArray[np.float64]
+    confidence_upper: npt.NDArray[np.float64]
+    prediction_lower: npt.NDArray[np.float64]
+    prediction_upper: npt.NDArray[np.float64]
+
+
+def canonical_jacobian(
+    X: npt.ArrayLike, coefficients: npt.ArrayLike
+) -> npt.NDArray[np.float64]:
+    """
+    The analytic Jacobian of the 5P model yint + ls * min(X - lcp, 0) + rs * max(X - rcp, 0) with respect to
+    (yint, ls, rs, lcp, rcp).
+
+    Args:
+      X: npt.ArrayLike: X of shape (N,)
+      coefficients: npt.ArrayLike: 5P coefficients of shape (5,) or (M, 5)
+
+    Returns:
+      npt.NDArray[np.float64]: The Jacobian of shape (N, 5) or (M, N, 5)
+    """
+    X = np.asarray(X, dtype=np.float64).reshape(-1)
+    c = np.asarray(coefficients, dtype=np.float64)
+    _, ls, rs, lcp, rcp = (col[..., None] for col in np.moveaxis(c, -1, 0))
+    left = X - lcp
+    right = X - rcp
+    # the right segment wins for X >= rcp when the changepoints cross
+    on_left = (left < 0) & (right < 0)
+    return np.stack(
+        np.broadcast_arrays(
+            np.ones_like(left),
+            np.where(on_left, left, 0.0),
+            np.maximum(right, 0),
+            -ls * on_left,
+            -rs * (right > 0),
+        ),
+        axis=-1,
+    )
+
+
+def numerical_jacobian(
+    f: Callable[..., Any], X: npt.NDArray[np.float64], coeffs: Sequence[float]
+) -> npt.NDArray[np.float64]:
+    """
+    A forward difference Jacobian of any model function with respect to its coefficients.
+
+    Args:
+      f: Callable[..., Any]: The model function
+      X: npt.NDArray[np.float64]: X as passed to f
+      coeffs: Sequence[float]: The coefficients
+
+    Returns:
+      npt.NDArray[np.float64]: The Jacobian of shape (N, p)
+    """
+    coeffs = np.asarray(coeffs, dtype=np.float64)
+    base = np.asarray(f(X, *coeffs), dtype=np.float64).reshape(-1)
+    steps = np.sqrt(np.finfo(np.float64).eps) * np.maximum(np.abs(coeffs), 1.0)
+    columns = []
+    for i, step in enumerate(steps):
+        shifted = coeffs.copy()
+        shifted[i] += step
+        columns.append(
+            (np.asarray(f(X, *shifted), dtype=np.float64).reshape(-1) - base) / step
+        )
+    return np.column_stack(columns)
+
+
+def bands(
+    pred_y: npt.ArrayLike,
+    jacobian: npt.ArrayLike,
+    pcov: npt.ArrayLike,
+    s2: npt.ArrayLike,
+    dof: npt.ArrayLike,
+    confidence: float = 0.95,
+) -> Bands:
+    """
+    Computes the bands of one or many models.
+
+    Args:
+      pred_y: npt.ArrayLike: The predictions of shape (N,) or (M, N)
+      jacobian: npt.ArrayLike: The Jacobians of shape (N, p) or (M, N, p)
+      pcov: npt.ArrayLike: The coefficient covariances of shape (p, p) or (M, p, p)
+      s2: npt.ArrayLike: The residual variances, a scalar or of shape (M,)
+      dof: npt.ArrayLike: The residual degrees of freedom n - p, a scalar or of shape (M,)
+      confidence: float: The confidence level. Defaults to 0.95.
+
+    Returns:
+      Bands: The bands
+    """
+    if not 0 < confidence < 1:
+        raise ValueError("confidence must be between 0 and 1")
+    pred_y = np.asarray(pred_y, dtype=np.float64)
+    J = np.asarray(jacobian, dtype=np.float64)
+    pcov = np.asarray(pcov, dtype=np.float64)
+    s2 = np.asarray(s2, dtype=np.float64)[..., None]
+    dof = np.asarray(dof, dtype=np.float64)[..., None]
+
+    with np.errstate(invalid="ignore"):
+        variance = np.einsum("...np,...pq,...nq->...n", J, pcov, J)
+        t = stats.t.ppf(1 - (1 - confidence) / 2, dof)
+        mean_halfwidth = t * np.sqrt(variance)
+        observation_halfwidth = t * np.sqrt(variance + s2)
+
+    return Bands(
+        pred_y=pred_y,
+        confidence_lower=pred_y - mean_halfwidth,
+        confidence_upper=pred_y + mean_halfwidth,
+        prediction_lower=pred_y - observation_halfwidth,
+        prediction_upper=pred_y + observation_halfwidth,
+    )
@@ -0,0 +1,242 @@
+"""Model functions, residuals and Jacobians of the built-in changepoint models for the "jit" backend.
+
+Every model is evaluated as the 5P model yint + ls * min(X - lcp, 0) + rs * max(X - rcp, 0) of its canonical
+coefficients (see `mandvmodeling.core.calc.piecewise.canonical_map`), and its Jacobian is the analytic 5P Jacobian
+times the 5 x p canonical map. As in the piecewise model function, the right segment wins for X >= rcp when the
+changepoints cross.
+
+When numba is installed, the 5P value, residual and Jacobian loops are compiled with `numba.njit` on first use, so
+numba is only imported once the jit backend is actually used. This cuts the
+per-evaluation overhead of curve_fit, which matters most for many short daily series where NumPy call overhead
+outweighs the arithmetic. Without numba the same functions fall back to the NumPy kernels of
+`mandvmodeling.core.calc.kernels` and `mandvmodeling.core.calc.intervals.canonical_jacobian`, so results match either
+way and the analytic Jacobian still replaces curve_fit's finite differences.
+
+The model functions keep the names and signatures of the functions in `changepointmodel.core.calc.models`.
+`register_model_kinds` adds them to `piecewise.MODEL_KINDS`, so they work everywhere the built-in models do.
+"""
+
+from typing import Any, Callable, Tuple
+import functools
+import importlib.util
+import inspect
+import numpy as np
+import numpy.typing as npt
+from . import intervals, kernels, piecewise
+
+# numba itself takes long to import, so only look it up here
+HAS_NUMBA = importlib.util.find_spec("numba") is not None
+
+# "default" fits the changepointmodel functions with finite difference Jacobians, "jit" uses this module
+BACKENDS: Tuple[str, ...] = ("default", "jit")
+
+
+def _fivep_loop(x, yint, ls, rs, lcp, rcp, out):  # pragma: no cover
+    for i in range(x.shape[0]):
+        # the right segment wins when the changepoints cross, as in the piecewise model function
+        value = yint
+        left = x[i] - lcp
+        right = x[i] - rcp
+        if right >= 0:
+            value += rs * right
+        elif left < 0:
+            value += ls * left
+        out[i] = value
+    return out
+
+
+def _residuals_loop(x, y, yint, ls, rs, lcp, rcp, out):  # pragma: no cover
+    for i in range(x.shape[0]):
+        # the right segment wins when the changepoints cross, as in the piecewise model function
+        value = yint
+        left = x[i] - lcp
+        right = x[i] - rcp
+        if right >= 0:
+            value += rs * right
+        elif left < 0:
+            value += ls * left
+        out[i] = y[i] - value
+    return out
+
+
+def _jacobian_loop(x, yint, ls, rs, lcp, rcp, out):  # pragma: no cover
+    for i in range(x.shape[0]):
+        left = x[i] - lcp
+        right = x[i] - rcp
+        on_left = left < 0 and right < 0
+        out[i, 0] = 1.0
+        out[i, 1] = left if on_left else 0.0
+        out[i, 2] = right if right > 0 else 0.0
+        out[i, 3] = -ls if on_left else 0.0
+        out[i, 4] = -rs if right > 0 else 0.0
+    return out
+
+
+@functools.lru_cache(maxsize=None)
+def _compiled() -> Tuple[Callable[..., Any], Callable[..., Any], Callable[..., Any]]:
+    """
+    Helper that imports numba and compiles the value, residual and Jacobian loops on first use.
+    """
+    import numba
+
+    njit = numba.njit(cache=True)
+    return njit(_fivep_loop), njit(_residuals_loop), njit(_jacobian_loop)
+
+
+def _as_x(X: npt.ArrayLike) -> npt.NDArray[np.float64]:
+    return np.ascontiguousarray(X, dtype=np.float64).reshape(-1)
+
+
+def fivep_value(
+    X: npt.ArrayLike, c: npt.NDArray[np.float64]
+) -> npt.NDArray[np.float64]:
+    """
+    The 5P model at X.
+
+    Args:
+      X: npt.ArrayLike: X of shape (N,) or (N, 1)
+      c: npt.NDArray[np.float64]: The 5P coefficients (yint, ls, rs, lcp, rcp)
+
+    Returns:
+      npt.NDArray[np.float64]: The values of shape (N,)
+    """
+    x = _as_x(X)
+    if HAS_NUMBA:
+        return _compiled()[0](x, *(float(v) for v in c), np.empty_like(x))
+    return kernels.fivep(x, *c)
+
+
+def fivep_residuals(
+    X: npt.ArrayLike, y: npt.ArrayLike, c: npt.NDArray[np.float64]
+) -> npt.NDArray[np.float64]:
+    """
+    The residuals y - f(X) of the 5P model.
+
+    Args:
+      X: npt.ArrayLike: X of shape (N,) or (N, 1)
+      y: npt.ArrayLike: y of shape (N,)
+      c: npt.NDArray[np.float64]: The 5P coefficients (yint, ls, rs, lcp, rcp)
+
+    Returns:
+      npt.NDArray[np.float64]: The residuals of shape (N,)
+    """
+    x = _as_x(X)
+    y = np.ascontiguousarray(y, dtype=np.float64)
+    if HAS_NUMBA:
+        return _compiled()[1](x, y, *(float(v) for v in c), np.empty_like(x))
+    return y - kernels.fivep(x, *c)
+
+
+def fivep_jacobian(
+    X: npt.ArrayLike, c: npt.NDArray[np.float64]
+) -> npt.NDArray[np.float64]:
+    """
+    The Jacobian of the 5P model with respect to its coefficients.
+
+    Args:
+      X: npt.ArrayLike: X of shape (N,) or (N, 1)
+      c: npt.NDArray[np.float64]: The 5P coefficients (yint, ls, rs, lcp, rcp)
+
+    Returns:
+      npt.NDArray[np.float64]: The Jacobian of shape (N, 5)
+    """
+    x = _as_x(X)
+    if HAS_NUMBA:
+        return _compiled()[2](x, *(float(v) for v in c), np.empty((len(x), 5)))
+    return intervals.canonical_jacobian(x, c)
+
+
+class JitFunction:
+    """The model function, Jacobian or residuals of a built-in model for the jit backend. Instances are shared per
+    kind and part, and pickle by kind and part.
+
+    Attributes:
+        kind (str): The model kind.
+        part (str): "f" for the model function f(X, *coeffs), "jac" for the Jacobian jac(X, *coeffs) of shape (N, p)
+            as curve_fit expects it, or "residuals" for residuals(X, y, *coeffs).
+    """
+
+    def __init__(self, kind: str, part: str):
+        self.kind = kind
+        self.part = part
+        self._T = piecewise.canonical_map(kind)
+        original = piecewise.MODEL_FUNCTIONS[kind]
+        self.__name__ = (
+            original.__name__
+            if part == "f"
+            else "{}_{}".format(original.__name__, part)
+        )
+        # curve_fit and _n_params count the coefficients from the signature
+        signature = inspect.signature(original)
+        if part == "residuals":
+            params = list(signature.parameters.values())
+            signature = signature.replace(
+                parameters=[
+                    params[0],
+                    inspect.Parameter("y", inspect.Parameter.POSITIONAL_OR_KEYWORD),
+                    *params[1:],
+                ]
+            )
+        self.__signature__ = signature
+
+    def __call__(self, X: npt.ArrayLike, *args: Any) -> npt.NDArray[np.float64]:
+        if self.part == "residuals":
+            y, args = args[0], args[1:]
+            return fivep_residuals(X, y, self._T @ np.asarray(args, dtype=np.float64))
+        c = self._T @ np.asarray(args, dtype=np.float64)
+        if self.part == "jac":
+            return fivep_jacobian(X, c) @ self._T
+        return fivep_value(X, c)
+
+    def __reduce__(self) -> Tuple[Any, Tuple[str, str]]:
+        return jit_function, (self.kind, self.part)
+
+    def __repr__(self) -> str:
+        return "<jit {} of {}>".format(self.part, self.kind)
+
+
+def jit_function(kind: str, part: str = "f") -> JitFunction:
+    """
+    Returns the shared jit backend model function, Jacobian or residuals of a built-in model.
+
+    Args:
+      kind: str: One of "2P", "3PC", "3PH", "4P" or "5P"
+      part: str: "f", "jac" or "residuals". Defaults to "f".
+
+    Returns:
+      JitFunction: The function
+    """
+    if kind not in piecewise.N_PARAMS:
+        raise ValueError("Unknown model kind {}".format(kind))
+    if part not in ("f", "jac", "residuals"):
+        raise ValueError("part must be one of f, jac or residuals")
+    # cached by the positional arguments, so jit_function(kind) and jit_function(kind, "f") share an instance
+    return _shared_function(kind, part)
+
+
+@functools.lru_cache(maxsize=None)
+def _shared_function(kind: str, part: str) -> JitFunction:
+    return JitFunction(kind, part)
+
+
+def model_functions(kind: str) -> Tuple[JitFunction, JitFunction]:
+    """
+    Returns the jit backend model function and Jacobian of a built-in model.
+
+    Args:
+      kind: str: One of "2P", "3PC", "3PH", "4P" or "5P"
+
+    Returns:
+      Tuple[JitFunction, JitFunction]: The model function and Jacobian
+    """
+    return jit_function(kind, "f"), jit_function(kind, "jac")
+
+
+def register_model_kinds() -> None:
+    """
+    Registers the jit backend model functions of all built-in models in `piecewise.MODEL_KINDS`, so
+    `piecewise.model_kind` and the estimators recognize them. Called when a model function or estimator selects the
+    jit backend. Registering again has no effect.
+    """
+    for kind in piecewise.N_PARAMS:
+        piecewise.register_model_kind(jit_function(kind, "f"), kind)
@@ -0,0 +1,176 @@
+"""Vectorized evaluation kernels for the piecewise linear changepoint models.
+
+The kernels compute the same values as the model functions in `changepointmodel.core.calc.models` with
+`np.minimum`/`np.maximum` instead of `np.piecewise`, and broadcast:
+
+- scalar coefficients against X of shape (N,) give (N,)
+- coefficient arrays of shape (M,) against X of shape (N,) give (M, N), one row per coefficient set
+- coefficient arrays of shape (M,) against X of shape (M, N) give (M, N), one X per coefficient set
+
+The result has the dtype of X if X is a floating point array (so float32 stays float32) and float64 otherwise. It can
+be written into a preallocated `out` array of the result's shape and dtype, in which case at most one temporary array
+(and a boolean mask for 5P) is allocated.
+"""
+
+from typing import Any, Callable, Dict, Optional, Sequence
+import numpy as np
+import numpy.typing as npt
+
+ArrayOrScalar = Any
+
+
+def _prepare(
+    X: npt.ArrayLike, coeffs: Sequence[ArrayOrScalar], out: Optional[npt.NDArray[Any]]
+) -> Any:
+    """
+    Helper that casts X and the coefficients to a common floating point dtype, lines up coefficient arrays with the
+    rows of the result and checks or allocates the output buffer.
+    """
+    X = np.asarray(X)
+    dtype = X.dtype if np.issubdtype(X.dtype, np.floating) else np.dtype(np.float64)
+    X = X.astype(dtype, copy=False)
+
+    cs = []
+    for c in coeffs:
+        c = np.asarray(c, dtype=dtype)
+        if c.ndim == 1:
+            # one coefficient per row of the result
+            c = c[:, None]
+        cs.append(c)
+
+    shape = np.broadcast_shapes(X.shape, *(c.shape for c in cs))
+    if out is None:
+        out = np.empty(shape, dtype=dtype)
+    elif out.shape != shape or out.dtype != dtype:
+        raise ValueError(
+            "out must have shape {} and dtype {}, got {} and {}".format(
+                shape, dtype, out.shape, out.dtype
+            )
+        )
+    return X, cs, out
+
+
+def twop(
+    X: npt.ArrayLike,
+    yint: ArrayOrScalar,
+    m: ArrayOrScalar,
+    out: Optional[npt.NDArray[Any]] = None,
+) -> npt.NDArray[Any]:
+    """yint + m * X"""
+    X, (yint, m), out = _prepare(X, (yint, m), out)
+    np.multiply(X, m, out=out)
+    out += yint
+    return out
+
+
+def threepc(
+    X: npt.ArrayLike,
+    yint: ArrayOrScalar,
+    m: ArrayOrScalar,
+    cp: ArrayOrScalar,
+    out: Optional[npt.NDArray[Any]] = None,
+) -> npt.NDArray[Any]:
+    """yint + m * max(X - cp, 0)"""
+    X, (yint, m, cp), out = _prepare(X, (yint, m, cp), out)
+    np.subtract(X, cp, out=out)
+    np.maximum(out, 0, out=out)
+    out *= m
+    out += yint
+    return out
+
+
+def threeph(
+    X: npt.ArrayLike,
+    yint: ArrayOrScalar,
+    m: ArrayOrScalar,
+    cp: ArrayOrScalar,
+    out: Optional[npt.NDArray[Any]] = None,
+) -> npt.NDArray[Any]:
+    """yint + m * min(X - cp, 0)"""
+    X, (yint, m, cp), out = _prepare(X, (yint, m, cp), out)
+    np.subtract(X, cp, out=out)
+    np.minimum(out, 0, out=out)
+    out *= m
+    out += yint
+    return out
+
+
+def fourp(
+    X: npt.ArrayLike,
+    yint: ArrayOrScalar,
+    ls: ArrayOrScalar,
+    rs: ArrayOrScalar,
+    cp: ArrayOrScalar,
+    out: Optional[npt.NDArray[Any]] = None,
+) -> npt.NDArray[Any]:
+    """yint + ls * min(X - cp, 0) + rs * max(X - cp, 0)"""
+    X, (yint, ls, rs, cp), out = _prepare(X, (yint, ls, rs, cp), out)
+    tmp = np.subtract(X, cp, out=np.empty_like(out))
+    np.minimum(tmp, 0, out=out)
+    out *= ls
+    np.maximum(tmp, 0, out=tmp)
+    tmp *= rs
+    out += tmp
+    out += yint
+    return out
+
+
+def fivep(
+    X: npt.ArrayLike,
+    yint: ArrayOrScalar,
+    ls: ArrayOrScalar,
+    rs: ArrayOrScalar,
+    lcp: ArrayOrScalar,
+    rcp: ArrayOrScalar,
+    out: Optional[npt.NDArray[Any]] = None,
+) -> npt.NDArray[Any]:
+    """yint + rs * (X - rcp) for X >= rcp, else yint + ls * min(X - lcp, 0)
+
+    This is yint + ls * min(X - lcp, 0) + rs * max(X - rcp, 0) when lcp <= rcp. When the changepoints cross, the
+    right segment wins for X >= rcp as in the piecewise model function.
+    """
+    X, (yint, ls, rs, lcp, rcp), out = _prepare(X, (yint, ls, rs, lcp, rcp), out)
+    np.subtract(X, lcp, out=out)
+    np.minimum(out, 0, out=out)
+    out *= ls
+    tmp = np.subtract(X, rcp, out=np.empty_like(out))
+    right = tmp >= 0
+    tmp *= rs
+    np.copyto(out, tmp, where=right)
+    out += yint
+    return out
+
+
+KERNELS: Dict[str, Callable[..., npt.NDArray[Any]]] = {
+    "2P": twop,
+    "3PC": threepc,
+    "3PH": threeph,
+    "4P": fourp,
+    "5P": fivep,
+}
+
+
+def predict(
+    kind: str,
+    X: npt.ArrayLike,
+    coeffs: npt.ArrayLike,
+    out: Optional[npt.NDArray[Any]] = None,
+) -> npt.NDArray[Any]:
+    """
+    Evaluates a model kind for one coefficient set of shape (p,) or M coefficient sets of shape (M, p).
+
+    Args:
+      kind: str: The model kind, one of "2P", "3PC", "3PH", "4P" or "5P"
+      X: npt.ArrayLike: X of shape (N,), or (M, N) for M coefficient sets
+      coeffs: npt.ArrayLike: The coefficients in the order of the model function
+      out: Optional[npt.NDArray[Any]]: A buffer for the result. Defaults to None.
+
+    Returns:
+      npt.NDArray[Any]: The predictions of shape (N,) or (M, N)
+    """
+    try:
+        kernel = KERNELS[kind]
+    except KeyError:
+        raise ValueError("Unknown model kind {}".format(kind)) from None
+    coeffs = np.asarray(coeffs)
+    return kernel(X, *np.moveaxis(coeffs, -1, 0), out=out)
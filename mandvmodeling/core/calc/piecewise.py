@@ -0,0 +1,185 @@
+"""Closed-form building blocks for the piecewise linear changepoint models in `changepointmodel.core.calc.models`.
+
+With the changepoints held fixed, every model is linear in its intercept and slopes. `design_matrix` builds the columns
+of that linear model so that y = design_matrix(...) @ linear coefficients:
+
+    2P:  [1, X]
+    3PC: [1, max(X - cp, 0)]
+    3PH: [1, min(X - cp, 0)]
+    4P:  [1, min(X - cp, 0), max(X - cp, 0)]
+    5P:  [1, min(X - lcp, 0), max(X - rcp, 0)]
+
+The coefficients follow the order of the model functions, i.e. the intercept, then the slopes, then the changepoints.
+"""
+
+from typing import Any, Callable, Dict, Sequence, Tuple, Union
+import numpy as np
+import numpy.typing as npt
+from changepointmodel.core.calc import models as ChangepointModelModels
+from changepointmodel.core.nptypes import OneDimNDArray, NByOneNDArray
+
+MODEL_KINDS: Dict[Callable[..., Any], str] = {
+    ChangepointModelModels.twop: "2P",
+    ChangepointModelModels.threepc: "3PC",
+    ChangepointModelModels.threeph: "3PH",
+    ChangepointModelModels.fourp: "4P",
+    ChangepointModelModels.fivep: "5P",
+}
+
+# the changepointmodel function of every kind
+MODEL_FUNCTIONS: Dict[str, Callable[..., Any]] = {
+    kind: f for f, kind in MODEL_KINDS.items()
+}
+
+N_CHANGEPOINTS: Dict[str, int] = {"2P": 0, "3PC": 1, "3PH": 1, "4P": 1, "5P": 2}
+
+N_PARAMS: Dict[str, int] = {"2P": 2, "3PC": 3, "3PH": 3, "4P": 4, "5P": 5}
+
+
+def model_kind(f: Callable[..., Any]) -> str:
+    """Looks up which changepoint model a model function is.
+
+    Args:
+        f (Callable[..., Any]): A model function from `changepointmodel.core.calc.models`.
+
+    Raises:
+        ValueError: If f is not one of the changepoint model functions.
+
+    Returns:
+        str: One of "2P", "3PC", "3PH", "4P" or "5P".
+    """
+    try:
+        return MODEL_KINDS[f]
+    except (KeyError, TypeError):
+        raise ValueError(
+            "{} is not one of the piecewise linear models in changepointmodel.core.calc.models".format(
+                getattr(f, "__name__", f)
+            )
+        ) from None
+
+
+def register_model_kind(f: Callable[..., Any], kind: str) -> None:
+    """Registers another implementation of a built-in model, e.g. a compiled one, in MODEL_KINDS.
+
+    Args:
+        f (Callable[..., Any]): The model function. It must compute the same values as the changepointmodel function.
+        kind (str): The model kind.
+
+    Raises:
+        ValueError: If kind is not one of the built-in model kinds.
+    """
+    if kind not in N_PARAMS:
+        raise ValueError("Unknown model kind {}".format(kind))
+    MODEL_KINDS[f] = kind
+
+
+def split_coefficients(
+    kind: str, coeffs: Sequence[float]
+) -> Tuple[OneDimNDArray[np.float64], OneDimNDArray[np.float64]]:
+    """Splits the coefficients of a model into the linear coefficients and the changepoints.
+
+    Args:
+        kind (str): The model kind.
+        coeffs (Sequence[float]): The coefficients in the order of the model function.
+
+    Returns:
+        Tuple[OneDimNDArray[np.float64], OneDimNDArray[np.float64]]: The linear coefficients and the changepoints.
+    """
+    coeffs = np.asarray(coeffs, dtype=np.float64)
+    n_linear = len(coeffs) - N_CHANGEPOINTS[kind]
+    return coeffs[:n_linear], coeffs[n_linear:]
+
+
+def design_matrix(
+    kind: str,
+    X: Union[OneDimNDArray[np.float64], NByOneNDArray[np.float64]],
+    changepoints: Sequence[float] = (),
+) -> npt.NDArray[np.float64]:
+    """Builds the design matrix of a changepoint model with fixed changepoints.
+
+    Args:
+        kind (str): The model kind.
+        X (Union[OneDimNDArray,NByOneNDArray]): A numpy X array. NByOneNDArray's will be squeezed internally.
+        changepoints (Sequence[float], optional): The changepoints. Defaults to () for 2P.
+
+    Returns:
+        npt.NDArray[np.float64]: An n x p design matrix.
+    """
+    X = np.asarray(X, dtype=np.float64).reshape(-1)
+    ones = np.ones_like(X)
+    if kind == "2P":
+        return np.column_stack((ones, X))
+    if kind == "3PC":
+        return np.column_stack((ones, np.maximum(X - changepoints[0], 0)))
+    if kind == "3PH":
+        return np.column_stack((ones, np.minimum(X - changepoints[0], 0)))
+    if kind == "4P":
+        return np.column_stack(
+            (
+                ones,
+                np.minimum(X - changepoints[0], 0),
+                np.maximum(X - changepoints[0], 0),
+            )
+        )
+    if kind == "5P":
+        right = X - changepoints[1]
+        # the right segment wins for X >= rcp when the changepoints cross, as in the model function
+        return np.column_stack(
+            (
+                ones,
+                np.where(right >= 0, 0.0, np.minimum(X - changepoints[0], 0)),
+                np.maximum(right, 0),
+            )
+        )
+    raise ValueError("Unknown model kind {}".format(kind))
+
+
+def canonical_coefficients(
+    kind: str, coeffs: Sequence[float]
+) -> OneDimNDArray[np.float64]:
+    """Rewrites the coefficients of any changepoint model as the coefficients of a 5P model
+    (yint, ls, rs, lcp, rcp) that predicts the same values:
+
+        2P:  (yint, m, m, 0, 0)
+        3PC: (yint, 0, m, cp, cp)
+        3PH: (yint, m, 0, cp, cp)
+        4P:  (yint, ls, rs, cp, cp)
+
+    This lets the predictions of a mix of model kinds be computed in a single vectorized pass.
+
+    Args:
+        kind (str): The model kind.
+        coeffs (Sequence[float]): The coefficients in the order of the model function.
+
+    Returns:
+        OneDimNDArray[np.float64]: The 5P coefficients.
+    """
+    c = np.asarray(coeffs, dtype=np.float64)
+    if kind == "2P":
+        return np.array([c[0], c[1], c[1], 0.0, 0.0])
+    if kind == "3PC":
+        return np.array([c[0], 0.0, c[1], c[2], c[2]])
+    if kind == "3PH":
+        return np.array([c[0], c[1], 0.0, c[2], c[2]])
+    if kind == "4P":
+        return np.array([c[0], c[1], c[2], c[3], c[3]])
+    if kind == "5P":
+        return c.copy()
+    raise ValueError("Unknown model kind {}".format(kind))
+
+
+def canonical_map(kind: str) -> npt.NDArray[np.float64]:
+    """The 5 x p matrix T with canonical_coefficients(kind, coeffs) == T @ coeffs. The covariance of the 5P
+    coefficients is T @ pcov @ T.T.
+
+    Args:
+        kind (str): The model kind.
+
+    Returns:
+        npt.NDArray[np.float64]: The 5 x p matrix.
+    """
+    if kind not in N_PARAMS:
+        raise ValueError("Unknown model kind {}".format(kind))
+    return np.column_stack(
+        [canonical_coefficients(kind, unit) for unit in np.eye(N_PARAMS[kind])]
+    )
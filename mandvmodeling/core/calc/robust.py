@@ -0,0 +1,241 @@
+"""Robust fitting of the piecewise linear changepoint models by iteratively reweighted least squares (IRLS).
+
+With its changepoints held fixed, a changepoint model is a linear model (see `piecewise.design_matrix`), so a
+weighted fit for given changepoints is a tiny weighted least squares problem. `irls` alternates between
+
+1. a changepoint search: the weighted least squares fit for every candidate changepoint (or pair of changepoints for
+   5P) on a grid of the X values within the bounds, solved as one batch, keeping the best, and
+2. reweighting: new weights from the residuals of that fit with a Huber or Tukey bisquare loss, scaled by the median
+   absolute deviation of the residuals,
+
+until the weights stop changing. Outliers such as holidays, outages and data spikes get small weights (Huber) or
+none at all (bisquare), at a cost close to an ordinary least squares fit.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Optional, Tuple
+import itertools
+import numpy as np
+import numpy.typing as npt
+from . import kernels, piecewise
+
+LOSSES: Tuple[str, ...] = ("huber", "bisquare")
+
+# tuning constants for 95% efficiency under normal errors
+TUNING = {"huber": 1.345, "bisquare": 4.685}
+
+
+@dataclass(frozen=True)
+class IRLSResult:
+    """The outcome of an IRLS fit.
+
+    Attributes:
+        coeffs (npt.NDArray[np.float64]): The coefficients in the order of the model function.
+        weights (npt.NDArray[np.float64]): The final weights between 0 and 1 of every point.
+        scale (float): The robust scale of the residuals the weights were computed with.
+        n_iter (int): The number of reweighting iterations.
+        converged (bool): If the weights changed by less than tol in the last iteration.
+    """
+
+    coeffs: npt.NDArray[np.float64]
+    weights: npt.NDArray[np.float64]
+    scale: float
+    n_iter: int
+    converged: bool
+
+
+def robust_weights(
+    residuals: npt.ArrayLike, loss: str = "huber", scale: Optional[float] = None
+) -> Tuple[npt.NDArray[np.float64], float]:
+    """
+    Computes IRLS weights from residuals.
+
+    Args:
+      residuals: npt.ArrayLike: The residuals
+      loss: str: "huber" or "bisquare". Defaults to "huber".
+      scale: Optional[float]: The scale of the residuals. Defaults to the normalized median absolute deviation.
+
+    Returns:
+      Tuple[npt.NDArray[np.float64], float]: The weights and the scale
+    """
+    if loss not in TUNING:
+        raise ValueError("Unknown loss {}. Must be one of {}".format(loss, LOSSES))
+    r = np.asarray(residuals, dtype=np.float64)
+    if scale is None:
+        scale = float(np.median(np.abs(r - np.median(r))) / 0.6745)
+    if scale <= 0:
+        return np.ones_like(r), scale
+
+    u = np.abs(r) / (scale * TUNING[loss])
+    if loss == "huber":
+        return 1.0 / np.maximum(u, 1.0), scale
+    return np.where(u < 1.0, (1.0 - u**2) ** 2, 0.0), scale
+
+
+def changepoint_candidates(
+    X: npt.NDArray[np.float64], lower: float, upper: float, n_grid: int
+) -> npt.NDArray[np.float64]:
+    """
+    The candidate changepoints: the distinct X within the bounds, thinned to n_grid quantiles if there are more.
+
+    Args:
+      X: npt.NDArray[np.float64]: X of shape (N,)
+      lower: float: The lower bound of the changepoint
+      upper: float: The upper bound of the changepoint
+      n_grid: int: The maximum number of candidates
+
+    Returns:
+      npt.NDArray[np.float64]: The candidates
+    """
+    inside = np.unique(X[(X >= lower) & (X <= upper)])
+    if len(inside) == 0:
+        # no data within the bounds, so only the bounds themselves are candidates
+        return np.unique(np.clip([lower, upper], X.min(), X.max()))
+    if len(inside) > n_grid:
+        inside = np.unique(np.quantile(inside, np.linspace(0, 1, n_grid)))
+    return inside
+
+
+def _batch_wls(
+    A: npt.NDArray[np.float64], y: npt.NDArray[np.float64], w: npt.NDArray[np.float64]
+) -> Tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+    """
+    Helper that solves the weighted least squares problems of a stack of design matrices A of shape (K, N, p) and
+    returns their coefficients (K, p) and weighted sums of squared residuals (K,).
+    """
+    G = np.einsum("knp,n,knq->kpq", A, w, A)
+    b = np.einsum("knp,n,n->kp", A, w, y)
+    # pinv copes with changepoints that leave a column of the design matrix empty
+    beta = np.einsum("kpq,kq->kp", np.linalg.pinv(G), b)
+    residuals = y - np.einsum("knp,kp->kn", A, beta)
+    return beta, np.einsum("kn,n,kn->k", residuals, w, residuals)
+
+
+def _changepoint_grid(
+    kind: str,
+    X: npt.NDArray[np.float64],
+    lower: npt.NDArray[np.float64],
+    upper: npt.NDArray[np.float64],
+    n_grid: int,
+) -> npt.NDArray[np.float64]:
+    """
+    Helper that returns the candidate changepoints of a model as an array of shape (K, number of changepoints).
+    """
+    n_cp = piecewise.N_CHANGEPOINTS[kind]
+    n_linear = piecewise.N_PARAMS[kind] - n_cp
+    axes = [
+        changepoint_candidates(X, lower[n_linear + i], upper[n_linear + i], n_grid)
+        for i in range(n_cp)
+    ]
+    combinations = list(itertools.product(*axes))
+    # 2P has a single candidate without changepoints
+    grid = np.array(combinations, dtype=np.float64).reshape(len(combinations), n_cp)
+    if kind == "5P":
+        grid = grid[grid[:, 0] <= grid[:, 1]]
+    return grid
+
+
+def weighted_fit(
+    kind: str,
+    X: npt.NDArray[np.float64],
+    y: npt.NDArray[np.float64],
+    weights: npt.NDArray[np.float64],
+    grid: npt.NDArray[np.float64],
+) -> npt.NDArray[np.float64]:
+    """
+    The weighted least squares fit with the best changepoints of a grid.
+
+    Args:
+      kind: str: The model kind
+      X: npt.NDArray[np.float64]: X of shape (N,)
+      y: npt.NDArray[np.float64]: y of shape (N,)
+      weights: npt.NDArray[np.float64]: The weights of shape (N,)
+      grid: npt.NDArray[np.float64]: Candidate changepoints of shape (K, number of changepoints)
+
+    Returns:
+      npt.NDArray[np.float64]: The coefficients in the order of the model function
+    """
+    A = np.stack([piecewise.design_matrix(kind, X, cps) for cps in grid])
+    beta, wsse = _batch_wls(A, y, weights)
+    best = int(np.argmin(wsse))
+    return np.concatenate([beta[best], grid[best]])
+
+
+def irls(
+    kind: str,
+    X: npt.ArrayLike,
+    y: npt.ArrayLike,
+    bounds: Any = (-np.inf, np.inf),
+    loss: str = "huber",
+    scale: Optional[float] = None,
+    n_grid: int = 40,
+    max_iter: int = 20,
+    tol: float = 1e-4,
+    sample_weights: Optional[npt.ArrayLike] = None,
+) -> IRLSResult:
+    """
+    Fits a built-in model robustly by IRLS combined with a changepoint search.
+
+    Args:
+      kind: str: One of "2P", "3PC", "3PH", "4P" or "5P"
+      X: npt.ArrayLike: X of shape (N,) or (N, 1)
+      y: npt.ArrayLike: y of shape (N,)
+      bounds: Any: The bounds as passed to curve_fit. Only the changepoint bounds are used. Defaults to no bounds.
+      loss: str: "huber" or "bisquare". Defaults to "huber".
+      scale: Optional[float]: A fixed scale of the residuals. Defaults to the median absolute deviation in every
+        iteration.
+      n_grid: int: The maximum number of candidates per changepoint. Defaults to 40.
+      max_iter: int: The maximum number of reweighting iterations. Defaults to 20.
+      tol: float: Stop once no weight changes by more than this. Defaults to 1e-4.
+      sample_weights: Optional[npt.ArrayLike]: Prior weights of the points, for example 1 / sigma**2. The robust
+        weights are computed from the residuals scaled by their square roots and multiply them in the fit. Defaults
+        to None.
+
+    Returns:
+      IRLSResult: The coefficients and final robust weights, without the sample weights
+    """
+    X = np.asarray(X, dtype=np.float64).reshape(-1)
+    y = np.asarray(y, dtype=np.float64)
+    p = piecewise.N_PARAMS[kind]
+    lower, upper = (
+        np.broadcast_to(np.asarray(b, dtype=np.float64), (p,)) for b in bounds
+    )
+    grid = _changepoint_grid(kind, X, lower, upper, n_grid)
+
+    prior = (
+        np.ones_like(y)
+        if sample_weights is None
+        else np.asarray(sample_weights, dtype=np.float64)
+    )
+    weights = np.ones_like(y)
+    coeffs = weighted_fit(kind, X, y, prior, grid)
+    fitted_scale = 0.0
+    converged = False
+    n_iter = 0
+    for n_iter in range(1, max_iter + 1):
+        residuals = (y - piecewise_predict(kind, X, coeffs)) * np.sqrt(prior)
+        new_weights, fitted_scale = robust_weights(residuals, loss=loss, scale=scale)
+        change = np.max(np.abs(new_weights - weights))
+        weights = new_weights
+        if change < tol:
+            converged = True
+            break
+        coeffs = weighted_fit(kind, X, y, prior * weights, grid)
+
+    return IRLSResult(
+        coeffs=coeffs,
+        weights=weights,
+        scale=fitted_scale,
+        n_iter=n_iter,
+        converged=converged,
+    )
+
+
+def piecewise_predict(
+    kind: str, X: npt.NDArray[np.float64], coeffs: npt.NDArray[np.float64]
+) -> npt.NDArray[np.float64]:
+    """
+    Helper that predicts a built-in model from its coefficients with the kernels, which also handle 5P coefficients
+    with crossed changepoints.
+    """
+    return kernels.predict(kind, X, coeffs)
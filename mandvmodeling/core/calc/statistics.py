@@ -0,0 +1,100 @@
+"""Sufficient statistics of a fit, computed in a single pass over y and pred_y.
+
+The goodness of fit scores (r2, rmse, cvrmse) follow the definitions used by changepointmodel, which in turn follow
+`sklearn.metrics`. With weights, sse, sst and the mean of y are weighted the same way `sklearn.metrics` weights them
+with `sample_weight`, after the weights are scaled to a mean of 1 so rmse stays in the units of y.
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+import numpy as np
+from changepointmodel.core.nptypes import OneDimNDArray
+
+
+@dataclass(frozen=True)
+class FitStatistics:
+    """Residuals and sums of a fit.
+
+    Attributes:
+        n (int): The number of points.
+        n_params (int): The number of coefficients of the model.
+        residuals (OneDimNDArray[np.float64]): y - pred_y.
+        sse (float): The sum of squared residuals.
+        sst (float): The total sum of squares of y around its mean.
+        total_y (float): The sum of y.
+        total_pred_y (float): The sum of pred_y.
+        y_mean (float): The (weighted) mean of y.
+        weights (Optional[OneDimNDArray[np.float64]]): The weights scaled to a mean of 1, or None if unweighted.
+    """
+
+    n: int
+    n_params: int
+    residuals: OneDimNDArray[np.float64]
+    sse: float
+    sst: float
+    total_y: float
+    total_pred_y: float
+    y_mean: float
+    weights: Optional[OneDimNDArray[np.float64]] = None
+
+    @classmethod
+    def from_arrays(
+        cls,
+        y: OneDimNDArray[np.float64],
+        pred_y: OneDimNDArray[np.float64],
+        n_params: int,
+        weights: Optional[OneDimNDArray[np.float64]] = None,
+    ) -> "FitStatistics":
+        """
+        Computes the statistics from y and pred_y.
+
+        Args:
+          y: OneDimNDArray[np.float64]: The target array
+          pred_y: OneDimNDArray[np.float64]: The predicted array
+          n_params: int: The number of coefficients of the model
+          weights: Optional[OneDimNDArray[np.float64]]: Weights of the points, for example 1 / sigma**2. Defaults to
+            None.
+
+        Returns:
+          FitStatistics: The statistics
+        """
+        residuals = y - pred_y
+        total_y = float(np.sum(y))
+        if weights is None:
+            y_mean = total_y / len(y)
+            centered = y - y_mean
+            sse = float(np.dot(residuals, residuals))
+            sst = float(np.dot(centered, centered))
+        else:
+            weights = np.asarray(weights, dtype=np.float64)
+            weights = weights * (len(weights) / np.sum(weights))
+            y_mean = float(np.dot(weights, y)) / len(y)
+            centered = y - y_mean
+            sse = float(np.dot(weights * residuals, residuals))
+            sst = float(np.dot(weights * centered, centered))
+        return cls(
+            n=len(y),
+            n_params=n_params,
+            residuals=residuals,
+            sse=sse,
+            sst=sst,
+            total_y=total_y,
+            total_pred_y=float(np.sum(pred_y)),
+            y_mean=y_mean,
+            weights=weights,
+        )
+
+    @property
+    def r2(self) -> float:
+        if self.sst == 0:
+            # sklearn.metrics.r2_score returns 1.0 for a perfect fit of a constant y and 0.0 otherwise
+            return 1.0 if self.sse == 0 else 0.0
+        return 1.0 - self.sse / self.sst
+
+    @property
+    def rmse(self) -> float:
+        return float(np.sqrt(self.sse / self.n))
+
+    @property
+    def cvrmse(self) -> float:
+        return self.rmse / self.y_mean
@@ -0,0 +1,187 @@
+"""Closed-form cross-validation for fitted changepoint models.
+
+With its changepoints held fixed, a changepoint model is an ordinary linear model (see
+`mandvmodeling.core.calc.piecewise`). The out-of-sample residuals of a linear model can be computed from a single
+decomposition of its design matrix without refitting:
+
+- leave-one-out: e_i / (1 - h_ii), where h_ii is the diagonal of the hat matrix
+- K-fold: (I - H_SS)^-1 e_S for the points S of every fold
+
+Both treat the changepoints as known, so they are slightly optimistic compared to refitting the full model on every
+fold (as `sklearn.model_selection.GridSearchCV` does with MandVCurvefitEstimator), but they cost about as much as a
+single fit.
+
+An estimator fit with sigma is a weighted least squares model with weights W = 1 / sigma**2. Its hat matrix is
+W^1/2 A (A' W A)^-1 A' W^1/2, the hat matrix of the design matrix and y scaled by W^1/2, so the shortcuts are applied
+to the scaled problem and the residuals are scaled back to the units of y.
+"""
+
+from dataclasses import dataclass
+from typing import Optional, Tuple
+import numpy as np
+import numpy.typing as npt
+from changepointmodel.core.nptypes import OneDimNDArray
+from .calc import piecewise
+from .estimator import FitStatus, MandVEnergyChangepointEstimator
+
+
+@dataclass(frozen=True)
+class CrossValidationResult:
+    """Out-of-sample residuals and scores.
+
+    Attributes:
+        residuals (OneDimNDArray[np.float64]): The out-of-sample residuals y - pred_y, in the order of the
+            estimator's X.
+        folds (OneDimNDArray[np.int64]): The fold of every point.
+        press (float): The predicted residual sum of squares of the points with a finite residual.
+        rmse (float): The out-of-sample root mean squared error of the points with a finite residual.
+        cvrmse (float): The out-of-sample rmse divided by the mean of y.
+    """
+
+    residuals: OneDimNDArray[np.float64]
+    folds: OneDimNDArray[np.int64]
+    press: float
+    rmse: float
+    cvrmse: float
+
+
+def _decompose(
+    estimator: MandVEnergyChangepointEstimator,
+) -> Tuple[
+    npt.NDArray[np.float64], OneDimNDArray[np.float64], OneDimNDArray[np.float64]
+]:
+    """
+    Helper that returns an orthonormal basis U of the column space of the design matrix scaled by the square root
+    of the weights, the in-sample residuals of the weighted least squares fit with the estimator's changepoints scaled
+    the same way and the square roots of the weights. The hat matrix is U @ U.T.
+    """
+    if estimator.fit_status is FitStatus.NOT_FITTABLE:
+        raise ValueError("Cannot cross-validate an estimator that was not fittable.")
+
+    kind = piecewise.model_kind(estimator.model.f)
+    _, changepoints = piecewise.split_coefficients(kind, estimator.coeffs)
+    A = piecewise.design_matrix(kind, estimator.X, changepoints)
+    y = estimator.y
+    sigma = estimator.sigma_
+    sw = np.ones_like(y) if sigma is None else 1 / np.asarray(sigma, dtype=np.float64)
+    A = A * sw[:, None]
+    y = y * sw
+
+    # an svd handles changepoints outside of the data, which leave an all-zero column
+    U, s, _ = np.linalg.svd(A, full_matrices=False)
+    U = U[:, s > s[0] * max(A.shape) * np.finfo(np.float64).eps]
+
+    residuals = y - U @ (U.T @ y)
+    return U, residuals, sw
+
+
+def _result(
+    estimator: MandVEnergyChangepointEstimator,
+    residuals: OneDimNDArray[np.float64],
+    folds: OneDimNDArray[np.int64],
+) -> CrossValidationResult:
+    stats = estimator.statistics
+    # points without an out-of-sample prediction have NaN residuals and are left out of the scores
+    n = int(np.count_nonzero(np.isfinite(residuals)))
+    press = float(np.nansum(residuals**2))
+    rmse = float(np.sqrt(press / n)) if n > 0 else np.nan
+    return CrossValidationResult(
+        residuals=residuals,
+        folds=folds,
+        press=press,
+        rmse=rmse,
+        cvrmse=rmse / stats.y_mean,
+    )
+
+
+def leave_one_out(estimator: MandVEnergyChangepointEstimator) -> CrossValidationResult:
+    """
+    Leave-one-out cross-validation of a fitted estimator with its changepoints held fixed.
+
+    Points with a leverage of 1 (e.g. the only point beyond a changepoint) have no out-of-sample prediction and get
+    a NaN residual, which is left out of press, rmse and cvrmse. The leverages of an estimator fit with sigma are those of the weighted hat matrix.
+
+    Args:
+      estimator: MandVEnergyChangepointEstimator: A fitted estimator of one of the built-in changepoint models
+
+    Returns:
+      CrossValidationResult: The leave-one-out residuals and scores
+    """
+    U, residuals, sw = _decompose(estimator)
+    leverage = np.einsum("ij,ij->i", U, U)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        loo = residuals / (1 - leverage) / sw
+    loo[np.isclose(leverage, 1)] = np.nan
+    return _result(estimator, loo, np.arange(len(residuals)))
+
+
+def kfold_folds(
+    estimator: MandVEnergyChangepointEstimator,
+    n_splits: int = 5,
+    blocked: bool = True,
+    random_state: Optional[int] = None,
+) -> OneDimNDArray[np.int64]:
+    """
+    Assigns the points of a fitted estimator to folds.
+
+    Args:
+      estimator: MandVEnergyChangepointEstimator: A fitted estimator
+      n_splits: int: The number of folds. Defaults to 5.
+      blocked: bool: Use contiguous blocks of time by `sensor_reading_timestamps`. Otherwise points are assigned to
+        folds at random. Defaults to True.
+      random_state: Optional[int]: The seed for random folds. Defaults to None.
+
+    Returns:
+      OneDimNDArray[np.int64]: The fold of every point, in the order of the estimator's X
+    """
+    n = estimator.len_y()
+    if not 2 <= n_splits <= n:
+        raise ValueError("n_splits must be between 2 and the number of points")
+
+    if blocked:
+        order = np.argsort(estimator.sensor_reading_timestamps, kind="stable")
+    else:
+        order = np.random.default_rng(random_state).permutation(n)
+
+    folds = np.empty(n, dtype=np.int64)
+    folds[order] = np.arange(n) * n_splits // n
+    return folds
+
+
+def kfold(
+    estimator: MandVEnergyChangepointEstimator,
+    n_splits: int = 5,
+    blocked: bool = True,
+    random_state: Optional[int] = None,
+) -> CrossValidationResult:
+    """
+    K-fold cross-validation of a fitted estimator with its changepoints held fixed. An estimator fit with sigma is
+    refit on every fold by weighted least squares.
+
+    Args:
+      estimator: MandVEnergyChangepointEstimator: A fitted estimator of one of the built-in changepoint models
+      n_splits: int: The number of folds. Defaults to 5.
+      blocked: bool: Use contiguous blocks of time by `sensor_reading_timestamps`, which keeps autocorrelated
+        neighbouring days in the same fold. Otherwise points are assigned to folds at random. Defaults to True.
+      random_state: Optional[int]: The seed for random folds. Defaults to None.
+
+    Returns:
+      CrossValidationResult: The out-of-fold residuals and scores
+    """
+    U, residuals, sw = _decompose(estimator)
+    folds = kfold_folds(
+        estimator, n_splits=n_splits, blocked=blocked, random_state=random_state
+    )
+
+    out = np.empty_like(residuals)
+    identity = np.eye(U.shape[1])
+    for fold in range(n_splits):
+        idx = folds == fold
+        U_S = U[idx]
+        # (I - U_S U_S')^-1 e_S by the Woodbury identity, which only needs a p x p solve
+        correction = np.linalg.lstsq(
+            identity - U_S.T @ U_S, U_S.T @ residuals[idx], rcond=None
+        )[0]
+        out[idx] = residuals[idx] + U_S @ correction
+
+    return _result(estimator, out / sw, folds)
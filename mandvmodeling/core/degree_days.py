@@ -0,0 +1,396 @@
+"""Heating and cooling degree days (HDD and CDD) at arbitrary balance points from hourly or daily temperatures.
+
+A `DegreeDayTable` groups the temperatures of a weather station into periods (days, months or billing periods) and
+keeps them sorted within every period together with their prefix sums. With k of the n temperatures of a period below
+a balance point b and S their sum,
+
+    HDD(b) = duration * (k * b - S)
+    CDD(b) = duration * ((total - S) - (n - k) * b)
+
+so the degree days of every period at any number of balance points take one `np.searchsorted` call instead of a pass
+over the temperatures per balance point. `duration` is the length of a reading in days, so hourly readings integrate
+to degree days and daily mean temperatures give the usual daily degree days.
+
+`balance_point_search` uses this to regress consumption on the degree days of every candidate balance point at once
+and find the best one. Tables are cached per weather station and periods (see `DegreeDayCache`), so every meter on a
+station shares one table.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Hashable, Optional, Tuple, Union
+import hashlib
+import numpy as np
+import numpy.typing as npt
+from changepointmodel.core.nptypes import OneDimNDArray
+from .cache import LRUCache
+
+Periods = Union[str, npt.ArrayLike]
+
+
+@dataclass(frozen=True, eq=False)
+class DegreeDayTable:
+    """The temperatures of a weather station grouped into periods, sorted within every period, with prefix sums.
+
+    Attributes:
+        period_starts (OneDimNDArray[np.datetime64]): The start of every period.
+        days (OneDimNDArray[np.float64]): The length of every period in days.
+        counts (OneDimNDArray[np.int64]): The number of temperatures in every period.
+        duration (float): The length of a reading in days.
+        offsets (OneDimNDArray[np.int64]): Where the temperatures of every period start in `temperatures`, and
+            their total number at the end.
+        temperatures (OneDimNDArray[np.float64]): The temperatures, sorted by period and then temperature.
+        prefix (OneDimNDArray[np.float64]): The prefix sums of `temperatures`, starting at 0.
+    """
+
+    period_starts: OneDimNDArray[np.datetime64]
+    days: OneDimNDArray[np.float64]
+    counts: OneDimNDArray[np.int64]
+    duration: float
+    offsets: OneDimNDArray[np.int64]
+    temperatures: OneDimNDArray[np.float64]
+    prefix: OneDimNDArray[np.float64]
+    _keys: OneDimNDArray[np.float64]
+    _low: float
+    _span: float
+
+    @property
+    def n_periods(self) -> int:
+        return len(self.counts)
+
+    def _below(
+        self, balance_points: npt.ArrayLike
+    ) -> Tuple[
+        npt.NDArray[np.float64], npt.NDArray[np.float64], npt.NDArray[np.float64]
+    ]:
+        """
+        Helper that returns the balance points of shape (m,) and, for every period and balance point (P, m), the
+        number and the sum of the temperatures below the balance point.
+        """
+        b = np.atleast_1d(np.asarray(balance_points, dtype=np.float64))
+        if b.ndim != 1:
+            raise ValueError("balance_points must be a scalar or one dimensional")
+        # temperatures sort by period first because every period is shifted by span, which exceeds their range
+        q = np.clip(b - self._low, 0.0, self._span - 0.5)
+        periods = np.arange(self.n_periods)[:, None]
+        k = np.searchsorted(self._keys, periods * self._span + q[None, :])
+        start = self.offsets[:-1, None]
+        return b, (k - start).astype(np.float64), self.prefix[k] - self.prefix[start]
+
+    def hdd(self, balance_points: npt.ArrayLike) -> npt.NDArray[np.float64]:
+        """
+        The heating degree days of every period.
+
+        Args:
+          balance_points: npt.ArrayLike: A balance point or a one dimensional array of them
+
+        Returns:
+          npt.NDArray[np.float64]: The HDD of shape (P,) for a scalar balance point or (P, m) for m balance points
+        """
+        b, n_below, sum_below = self._below(balance_points)
+        out = self.duration * (n_below * b - sum_below)
+        return out[:, 0] if np.ndim(balance_points) == 0 else out
+
+    def cdd(self, balance_points: npt.ArrayLike) -> npt.NDArray[np.float64]:
+        """
+        The cooling degree days of every period.
+
+        Args:
+          balance_points: npt.ArrayLike: A balance point or a one dimensional array of them
+
+        Returns:
+          npt.NDArray[np.float64]: The CDD of shape (P,) for a scalar balance point or (P, m) for m balance points
+        """
+        b, n_below, sum_below = self._below(balance_points)
+        total = (self.prefix[self.offsets[1:]] - self.prefix[self.offsets[:-1]])[
+            :, None
+        ]
+        n_above = self.counts[:, None] - n_below
+        out = self.duration * ((total - sum_below) - n_above * b)
+        return out[:, 0] if np.ndim(balance_points) == 0 else out
+
+    def data_model(
+        self,
+        y: npt.ArrayLike,
+        balance_point: float,
+        kind: str = "heating",
+        per_day: bool = True,
+    ) -> Any:
+        """
+        Builds a MandVDataModel of consumption per period against the degree days of the periods, for example to fit
+        monthly bills.
+
+        Args:
+          y: npt.ArrayLike: The consumption of every period
+          balance_point: float: The balance point
+          kind: str: "heating" for HDD or "cooling" for CDD. Defaults to "heating".
+          per_day: bool: Divide X and y by the length of the periods. Defaults to True.
+
+        Returns:
+          MandVDataModel: The data model, with the period starts as sensor_reading_timestamps
+        """
+        from .schemas import MandVDataModel
+
+        if kind not in ("heating", "cooling"):
+            raise ValueError("kind must be heating or cooling")
+        X = self.hdd(balance_point) if kind == "heating" else self.cdd(balance_point)
+        y = np.asarray(y, dtype=np.float64)
+        if per_day:
+            X, y = X / self.days, y / self.days
+        return MandVDataModel(X=X, y=y, sensor_reading_timestamps=self.period_starts)
+
+
+def _periods(
+    timestamps: npt.NDArray[np.datetime64], periods: Periods
+) -> Tuple[npt.NDArray[np.intp], npt.NDArray[np.datetime64], npt.NDArray[np.float64]]:
+    """
+    Helper that returns the period of every timestamp (-1 outside all periods), the period starts and their lengths
+    in days.
+    """
+    if isinstance(periods, str):
+        # calendar periods such as "D" for days or "M" for months
+        truncated = timestamps.astype("datetime64[{}]".format(periods))
+        starts, ids = np.unique(truncated, return_inverse=True)
+        ends = starts + 1
+    else:
+        boundaries = np.asarray(periods, dtype="datetime64[s]")
+        if boundaries.ndim != 1 or len(boundaries) < 2:
+            raise ValueError("period boundaries need at least a start and an end")
+        if np.any(np.diff(boundaries) <= np.timedelta64(0, "s")):
+            raise ValueError("period boundaries must be increasing")
+        ids = np.searchsorted(boundaries, timestamps, side="right") - 1
+        ids[ids >= len(boundaries) - 1] = -1
+        starts, ends = boundaries[:-1], boundaries[1:]
+    days = (
+        ends.astype("datetime64[s]") - starts.astype("datetime64[s]")
+    ) / np.timedelta64(1, "D")
+    return ids.astype(np.intp), starts, days.astype(np.float64)
+
+
+def degree_day_table(
+    temperatures: npt.ArrayLike,
+    timestamps: npt.ArrayLike,
+    periods: Periods = "D",
+    duration: Optional[float] = None,
+) -> DegreeDayTable:
+    """
+    Builds a DegreeDayTable.
+
+    Args:
+      temperatures: npt.ArrayLike: The temperatures of shape (N,). NaN temperatures are dropped.
+      timestamps: npt.ArrayLike: The timestamps of the temperatures, of shape (N,)
+      periods: Periods: A NumPy datetime unit for calendar periods ("D" for days, "M" for months), or the K + 1
+        increasing boundaries of K periods such as billing periods, each including its start. Defaults to "D".
+      duration: Optional[float]: The length of a reading in days, e.g. 1 / 24 for hourly temperatures. Defaults to
+        the median spacing of the timestamps.
+
+    Returns:
+      DegreeDayTable: The table
+    """
+    T = np.asarray(temperatures, dtype=np.float64).reshape(-1)
+    ts = np.asarray(timestamps, dtype="datetime64[s]").reshape(-1)
+    if len(T) != len(ts):
+        raise ValueError("temperatures and timestamps must have the same len")
+    if duration is None:
+        spacing = np.diff(np.unique(ts)) / np.timedelta64(1, "D")
+        duration = float(np.median(spacing)) if len(spacing) else 1.0
+
+    ids, starts, days = _periods(ts, periods)
+    keep = (ids >= 0) & np.isfinite(T)
+    T, ids = T[keep], ids[keep]
+
+    order = np.lexsort((T, ids))
+    T, ids = T[order], ids[order]
+    counts = np.bincount(ids, minlength=len(starts)).astype(np.int64)
+    offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+    prefix = np.concatenate([[0.0], np.cumsum(T)])
+    low = float(T.min()) if len(T) else 0.0
+    span = (float(T.max()) - low if len(T) else 0.0) + 1.0
+    return DegreeDayTable(
+        period_starts=starts,
+        days=days,
+        counts=counts,
+        duration=float(duration),
+        offsets=offsets,
+        temperatures=T,
+        prefix=prefix,
+        _keys=ids * span + (T - low),
+        _low=low,
+        _span=span,
+    )
+
+
+class DegreeDayCache(LRUCache[DegreeDayTable]):
+    """A least recently used cache of DegreeDayTables keyed by weather station and periods.
+
+    Args:
+        maxsize (Optional[int]): The maximum number of tables to keep. Defaults to 256. None for no limit.
+    """
+
+
+DEFAULT_CACHE = DegreeDayCache()
+
+
+def station_table(
+    station: Hashable,
+    temperatures: npt.ArrayLike,
+    timestamps: npt.ArrayLike,
+    periods: Periods = "D",
+    duration: Optional[float] = None,
+    cache: Optional[DegreeDayCache] = DEFAULT_CACHE,
+) -> DegreeDayTable:
+    """
+    Returns the DegreeDayTable of a weather station from the cache, building it on a miss. The cache key is the
+    station and the periods, so the temperatures must not change for a station.
+
+    Args:
+      station: Hashable: Identifies the weather station, e.g. its id
+      temperatures: npt.ArrayLike: The temperatures of the station
+      timestamps: npt.ArrayLike: Their timestamps
+      periods: Periods: The periods. See degree_day_table. Defaults to "D".
+      duration: Optional[float]: The length of a reading in days. See degree_day_table. Defaults to None.
+      cache: Optional[DegreeDayCache]: The cache. Defaults to a module level cache. None disables caching.
+
+    Returns:
+      DegreeDayTable: The table
+    """
+    if cache is None:
+        return degree_day_table(temperatures, timestamps, periods, duration)
+    if isinstance(periods, str):
+        period_key: Any = periods
+    else:
+        period_key = hashlib.sha1(
+            np.ascontiguousarray(periods, dtype="datetime64[s]").tobytes()
+        ).hexdigest()
+    key = (station, (period_key, duration))
+    table = cache.get(key)
+    if table is None:
+        table = degree_day_table(temperatures, timestamps, periods, duration)
+        cache.put(key, table)
+    return table
+
+
+@dataclass(frozen=True)
+class BalancePointSearch:
+    """The result of a balance point search.
+
+    Attributes:
+        kind (str): "heating", "cooling" or "both".
+        heating (Optional[OneDimNDArray[np.float64]]): The candidate heating balance points.
+        cooling (Optional[OneDimNDArray[np.float64]]): The candidate cooling balance points.
+        sse (npt.NDArray[np.float64]): The sum of squared residuals of every candidate, of shape (m,), or (m_h, m_c)
+            for both with inf where the heating balance point exceeds the cooling balance point.
+        sst (float): The total sum of squares of y.
+        balance_point (Tuple[float, ...]): The best balance point, or the best heating and cooling balance points.
+        coefficients (Tuple[float, ...]): The intercept and the slope(s) of the best balance point.
+    """
+
+    kind: str
+    heating: Optional[OneDimNDArray[np.float64]]
+    cooling: Optional[OneDimNDArray[np.float64]]
+    sse: npt.NDArray[np.float64]
+    sst: float
+    balance_point: Tuple[float, ...]
+    coefficients: Tuple[float, ...]
+
+    @property
+    def r2(self) -> npt.NDArray[np.float64]:
+        """
+        The r2 of every candidate.
+        """
+        if self.sst == 0:
+            return np.where(self.sse == 0, 1.0, 0.0)
+        return 1.0 - self.sse / self.sst
+
+
+def balance_point_search(
+    table: DegreeDayTable,
+    y: npt.ArrayLike,
+    heating: Optional[npt.ArrayLike] = None,
+    cooling: Optional[npt.ArrayLike] = None,
+    per_day: bool = True,
+) -> BalancePointSearch:
+    """
+    Regresses consumption on the degree days of every candidate balance point and finds the best one. With heating
+    candidates, y = a + b * HDD; with cooling candidates, y = a + c * CDD; with both, y = a + b * HDD + c * CDD for
+    every pair of heating and cooling balance points with heating <= cooling. All regressions are solved at once from
+    centered sums of the degree day matrices.
+
+    Args:
+      table: DegreeDayTable: The degree day table of the weather station
+      y: npt.ArrayLike: The consumption of every period of the table
+      heating: Optional[npt.ArrayLike]: Candidate heating balance points. Defaults to None.
+      cooling: Optional[npt.ArrayLike]: Candidate cooling balance points. Defaults to None.
+      per_day: bool: Divide degree days and y by the length of the periods. Defaults to True.
+
+    Returns:
+      BalancePointSearch: The fit of every candidate and the best one
+    """
+    if heating is None and cooling is None:
+        raise ValueError("Pass heating or cooling candidates, or both")
+    y = np.asarray(y, dtype=np.float64)
+    if len(y) != table.n_periods:
+        raise ValueError("y must have one value per period")
+    scale = table.days if per_day else np.ones(table.n_periods)
+    y = y / scale
+    yc = y - y.mean()
+    syy = float(yc @ yc)
+
+    def centered(X: npt.NDArray[np.float64]) -> npt.NDArray[np.float64]:
+        X = X / scale[:, None]
+        return X - X.mean(axis=0)
+
+    def simple(X: npt.NDArray[np.float64]) -> Tuple[Any, Any]:
+        Xc = centered(X)
+        sxx = np.einsum("pm,pm->m", Xc, Xc)
+        sxy = Xc.T @ yc
+        slope = np.divide(sxy, sxx, out=np.zeros_like(sxy), where=sxx > 0)
+        return syy - slope * sxy, slope
+
+    h = None if heating is None else np.atleast_1d(np.asarray(heating, dtype=float))
+    c = None if cooling is None else np.atleast_1d(np.asarray(cooling, dtype=float))
+
+    if c is None or h is None:
+        kind = "heating" if c is None else "cooling"
+        candidates = h if c is None else c
+        X = table.hdd(candidates) if c is None else table.cdd(candidates)
+        sse, slope = simple(X)
+        best = int(np.argmin(sse))
+        intercept = y.mean() - slope[best] * (X[:, best] / scale).mean()
+        return BalancePointSearch(
+            kind=kind,
+            heating=h,
+            cooling=c,
+            sse=sse,
+            sst=syy,
+            balance_point=(float(candidates[best]),),
+            coefficients=(float(intercept), float(slope[best])),
+        )
+
+    H, C = table.hdd(h), table.cdd(c)
+    Hc, Cc = centered(H), centered(C)
+    shh = np.einsum("pm,pm->m", Hc, Hc)[:, None]
+    scc = np.einsum("pm,pm->m", Cc, Cc)[None, :]
+    shc = Hc.T @ Cc
+    shy = (Hc.T @ yc)[:, None]
+    scy = (Cc.T @ yc)[None, :]
+    det = shh * scc - shc**2
+    valid = (det > 1e-12 * np.maximum(shh * scc, 1e-300)) & (h[:, None] <= c[None, :])
+    safe = np.where(valid, det, 1.0)
+    bh = np.where(valid, (scc * shy - shc * scy) / safe, 0.0)
+    bc = np.where(valid, (shh * scy - shc * shy) / safe, 0.0)
+    sse = np.where(valid, syy - bh * shy - bc * scy, np.inf)
+    i, j = np.unravel_index(int(np.argmin(sse)), sse.shape)
+    intercept = (
+        y.mean()
+        - bh[i, j] * (H[:, i] / scale).mean()
+        - bc[i, j] * (C[:, j] / scale).mean()
+    )
+    return BalancePointSearch(
+        kind="both",
+        heating=h,
+        cooling=c,
+        sse=sse,
+        sst=syy,
+        balance_point=(float(h[i]), float(c[j])),
+        coefficients=(float(intercept), float(bh[i, j]), float(bc[i, j])),
+    )
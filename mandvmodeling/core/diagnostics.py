@@ -0,0 +1,138 @@
+"""Batch scoring of fitted estimators.
+
+`score_estimators` collects the cached diagnostics of many fitted MandVEnergyChangepointEstimators into a single NumPy
+structured array with one row per estimator, which can be filtered and sorted column-wise. `score_record` returns the
+same scores of one estimator, along with its coefficients, as a JSON-serializable dict.
+"""
+
+from typing import Any, Dict, Optional, Sequence
+import math
+import numpy as np
+import numpy.typing as npt
+from .estimator import FitStatus, MandVEnergyChangepointEstimator
+
+SCORE_FIELDS = [
+    ("n", np.int64),
+    ("n_params", np.int64),
+    ("r2", np.float64),
+    ("adjusted_r2", np.float64),
+    ("rmse", np.float64),
+    ("cvrmse", np.float64),
+    ("heating_tstat", np.float64),
+    ("cooling_tstat", np.float64),
+    ("heating_points", np.int64),
+    ("cooling_points", np.int64),
+    ("shape", np.bool_),
+    ("total_y", np.float64),
+    ("total_pred_y", np.float64),
+]
+
+
+def score_dtype(name_length: int = 8, status_length: int = 16) -> np.dtype:
+    """
+    Returns the dtype of the array returned by score_estimators.
+
+    Args:
+      name_length: int: The maximum length of the model names. Defaults to 8.
+      status_length: int: The maximum length of the fit status. Defaults to 16.
+
+    Returns:
+      np.dtype: The structured dtype
+    """
+    return np.dtype(
+        [("name", "U{}".format(name_length)), ("status", "U{}".format(status_length))]
+        + SCORE_FIELDS
+    )
+
+
+def score_estimators(
+    estimators: Sequence[MandVEnergyChangepointEstimator],
+) -> npt.NDArray[np.void]:
+    """
+    Scores fitted estimators. Scores that do not apply are NaN (for floats) or -1 (for point counts). An estimator
+    that did not fit successfully only gets the scores that are computed from its residuals.
+
+    Nothing is recomputed here. The scores are read from the FitStatistics and heating and cooling point counts
+    computed at fit time and from the diagnostics cached per fit, and are written into the array a column at a time.
+    Reading them is still a loop over the estimators, because every estimator holds its own data and model.
+
+    Args:
+      estimators: Sequence[MandVEnergyChangepointEstimator]: Fitted estimators
+
+    Returns:
+      npt.NDArray[np.void]: A structured array with one row per estimator and a column per score
+    """
+    name_length = max([len(est.name) for est in estimators], default=1)
+    out = np.zeros(len(estimators), dtype=score_dtype(name_length=name_length))
+    if len(estimators) == 0:
+        return out
+
+    out["name"] = [est.name for est in estimators]
+    out["status"] = [est.fit_status.value for est in estimators]
+    statistics = [est.statistics for est in estimators]
+    for field in ("n", "n_params", "r2", "rmse", "cvrmse", "total_y", "total_pred_y"):
+        out[field] = [getattr(stats, field) for stats in statistics]
+
+    out["adjusted_r2"] = out["heating_tstat"] = out["cooling_tstat"] = np.nan
+    out["heating_points"] = out["cooling_points"] = -1
+    fitted = [
+        i
+        for i, est in enumerate(estimators)
+        if est.fit_status is not FitStatus.NOT_FITTABLE
+    ]
+    if not fitted:
+        return out
+
+    ests = [estimators[i] for i in fitted]
+    # a tstat of None becomes NaN
+    tstats = np.array([est.tstat() for est in ests], dtype=np.float64)
+    out["heating_tstat"][fitted] = tstats[:, 0]
+    out["cooling_tstat"][fitted] = tstats[:, 1]
+    points = np.array([est.dpop() for est in ests], dtype=np.int64)
+    out["heating_points"][fitted] = points[:, 0]
+    out["cooling_points"][fitted] = points[:, 1]
+    out["adjusted_r2"][fitted] = [est.adjusted_r2() for est in ests]
+    out["shape"][fitted] = [est.shape() for est in ests]
+
+    return out
+
+
+def jsonable(value: Any) -> Any:
+    """
+    Converts numpy values (recursively through dicts, lists and tuples) to JSON types. NaN and inf, which are not
+    valid JSON, become None.
+
+    Args:
+      value: Any: The value
+
+    Returns:
+      Any: The converted value
+    """
+    if isinstance(value, dict):
+        return {k: jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [jsonable(v) for v in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def score_record(est: Optional[MandVEnergyChangepointEstimator]) -> Dict[str, Any]:
+    """
+    Scores one fitted estimator as a JSON-serializable dict with the columns of score_estimators and the
+    coefficients.
+
+    Args:
+      est: Optional[MandVEnergyChangepointEstimator]: A fitted estimator or None if no model was selected
+
+    Returns:
+      Dict[str, Any]: The scores and coefficients
+    """
+    if est is None:
+        return {"name": None, "status": "no_model_passed"}
+    row = score_estimators([est])[0]
+    record = {name: row[name] for name in row.dtype.names}
+    record["coeffs"] = list(est.coeffs)
+    return jsonable(record)
@@ -1,5 +1,7 @@
 from typing import Any, Optional, Union, Tuple, Dict
 from collections.abc import Callable
+from enum import Enum
+import inspect
 from changepointmodel.core.nptypes import OneDimNDArray
 import numpy.typing as npt
 import numpy as np
@@ -18,14 +20,68 @@ from changepointmodel.core.calc.bounds import BoundTuple, OpenBoundCallable
 from mandvmodeling.core.calc.init_guesses import (
     InitialGuessTuple,
     OpenInitialGuessCallable,
+    clip_to_bounds,
 )
-from sklearn.utils.validation import check_X_y
-from scipy import optimize
+from mandvmodeling.core.calc import checks, intervals, kernels, piecewise, robust
+from mandvmodeling.core.calc.statistics import FitStatistics
+from mandvmodeling.core.budget import FitBudget, EvaluationTracker, DeadlineExceeded
+from mandvmodeling.core.pmodels import towt
+from mandvmodeling.core.pmodels.builtin import _check_backend, _jit_model_functions
+from sklearn.base import BaseEstimator, RegressorMixin
+from sklearn.utils.validation import check_X_y, check_array, check_is_fitted
+from scipy import optimize, sparse
+from scipy.sparse import linalg as sparse_linalg
 
 Bounds = Union[BoundTuple, OpenBoundCallable]
 InitialGuesses = Union[InitialGuessTuple, OpenInitialGuessCallable]
 
 
+class FitStatus(str, Enum):
+    """
+    The outcome of a fit. `OK` means `scipy.optimize.curve_fit` converged. `NOT_FITTABLE` means the data was rejected
+    by `mandvmodeling.core.calc.checks` before the optimizer was run. `MAX_NFEV` and `TIMEOUT` mean the fit ran out of
+    its `FitBudget` and the coefficients are the best ones found so far.
+    """
+
+    OK = "ok"
+    NOT_FITTABLE = "not_fittable"
+    MAX_NFEV = "max_nfev"
+    TIMEOUT = "timeout"
+
+
+def _n_params(model_func: Optional[Callable[..., Any]], p0: Any) -> Optional[int]:
+    """
+    Helper to determine the number of coefficients of a model function the same way `scipy.optimize.curve_fit` does.
+
+    Args:
+      model_func: Optional[Callable[..., Any]]: The model function
+      p0: Any: The initial guesses. Used if they are a sequence.
+
+    Returns:
+      Optional[int]: The number of coefficients or None if it cannot be determined
+    """
+    if p0 is not None and not callable(p0):
+        return len(p0)
+    try:
+        params = inspect.signature(model_func).parameters.values()
+    except (TypeError, ValueError):
+        return None
+    if any(p.kind == inspect.Parameter.VAR_POSITIONAL for p in params):
+        return None
+    return len(params) - 1
+
+
+def _builtin_kind(model_func: Optional[Callable[..., Any]]) -> Optional[str]:
+    """
+    Helper that returns the kind of a model function from `changepointmodel.core.calc.models` or None for any other
+    model function.
+    """
+    try:
+        return piecewise.MODEL_KINDS.get(model_func)  # type: ignore
+    except TypeError:  # unhashable callables
+        return None
+
+
 def check_data_model(method: Callable[..., Any]) -> Callable[..., Any]:
     """
     Helper decorator to raise a TypeError if the data_model argument is not of type MandVDataModel. This
@@ -38,14 +94,14 @@ def check_data_model(method: Callable[..., Any]) -> Callable[..., Any]:
       Callable[..., Any]: The decorated method
     """
 
-    def wrapper(self, data_model):
+    def wrapper(self, data_model, *args, **kwargs):
         if not isinstance(data_model, MandVDataModel):
             raise TypeError(
                 "data_model is of type {}. Must be of type MandVDataModel".format(
                     type(data_model).__name__
                 )
             )
-        return method(self, data_model)
+        return method(self, data_model, *args, **kwargs)
 
     return wrapper
 
@@ -64,6 +120,7 @@ class MandVCurvefitEstimator(ChangepointModelCurvefitEstimator):
             str, Callable[[npt.NDArray[np.float64], Any], npt.NDArray[np.float64]], None
         ] = None,
         lsq_kwargs: Optional[Dict[Any, Any]] = {},
+        precheck: bool = True,
     ) -> None:
         super().__init__(
             model_func=model_func,
@@ -73,6 +130,7 @@ class MandVCurvefitEstimator(ChangepointModelCurvefitEstimator):
             jac=jac,
             lsq_kwargs=lsq_kwargs,
         )
+        self.precheck = precheck
 
     def fit(
         self,
@@ -80,30 +138,74 @@ class MandVCurvefitEstimator(ChangepointModelCurvefitEstimator):
         y: Optional[npt.NDArray[np.float64]] = None,
         sigma: Optional[npt.NDArray[np.float64]] = None,
         absolute_sigma: bool = False,
+        budget: Optional[FitBudget] = None,
     ) -> "MandVCurvefitEstimator":
         """Fit X features to target y.
 
         Refer to scipy.optimize.curve_fit docs for details on sigma values.
 
+        If `precheck` is set, the data is first run through `mandvmodeling.core.calc.checks`. Data that cannot be fit
+        (NaN or inf values, constant X or y, too few points or empty changepoint ranges) is not passed to curve_fit.
+        Instead the coefficients are set to NaN, `fit_status_` is set to `FitStatus.NOT_FITTABLE` and `fit_check_`
+        holds the reason.
+
+        If a `budget` is given, the fit stops once `budget.max_nfev` function evaluations or `budget.timeout` seconds
+        have been used up. Instead of raising a RuntimeError, the coefficients are set to the best ones seen so far,
+        the covariance is set to inf and `fit_status_` is set to `FitStatus.MAX_NFEV` or `FitStatus.TIMEOUT`.
+
         Args:
             X (np.array): The feature matrix we are using to fit.
             y (np.array): The target array.
             sigma (Optional[np.array], optional): Determines uncertainty in the ydata. Defaults to None.
             absolute_sigma (bool, optional): Uses sigma in an absolute sense and reflects this in the pcov. Defaults to True.
+            budget (Optional[FitBudget], optional): Limits on function evaluations and wall-clock time. Defaults to None.
             squeeze_1d: (bool, optional): Squeeze X into a 1 dimensional array for curve fitting. This is useful if you are fitting
                 a function with an X array and do not want to squeeze before it enters curve_fit. Defaults to True.
 
         Returns:
             GeneralizedCurveFitEstimator: self
         """
+        n_params = _n_params(self.model_func, self.p0)
+        if self.precheck and y is not None:
+            check = checks.check_fittable(X, y, n_params=n_params, sigma=sigma)
+            if not check.fittable:
+                return self._set_not_fittable(X, y, n_params, check)
+
         # NOTE the user defined function should handle the neccesary array manipulation (squeeze, reshape etc.)
         # pass the sklearn estimator dimensionality check
         X, y = check_X_y(X, y)
 
         if callable(self.bounds):  # we allow bounds to be a callable
-            bounds = self.bounds(X)
+            if self.precheck:
+                try:
+                    bounds = self.bounds(X)
+                except IndexError:
+                    return self._set_not_fittable(
+                        X,
+                        y,
+                        n_params,
+                        checks.FittabilityCheck(
+                            fittable=False,
+                            reason=checks.TOO_FEW_POINTS,
+                            message="Too few points to calculate the bounds.",
+                        ),
+                    )
+            else:
+                bounds = self.bounds(X)
         else:
             bounds = self.bounds  # type: ignore
+        if bounds is None:
+            # unbounded, as curve_fit's default
+            bounds = (-np.inf, np.inf)
+
+        kind = _builtin_kind(self.model_func)
+        if self.precheck and kind is not None:
+            # only the built-in models are known to end with their changepoints
+            check = checks.check_changepoint_ranges(
+                X, bounds, piecewise.N_CHANGEPOINTS[kind]
+            )
+            if not check.fittable:
+                return self._set_not_fittable(X, y, n_params, check)
 
         if callable(self.p0):
             p0 = self.p0(X, y)
@@ -112,23 +214,117 @@ class MandVCurvefitEstimator(ChangepointModelCurvefitEstimator):
 
         self.X_ = X
         self.y_ = y
+        self.name_ = self.model_func.__name__  # type: ignore
+        self.fit_check_ = checks.FITTABLE
 
-        popt, pcov = optimize.curve_fit(
-            f=self.model_func,
-            xdata=X,
-            ydata=y,
-            p0=p0,
-            method=self.method,
-            sigma=sigma,
-            absolute_sigma=absolute_sigma,
-            bounds=bounds,
-            jac=self.jac,
-            **self.lsq_kwargs,
+        if budget is None:
+            popt, pcov = optimize.curve_fit(
+                f=self.model_func,
+                xdata=X,
+                ydata=y,
+                p0=p0,
+                method=self.method,
+                sigma=sigma,
+                absolute_sigma=absolute_sigma,
+                bounds=bounds,
+                jac=self.jac,
+                **self.lsq_kwargs,
+            )
+            self.popt_ = popt
+            self.pcov_ = pcov
+            self.fit_status_ = FitStatus.OK
+            self.nfev_ = None
+            return self
+
+        lsq_kwargs = dict(self.lsq_kwargs or {})
+        if budget.max_nfev is not None:
+            # curve_fit calls the evaluation limit `maxfev` for lm and `max_nfev` for trf and dogbox
+            lsq_kwargs["maxfev" if self.method == "lm" else "max_nfev"] = (
+                budget.max_nfev
+            )
+
+        if p0 is None and n_params is not None:
+            # the tracker hides the signature of model_func so use curve_fit's default initial guesses
+            p0 = np.ones(n_params)
+
+        tracker = EvaluationTracker(
+            self.model_func, y, sigma=sigma, timeout=budget.timeout
         )
+        try:
+            popt, pcov = optimize.curve_fit(
+                f=tracker,
+                xdata=X,
+                ydata=y,
+                p0=p0,
+                method=self.method,
+                sigma=sigma,
+                absolute_sigma=absolute_sigma,
+                bounds=bounds,
+                jac=self.jac,
+                **lsq_kwargs,
+            )
+            status = FitStatus.OK
+        except DeadlineExceeded:
+            status = FitStatus.TIMEOUT
+        except RuntimeError:
+            status = FitStatus.MAX_NFEV
+
+        if status is not FitStatus.OK:
+            if tracker.best_params is not None:
+                popt = np.asarray(tracker.best_params, dtype=np.float64)
+            elif p0 is not None:
+                popt = np.asarray(p0, dtype=np.float64)
+            else:
+                popt = np.full(n_params or 0, np.nan)
+            pcov = np.full((len(popt), len(popt)), np.inf)
 
         self.popt_ = popt
         self.pcov_ = pcov
+        self.fit_status_ = status
+        self.nfev_ = tracker.nfev
+
+        return self
+
+    def predict(self, X: npt.NDArray[np.float64]) -> OneDimNDArray[np.float64]:
+        """Predict y from X.
+
+        The built-in changepoint models from `changepointmodel.core.calc.models` are evaluated with the vectorized
+        kernels in `mandvmodeling.core.calc.kernels`. Any other model function is called as usual.
+
+        Args:
+            X (np.array): The feature matrix.
+
+        Returns:
+            OneDimNDArray[np.float64]: The predicted values.
+        """
+        kind = _builtin_kind(self.model_func)
+        if kind is None:
+            return super().predict(X)
+
+        check_is_fitted(self, ["popt_", "pcov_", "name_"])
+        X = check_array(X)
+        return kernels.predict(kind, X.reshape(-1), self.popt_)
+
+    def _set_not_fittable(
+        self,
+        X: npt.NDArray[np.float64],
+        y: npt.NDArray[np.float64],
+        n_params: Optional[int],
+        check: checks.FittabilityCheck,
+    ) -> "MandVCurvefitEstimator":
+        """
+        Sets the fitted attributes for data that was rejected by the pre-check. Coefficients are NaN and the
+        covariance is inf, which is what curve_fit reports when the covariance cannot be estimated.
+        """
+        n_params = n_params or 0
+        self.X_ = X
+        self.y_ = y
+        self.popt_ = np.full(n_params, np.nan)
+        self.pcov_ = np.full((n_params, n_params), np.inf)
         self.name_ = self.model_func.__name__  # type: ignore
+        self.fit_status_ = FitStatus.NOT_FITTABLE
+        self.fit_check_ = check
+        self.nfev_ = 0
 
         return self
 
@@ -139,6 +335,16 @@ class MandVEnergyChangepointEstimator(ChangepointModelEnergyChangepointEstimator
     and scores from the EnergyChangepointEstimator class from the changepointmodel library but this child class
     ensures that the data is sorted beforehand. By default, you must provide a MandVParameterModelFunction instance compared
     to EnergyChangepointEstimator where this is optional.
+
+    The residuals and sums behind r2, rmse, cvrmse and the totals are computed once at fit time (see `statistics`).
+    The remaining diagnostics (adjusted_r2, dpop, tstat, shape and load) are computed on first use and cached until the
+    next fit.
+
+    With `backend="jit"`, the built-in models are fit with the compiled model functions and analytic Jacobians of
+    `mandvmodeling.core.calc.jit` (NumPy when numba is not installed). Other model functions are fit as usual.
+
+    `fit_robust` fits the built-in models by iteratively reweighted least squares so outliers get small weights. The
+    final weights are reported by `weights`.
     """
 
     def __init__(
@@ -146,7 +352,10 @@ class MandVEnergyChangepointEstimator(ChangepointModelEnergyChangepointEstimator
         model: Optional[
             MandVParameterModelFunction[ParamaterModelCallableT, EnergyParameterModelT]
         ] = None,
+        backend: str = "default",
     ):
+        _check_backend(backend)
+        self.backend = backend
         if model:
             if isinstance(model, MandVParameterModelFunction):
                 self.model: Optional[
@@ -167,22 +376,167 @@ class MandVEnergyChangepointEstimator(ChangepointModelEnergyChangepointEstimator
         self,
         data_model: MandVDataModel,
         sigma: Optional[OneDimNDArray[np.float64]] = None,
-        absolute_sigma: bool = False,
+        absolute_sigma: Optional[bool] = None,
+        budget: Optional[FitBudget] = None,
         **fit_params,
     ):
         """
         This is a wrapped around EnergyChangepointEstimator.fit that forces the data to be sorted by X. Use
         EnergyChangepointEstimator.fit if you don't need to force the data to be sorted by X.
+
+        If `sigma` is not given, the `sigma` of the data model is used, or weights from its `counts` (see
+        `MandVDataModel.fit_sigma`). If `absolute_sigma` is not given, the `absolute_sigma` of the data model is used.
+        A sigma passed here must be in the order of the sorted data model. `weighted_statistics` holds the diagnostics
+        weighted by 1 / sigma**2.
+
+        `budget` limits the function evaluations and wall-clock time of the fit. If it is not given, the `fit_budget`
+        of the MandVParameterModelFunction is used. See MandVCurvefitEstimator.fit for details.
         """
-        self.__data_model = data_model
-        self.estimator_ = MandVCurvefitEstimator(
-            model_func=self.model.f,
+        if sigma is None:
+            sigma = data_model.fit_sigma()
+        if absolute_sigma is None:
+            absolute_sigma = bool(data_model.absolute_sigma)
+        f, jac = self.model.f, getattr(self.model, "jac", None)
+        kind = _builtin_kind(f)
+        if self.backend == "jit" and kind is not None:
+            f, jac = _jit_model_functions(kind)
+        estimator = MandVCurvefitEstimator(
+            model_func=f,
             bounds=self.model.bounds,
             p0=self.model.initial_guesses,
+            jac=jac,
+        )
+        estimator.fit(
+            data_model.X,
+            data_model.y,
+            sigma,
+            absolute_sigma,
+            budget=budget if budget is not None else self.model.fit_budget,
+        )
+        return self._set_fitted(data_model, estimator, sigma, absolute_sigma)
+
+    @check_data_model
+    def fit_robust(
+        self,
+        data_model: MandVDataModel,
+        loss: str = "huber",
+        max_iter: int = 20,
+        tol: float = 1e-4,
+        budget: Optional[FitBudget] = None,
+    ) -> "MandVEnergyChangepointEstimator":
+        """
+        Fits a built-in model robustly with `mandvmodeling.core.calc.robust.irls`. The changepoints are searched on a
+        grid of the X values within the bounds and the weights are updated from the residuals with a Huber or bisquare
+        loss until they converge. The result is then refined by a weighted curve_fit with sigma = 1 / sqrt(weights),
+        so the coefficients respect the bounds and the changepoints are not restricted to the grid.
+
+        The sigma or counts of the data model (see `MandVDataModel.fit_sigma`) are prior weights that the robust
+        weights multiply. The final robust weights are available from `weights`, the IRLS details from `robust_`. Data
+        that is not fittable is handled as in fit and gets weights of 1.
+
+        Args:
+          data_model: MandVDataModel: The data
+          loss: str: "huber" or "bisquare". Defaults to "huber".
+          max_iter: int: The maximum number of reweighting iterations. Defaults to 20.
+          tol: float: Stop once no weight changes by more than this. Defaults to 1e-4.
+          budget: Optional[FitBudget]: Limits of the final curve_fit. Defaults to the `fit_budget` of the model.
+
+        Returns:
+          MandVEnergyChangepointEstimator: self
+        """
+        if loss not in robust.LOSSES:
+            raise ValueError(
+                "Unknown loss {}. Must be one of {}".format(loss, robust.LOSSES)
+            )
+        f, jac = self.model.f, getattr(self.model, "jac", None)
+        kind = _builtin_kind(f)
+        if kind is None:
+            raise ValueError("Robust fits are only supported for the built-in models")
+        if self.backend == "jit":
+            f, jac = _jit_model_functions(kind)
+
+        X, y = data_model.X, data_model.y
+        result = None
+        sigma = prior_sigma = data_model.fit_sigma()
+        if checks.check_fittable(
+            X, y, n_params=piecewise.N_PARAMS[kind], sigma=prior_sigma
+        ).fittable:
+            try:
+                bounds = (
+                    self.model.bounds(X)
+                    if callable(self.model.bounds)
+                    else self.model.bounds
+                )
+            except IndexError:
+                bounds = None
+            if (
+                bounds is not None
+                and checks.check_changepoint_ranges(
+                    X, bounds, piecewise.N_CHANGEPOINTS[kind]
+                ).fittable
+            ):
+                result = robust.irls(
+                    kind,
+                    X,
+                    y,
+                    bounds,
+                    loss=loss,
+                    max_iter=max_iter,
+                    tol=tol,
+                    sample_weights=None if prior_sigma is None else prior_sigma**-2,
+                )
+                # zero weights of the bisquare loss would make sigma infinite
+                sigma = 1.0 / np.sqrt(np.maximum(result.weights, 1e-8))
+                if prior_sigma is not None:
+                    sigma = sigma * prior_sigma
+
+        estimator = MandVCurvefitEstimator(
+            model_func=f,
+            bounds=self.model.bounds,
+            # the grid search only respects the changepoint bounds
+            p0=clip_to_bounds(result.coeffs, bounds)
+            if result is not None
+            else self.model.initial_guesses,
+            jac=jac,
         )
-        self.pred_y_ = self.estimator_.fit(
-            self.__data_model.X, self.__data_model.y, sigma, absolute_sigma
-        ).predict(self.__data_model.X)
+        estimator.fit(
+            X,
+            y,
+            sigma,
+            False,
+            budget=budget if budget is not None else self.model.fit_budget,
+        )
+        self._set_fitted(data_model, estimator, sigma, False)
+        if result is not None:
+            self.robust_ = result
+            self.weights_ = result.weights
+        return self
+
+    @property
+    @check_not_fitted
+    def weights(self) -> OneDimNDArray[np.float64]:
+        """
+        Returns the final IRLS weights between 0 and 1 of the last `fit_robust`, or weights of 1 after fit.
+        """
+        return self.weights_
+
+    def _set_fitted(
+        self,
+        data_model: MandVDataModel,
+        estimator: MandVCurvefitEstimator,
+        sigma: Optional[OneDimNDArray[np.float64]],
+        absolute_sigma: bool,
+    ) -> "MandVEnergyChangepointEstimator":
+        """
+        Helper that sets the fitted attributes from a fitted MandVCurvefitEstimator. Used by fit and to restore an
+        estimator from a `mandvmodeling.core.results.FitResult`.
+        """
+        self.__data_model = data_model
+        self.estimator_ = estimator
+        if self.estimator_.fit_status_ is FitStatus.NOT_FITTABLE:
+            self.pred_y_ = np.full(len(self.__data_model.y), np.nan)
+        else:
+            self.pred_y_ = self.estimator_.predict(self.__data_model.X)
 
         self.X_, self.y_ = (
             self.estimator_.X_,
@@ -192,8 +546,37 @@ class MandVEnergyChangepointEstimator(ChangepointModelEnergyChangepointEstimator
         self.sigma_ = sigma
         self.absolute_sigma_ = absolute_sigma
 
+        self.statistics_ = FitStatistics.from_arrays(
+            self.y_, self.pred_y_, len(self.estimator_.popt_)
+        )
+        self._diagnostics_cache: Dict[Any, Any] = {}
+        if self.estimator_.fit_status_ is not FitStatus.NOT_FITTABLE:
+            # every score needs the heating and cooling point counts, so they are counted once per fit
+            self._diagnostics_cache["dpop"] = super().dpop()
+        self.robust_: Optional[robust.IRLSResult] = None
+        self.weights_ = np.ones(len(self.__data_model.y), dtype=np.float64)
+
         return self
 
+    @property
+    @check_not_fitted
+    def weighted_statistics(self) -> FitStatistics:
+        """
+        Returns the FitStatistics weighted by 1 / sigma**2 of the sigma the model was fit with. Its r2, rmse and
+        cvrmse are the weighted scores. Without sigma, this is `statistics`.
+        """
+        if self.sigma_ is None:
+            return self.statistics_
+        return self._cached(
+            "weighted_statistics",
+            lambda: FitStatistics.from_arrays(
+                self.y_,
+                self.pred_y_,
+                self.statistics_.n_params,
+                weights=np.asarray(self.sigma_, dtype=np.float64) ** -2,
+            ),
+        )
+
     @property
     @check_not_fitted
     def sensor_reading_timestamps(self) -> OneDimNDArray[np.datetime64]:
@@ -201,3 +584,256 @@ class MandVEnergyChangepointEstimator(ChangepointModelEnergyChangepointEstimator
         Returns the MandVDataModel object used to fit the model.
         """
         return self.__data_model.sensor_reading_timestamps
+
+    @property
+    @check_not_fitted
+    def fit_status(self) -> FitStatus:
+        """
+        Returns the FitStatus of the last fit.
+        """
+        return self.estimator_.fit_status_
+
+    @property
+    @check_not_fitted
+    def fit_check(self) -> checks.FittabilityCheck:
+        """
+        Returns the FittabilityCheck of the last fit. If the data was not fittable, this holds the reason.
+        """
+        return self.estimator_.fit_check_
+
+    def _cached(self, key: Any, compute: Callable[[], Any]) -> Any:
+        """
+        Helper to compute a diagnostic once per fit. The cache is reset by fit.
+        """
+        cache = self._diagnostics_cache
+        if key not in cache:
+            cache[key] = compute()
+        return cache[key]
+
+    @property
+    @check_not_fitted
+    def statistics(self) -> FitStatistics:
+        """
+        Returns the FitStatistics (residuals, sse, sst and totals) computed at fit time.
+        """
+        return self.statistics_
+
+    @check_not_fitted
+    def total_y(self) -> float:
+        return self.statistics_.total_y
+
+    @check_not_fitted
+    def total_pred_y(self) -> float:
+        return self.statistics_.total_pred_y
+
+    @check_not_fitted
+    def len_y(self) -> int:
+        return self.statistics_.n
+
+    @check_not_fitted
+    def r2(self) -> float:
+        return self.statistics_.r2
+
+    @check_not_fitted
+    def rmse(self) -> float:
+        return self.statistics_.rmse
+
+    @check_not_fitted
+    def cvrmse(self) -> float:
+        return self.statistics_.cvrmse
+
+    @check_not_fitted
+    def adjusted_r2(self) -> float:
+        return self._cached("adjusted_r2", super().adjusted_r2)
+
+    @check_not_fitted
+    def dpop(self) -> Tuple[int, int]:
+        return self._cached("dpop", super().dpop)
+
+    @check_not_fitted
+    def tstat(self) -> Tuple[Optional[float], Optional[float]]:
+        return self._cached("tstat", super().tstat)
+
+    @check_not_fitted
+    def shape(self) -> bool:
+        return self._cached("shape", super().shape)
+
+    @check_not_fitted
+    def load(self, scalar: Optional[float] = None) -> Any:
+        parent_load = super().load
+        return self._cached(("load", scalar), lambda: parent_load(scalar))
+
+    @check_not_fitted
+    def intervals(
+        self, X: npt.NDArray[np.float64], confidence: float = 0.95
+    ) -> intervals.Bands:
+        """
+        Confidence bands of the mean prediction and prediction bands of new observations at X, from the coefficient
+        covariance by the delta method (see `mandvmodeling.core.calc.intervals`). The built-in models use analytic
+        Jacobians and any other model function a forward difference Jacobian. For a model fit with sigma, the
+        residual variance of the prediction bands is that of `weighted_statistics`, the variance of a new observation
+        of average weight.
+
+        Args:
+          X: npt.NDArray[np.float64]: The X to predict, as passed to predict
+          confidence: float: The confidence level. Defaults to 0.95.
+
+        Returns:
+          intervals.Bands: The predictions and bands
+        """
+        X = check_array(X)
+        coeffs = np.asarray(self.coeffs, dtype=np.float64)
+        kind = _builtin_kind(self.model.f)
+        if kind is None:
+            J = intervals.numerical_jacobian(self.model.f, X, coeffs)
+            pcov = self.cov
+        else:
+            T = piecewise.canonical_map(kind)
+            J = intervals.canonical_jacobian(X, T @ coeffs)
+            pcov = T @ self.cov @ T.T
+
+        stats = self.weighted_statistics
+        dof = stats.n - stats.n_params
+        return intervals.bands(
+            self.predict(X),
+            J,
+            pcov,
+            stats.sse / dof if dof > 0 else np.nan,
+            dof,
+            confidence=confidence,
+        )
+
+
+class TOWTEstimator(BaseEstimator, RegressorMixin):
+    """
+    Fits the hourly time-of-week and temperature model of `mandvmodeling.core.pmodels.towt` to a MandVDataModel of
+    hourly temperatures X and loads y. The time of week is taken from `sensor_reading_timestamps`.
+
+    The sparse design matrix is solved with `scipy.sparse.linalg.lsmr` after its columns are scaled to unit norm.
+    Like `MandVEnergyChangepointEstimator.fit`, the sigma or counts of the data model weight the fit (see
+    `MandVDataModel.fit_sigma`).
+
+    Attributes:
+        model (TOWTModelFunction): The model. Defaults to TOWTModelFunction() with the default knots.
+        atol (float): The tolerance of lsmr. Defaults to 1e-10.
+    """
+
+    def __init__(
+        self, model: Optional[towt.TOWTModelFunction] = None, atol: float = 1e-10
+    ):
+        self.model = model if model is not None else towt.TOWTModelFunction()
+        self.atol = atol
+
+    @check_data_model
+    def fit(
+        self,
+        data_model: MandVDataModel,
+        sigma: Optional[OneDimNDArray[np.float64]] = None,
+    ) -> "TOWTEstimator":
+        """
+        Fits the model.
+
+        Args:
+          data_model: MandVDataModel: The hourly data
+          sigma: Optional[OneDimNDArray[np.float64]]: The uncertainty in y, in the order of the sorted data model.
+            Defaults to the sigma of the data model.
+
+        Returns:
+          TOWTEstimator: self
+        """
+        if sigma is None:
+            sigma = data_model.fit_sigma()
+        A = self.model.design_matrix(data_model.X, data_model.sensor_reading_timestamps)
+        y = np.asarray(data_model.y, dtype=np.float64)
+        b = y
+        if sigma is not None:
+            A = sparse.diags(1.0 / sigma) @ A
+            b = y / sigma
+
+        # unit column norms speed up lsmr, and hours of the week without data keep a coefficient of 0
+        norms = np.sqrt(np.asarray(A.multiply(A).sum(axis=0))).reshape(-1)
+        scale = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)
+        solution = sparse_linalg.lsmr(
+            A @ sparse.diags(scale), b, atol=self.atol, btol=self.atol
+        )
+
+        self.coeffs_ = solution[0] * scale
+        self.n_iter_ = solution[2]
+        self.X_ = data_model.X
+        self.y_ = y
+        self.sensor_reading_timestamps_ = data_model.sensor_reading_timestamps
+        self.sigma_ = sigma
+        self.pred_y_ = self.predict(data_model.X, data_model.sensor_reading_timestamps)
+        self.statistics_ = FitStatistics.from_arrays(
+            y, self.pred_y_, int(np.count_nonzero(norms))
+        )
+        return self
+
+    @check_not_fitted
+    def predict(
+        self,
+        X: npt.NDArray[np.float64],
+        sensor_reading_timestamps: npt.ArrayLike,
+    ) -> OneDimNDArray[np.float64]:
+        """
+        Predicts the loads of hours.
+
+        Args:
+          X: npt.NDArray[np.float64]: The temperatures of shape (N,) or (N, 1)
+          sensor_reading_timestamps: npt.ArrayLike: The timestamps of shape (N,)
+
+        Returns:
+          OneDimNDArray[np.float64]: The predicted loads
+        """
+        return self.model.design_matrix(X, sensor_reading_timestamps) @ self.coeffs_
+
+    @property
+    def name(self) -> str:
+        return self.model.name
+
+    @property
+    @check_not_fitted
+    def coeffs(self) -> OneDimNDArray[np.float64]:
+        return self.coeffs_
+
+    @property
+    @check_not_fitted
+    def time_of_week_coeffs(self) -> OneDimNDArray[np.float64]:
+        """
+        Returns the coefficients of the 168 hours of the week, from Monday 00:00.
+        """
+        return self.model.split_coefficients(self.coeffs_)[0]
+
+    @property
+    @check_not_fitted
+    def temperature_coeffs(self) -> npt.NDArray[np.float64]:
+        """
+        Returns the slopes of the temperature segments, of shape (2, n_segments) for the occupied and unoccupied hours
+        with an occupancy schedule.
+        """
+        return self.model.split_coefficients(self.coeffs_)[1]
+
+    @property
+    @check_not_fitted
+    def pred_y(self) -> OneDimNDArray[np.float64]:
+        return self.pred_y_
+
+    @property
+    @check_not_fitted
+    def statistics(self) -> FitStatistics:
+        """
+        Returns the FitStatistics of the fit. Its n_params counts the coefficients of the hours and segments with data.
+        """
+        return self.statistics_
+
+    @check_not_fitted
+    def r2(self) -> float:
+        return self.statistics_.r2
+
+    @check_not_fitted
+    def rmse(self) -> float:
+        return self.statistics_.rmse
+
+    @check_not_fitted
+    def cvrmse(self) -> float:
+        return self.statistics_.cvrmse
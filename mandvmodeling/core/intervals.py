@@ -0,0 +1,53 @@
+"""Confidence and prediction bands of many fitted estimators at once.
+
+`MandVEnergyChangepointEstimator.intervals` computes the bands of one estimator. `batch_intervals` stacks the
+coefficients and covariances of many estimators of the built-in models as 5P coefficients (see
+`mandvmodeling.core.calc.piecewise.canonical_map`) and computes all of their bands at a shared X in one pass.
+"""
+
+from typing import Sequence
+import numpy as np
+import numpy.typing as npt
+from .calc import intervals, kernels, piecewise
+from .estimator import MandVEnergyChangepointEstimator
+
+
+def batch_intervals(
+    estimators: Sequence[MandVEnergyChangepointEstimator],
+    X: npt.ArrayLike,
+    confidence: float = 0.95,
+) -> intervals.Bands:
+    """
+    Computes the bands of many fitted estimators of the built-in changepoint models at the same X.
+
+    Args:
+      estimators: Sequence[MandVEnergyChangepointEstimator]: Fitted estimators
+      X: npt.ArrayLike: The X to predict. NByOne arrays are flattened.
+      confidence: float: The confidence level. Defaults to 0.95.
+
+    Returns:
+      intervals.Bands: The predictions and bands, every array with one row per estimator
+    """
+    X = np.asarray(X, dtype=np.float64).reshape(-1)
+    m = len(estimators)
+    coefficients = np.empty((m, 5))
+    pcov = np.empty((m, 5, 5))
+    s2 = np.empty(m)
+    dof = np.empty(m)
+
+    for i, est in enumerate(estimators):
+        T = piecewise.canonical_map(piecewise.model_kind(est.model.f))
+        coefficients[i] = T @ np.asarray(est.coeffs, dtype=np.float64)
+        pcov[i] = T @ est.cov @ T.T
+        stats = est.weighted_statistics
+        dof[i] = stats.n - stats.n_params
+        s2[i] = stats.sse / dof[i] if dof[i] > 0 else np.nan
+
+    return intervals.bands(
+        kernels.fivep(X, *coefficients.T),
+        intervals.canonical_jacobian(X, coefficients),
+        pcov,
+        s2,
+        dof,
+        confidence=confidence,
+    )
@@ -0,0 +1,123 @@
+"""Normalized annual consumption (NAC) of many fitted models against shared typical-year weather.
+
+A portfolio usually has thousands of buildings but only a handful of weather stations, each with one typical
+meteorological year (TMY) of temperatures. `normalized_consumption` predicts every model on a station's temperatures
+in a single broadcast call (see `mandvmodeling.core.savings.predict`) and caches the totals by weather key and model
+coefficients, so a model is only ever evaluated once per weather file.
+"""
+
+from dataclasses import dataclass
+from typing import Hashable, Optional, Sequence, Union
+import hashlib
+import numpy as np
+import numpy.typing as npt
+from changepointmodel.core.nptypes import OneDimNDArray
+from .cache import LRUCache
+from .estimator import MandVEnergyChangepointEstimator
+from .savings import CompactFits, predict, stack_coefficients
+
+
+@dataclass(frozen=True, eq=False)
+class TypicalWeather:
+    """The temperatures of a typical year at one weather station.
+
+    Attributes:
+        key (Hashable): Identifies the weather file in the cache, e.g. the station id or the path of the TMY file.
+        temperatures (OneDimNDArray[np.float64]): The temperatures in the same units and resolution as the X the
+            models were fit on.
+    """
+
+    key: Hashable
+    temperatures: OneDimNDArray[np.float64]
+
+    @classmethod
+    def from_array(
+        cls, temperatures: npt.ArrayLike, key: Optional[Hashable] = None
+    ) -> "TypicalWeather":
+        """
+        Creates a TypicalWeather. Without a key, the key is a hash of the temperatures.
+
+        Args:
+          temperatures: npt.ArrayLike: The temperatures. NByOne arrays are flattened.
+          key: Optional[Hashable]: The key. Defaults to None.
+
+        Returns:
+          TypicalWeather: The weather
+        """
+        temperatures = np.ascontiguousarray(temperatures, dtype=np.float64).reshape(-1)
+        temperatures.setflags(write=False)
+        if key is None:
+            key = hashlib.sha1(temperatures.tobytes()).hexdigest()
+        return cls(key=key, temperatures=temperatures)
+
+
+class NormalizedConsumptionCache(LRUCache[float]):
+    """A least recently used cache of normalized totals keyed by weather key and 5P model coefficients.
+
+    Args:
+        maxsize (Optional[int]): The maximum number of totals to keep. Defaults to 65536. None for no limit.
+    """
+
+    def __init__(self, maxsize: Optional[int] = 65536):
+        super().__init__(maxsize)
+
+
+DEFAULT_CACHE = NormalizedConsumptionCache()
+
+
+def _canonical(
+    models: Union[
+        CompactFits, npt.NDArray[np.float64], Sequence[MandVEnergyChangepointEstimator]
+    ],
+) -> npt.NDArray[np.float64]:
+    if isinstance(models, CompactFits):
+        return models.coefficients
+    if isinstance(models, np.ndarray):
+        if models.ndim != 2 or models.shape[1] != 5:
+            raise ValueError("coefficients must be an M x 5 array of 5P coefficients")
+        return models
+    return stack_coefficients(models)
+
+
+def normalized_consumption(
+    models: Union[
+        CompactFits, npt.NDArray[np.float64], Sequence[MandVEnergyChangepointEstimator]
+    ],
+    weather: TypicalWeather,
+    cache: Optional[NormalizedConsumptionCache] = DEFAULT_CACHE,
+) -> OneDimNDArray[np.float64]:
+    """
+    Computes the normalized consumption of every model over the typical weather, i.e. the sum of its predictions on
+    the weather's temperatures. Only the models missing from the cache are predicted, all in one broadcast call.
+
+    Args:
+      models: Union[CompactFits, npt.NDArray[np.float64], Sequence[MandVEnergyChangepointEstimator]]: Fitted
+        estimators of the built-in changepoint models, their CompactFits or an M x 5 array of 5P coefficients
+      weather: TypicalWeather: The typical weather
+      cache: Optional[NormalizedConsumptionCache]: The cache. Defaults to a module level cache. None disables
+        caching.
+
+    Returns:
+      OneDimNDArray[np.float64]: The normalized consumption of every model
+    """
+    coefficients = np.ascontiguousarray(_canonical(models), dtype=np.float64)
+    out = np.empty(len(coefficients))
+
+    if cache is None:
+        missing = np.arange(len(coefficients))
+    else:
+        keys = [(weather.key, row.tobytes()) for row in coefficients]
+        found = [cache.get(key) for key in keys]
+        missing = np.array([i for i, v in enumerate(found) if v is None], dtype=int)
+        for i, value in enumerate(found):
+            if value is not None:
+                out[i] = value
+
+    if len(missing):
+        totals = predict(coefficients[missing], weather.temperatures).sum(axis=1)
+        out[missing] = totals
+        if cache is not None:
+            for i, total in zip(missing, totals):
+                cache.put(keys[i], float(total))
+
+    return out
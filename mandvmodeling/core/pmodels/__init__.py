@@ -1,4 +1,31 @@
-from .base import InitialGuess, InitialGuessCallable
-from .parameter_model import MandVParameterModelFunction
+from typing import TYPE_CHECKING
+from mandvmodeling._lazy import attach
 
-__all__ = ["InitialGuess", "InitialGuessCallable", "MandVParameterModelFunction"]
+# changepointmodel is imported on first use
+__getattr__, __dir__ = attach(
+    __name__,
+    modules={},
+    attributes={
+        "InitialGuess": ".base",
+        "InitialGuessCallable": ".base",
+        "MandVParameterModelFunction": ".parameter_model",
+        "TOWTModelFunction": ".towt",
+        "create_model_function": ".builtin",
+        "get_model_function": ".builtin",
+    },
+)
+
+if TYPE_CHECKING:
+    from .base import InitialGuess, InitialGuessCallable
+    from .parameter_model import MandVParameterModelFunction
+    from .towt import TOWTModelFunction
+    from .builtin import create_model_function, get_model_function
+
+__all__ = [
+    "InitialGuess",
+    "InitialGuessCallable",
+    "MandVParameterModelFunction",
+    "TOWTModelFunction",
+    "create_model_function",
+    "get_model_function",
+]
@@ -0,0 +1,215 @@
+"""Builds MandVParameterModelFunction instances for the 2P, 3PC, 3PH, 4P and 5P changepoint models that ship with
+changepointmodel, using either the `default` or the `daily` bounds from `mandvmodeling.core.calc.bounds`.
+
+`create_model_function` builds a new instance on every call. `get_model_function` returns a shared, immutable
+instance from a registry keyed by model name and bounds strategy, built once with the matching initial guesses from
+`mandvmodeling.core.calc.init_guesses`, clipped into the bounds. Registered instances pickle by name, so they are cheap to send to worker
+processes and unpickle to the registry instance there.
+"""
+
+from typing import Any, Dict, Optional, Tuple
+import functools
+from changepointmodel.core.calc import models as ChangepointModelModels
+from changepointmodel.core.pmodels import coeffs_parser as ChangepointModelCoeffsParsers
+from changepointmodel.core.pmodels.parameter_model import (
+    TwoParameterModel,
+    ThreeParameterCoolingModel,
+    ThreeParameterHeatingModel,
+    FourParameterModel,
+    FiveParameterModel,
+)
+from mandvmodeling.core.calc import init_guesses
+from mandvmodeling.core.calc.bounds import daily_bounds, default_bounds
+from mandvmodeling.core.budget import FitBudget
+from .parameter_model import MandVParameterModelFunction
+
+MODEL_NAMES: Tuple[str, ...] = ("2P", "3PC", "3PH", "4P", "5P")
+BOUNDS_STRATEGIES: Tuple[str, ...] = ("default", "daily")
+
+# model name -> (model function, parameter model, coefficient parser, name of the bounds and initial guess functions)
+_MODEL_SPECS: Dict[str, Tuple] = {
+    "2P": (
+        ChangepointModelModels.twop,
+        TwoParameterModel,
+        ChangepointModelCoeffsParsers.TwoParameterCoefficientParser,
+        "twop",
+    ),
+    "3PC": (
+        ChangepointModelModels.threepc,
+        ThreeParameterCoolingModel,
+        ChangepointModelCoeffsParsers.ThreeParameterCoefficientsParser,
+        "threepc",
+    ),
+    "3PH": (
+        ChangepointModelModels.threeph,
+        ThreeParameterHeatingModel,
+        ChangepointModelCoeffsParsers.ThreeParameterCoefficientsParser,
+        "threeph",
+    ),
+    "4P": (
+        ChangepointModelModels.fourp,
+        FourParameterModel,
+        ChangepointModelCoeffsParsers.FourParameterCoefficientsParser,
+        "fourp",
+    ),
+    "5P": (
+        ChangepointModelModels.fivep,
+        FiveParameterModel,
+        ChangepointModelCoeffsParsers.FiveParameterCoefficientsParser,
+        "fivep",
+    ),
+}
+
+_BOUNDS_MODULES = {"default": default_bounds, "daily": daily_bounds}
+
+
+def create_model_function(
+    name: str,
+    bounds: str = "default",
+    use_initial_guesses: bool = False,
+    fit_budget: Optional[FitBudget] = None,
+    backend: str = "default",
+) -> MandVParameterModelFunction:
+    """
+    Creates a MandVParameterModelFunction for one of the built-in changepoint models.
+
+    Args:
+      name: str: One of "2P", "3PC", "3PH", "4P" or "5P"
+      bounds: str: The bounds strategy, either "default" or "daily". Defaults to "default".
+      use_initial_guesses: bool: Use the matching function from `mandvmodeling.core.calc.init_guesses`, with its
+        guesses clipped into the bounds. Defaults to False.
+      fit_budget: Optional[FitBudget]: The FitBudget for fits of this model. Defaults to None.
+      backend: str: "default" for the changepointmodel function, or "jit" for the compiled function and analytic
+        Jacobian of `mandvmodeling.core.calc.jit`. Defaults to "default".
+
+    Returns:
+      MandVParameterModelFunction: The model function
+    """
+    return MandVParameterModelFunction(
+        **_model_function_args(name, bounds, use_initial_guesses, fit_budget, backend)
+    )
+
+
+def _model_function_args(
+    name: str,
+    bounds: str,
+    use_initial_guesses: bool,
+    fit_budget: Optional[FitBudget],
+    backend: str,
+) -> Dict[str, Any]:
+    """
+    Helper that validates the arguments and returns the MandVParameterModelFunction arguments of a built-in model.
+    Shared by create_model_function and the registry.
+    """
+    _check_names(name, bounds, backend)
+    f, parameter_model, coefficients_parser, fn_name = _MODEL_SPECS[name]
+    bounds_function = getattr(_BOUNDS_MODULES[bounds], fn_name)
+    jac = None
+    if backend == "jit":
+        f, jac = _jit_model_functions(name)
+    return dict(
+        name=name,
+        f=f,
+        bounds=bounds_function,
+        parameter_model=parameter_model(),
+        coefficients_parser=coefficients_parser(),
+        initital_guesses=init_guesses.BoundedInitialGuess(
+            getattr(init_guesses, fn_name), bounds_function
+        )
+        if use_initial_guesses
+        else None,
+        fit_budget=fit_budget,
+        jac=jac,
+    )
+
+
+def _check_names(name: str, bounds: str, backend: str) -> None:
+    if name not in _MODEL_SPECS:
+        raise ValueError(
+            "Unknown model name {}. Must be one of {}".format(name, MODEL_NAMES)
+        )
+    if bounds not in _BOUNDS_MODULES:
+        raise ValueError(
+            "Unknown bounds strategy {}. Must be one of {}".format(
+                bounds, BOUNDS_STRATEGIES
+            )
+        )
+    _check_backend(backend)
+
+
+def _check_backend(backend: str) -> None:
+    if backend == "default":
+        return
+    from mandvmodeling.core.calc import jit
+
+    if backend not in jit.BACKENDS:
+        raise ValueError(
+            "Unknown backend {}. Must be one of {}".format(backend, jit.BACKENDS)
+        )
+
+
+def _jit_model_functions(name: str) -> Tuple[Any, Any]:
+    """
+    Helper that imports the jit backend on first use and returns the model function and Jacobian of a model, after
+    registering the jit model functions as built-in models.
+    """
+    from mandvmodeling.core.calc import jit
+
+    jit.register_model_kinds()
+    return jit.model_functions(name)
+
+
+class RegisteredModelFunction(MandVParameterModelFunction):
+    """
+    An immutable MandVParameterModelFunction from the registry of `get_model_function`. Use `create_model_function`
+    for an instance that can be changed, e.g. to set a fit_budget.
+    """
+
+    def __init__(self, name: str, bounds: str, backend: str = "default"):
+        super().__init__(**_model_function_args(name, bounds, True, None, backend))
+        object.__setattr__(self, "_backend", backend)
+        object.__setattr__(self, "_bounds_strategy", bounds)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if hasattr(self, "_bounds_strategy"):
+            raise AttributeError(
+                "Registered model functions are immutable. Use create_model_function for a new instance."
+            )
+        super().__setattr__(name, value)
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError("Registered model functions are immutable.")
+
+    def __reduce__(self) -> Tuple[Any, Tuple[str, str, str]]:
+        return get_model_function, (self.name, self._bounds_strategy, self._backend)
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> "RegisteredModelFunction":
+        return self
+
+    def __copy__(self) -> "RegisteredModelFunction":
+        return self
+
+
+@functools.lru_cache(maxsize=None)
+def _registered(name: str, bounds: str, backend: str) -> RegisteredModelFunction:
+    return RegisteredModelFunction(name, bounds, backend)
+
+
+def get_model_function(
+    name: str, bounds: str = "default", backend: str = "default"
+) -> MandVParameterModelFunction:
+    """
+    Returns the shared, immutable MandVParameterModelFunction of one of the built-in changepoint models, with the
+    matching initial guesses. Every call with the same arguments returns the same instance.
+
+    Args:
+      name: str: One of "2P", "3PC", "3PH", "4P" or "5P"
+      bounds: str: The bounds strategy, either "default" or "daily". Defaults to "default".
+      backend: str: "default" for the changepointmodel function, or "jit" for the compiled function and analytic
+        Jacobian of `mandvmodeling.core.calc.jit`. Defaults to "default".
+
+    Returns:
+      MandVParameterModelFunction: The model function
+    """
+    _check_names(name, bounds, backend)
+    return _registered(name, bounds, backend)
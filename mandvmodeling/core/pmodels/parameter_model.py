@@ -4,8 +4,9 @@ from changepointmodel.core.pmodels.parameter_model import (
 from typing import Generic
 from _collections_abc import Callable
 from changepointmodel.core.pmodels import base as ChangepointModelBase
-from typing import Union
+from typing import Optional, Union
 from . import base as MandVModelingBase
+from mandvmodeling.core.budget import FitBudget
 
 
 def _validate_param(param, param_str: str = None, valid_type=None):
@@ -67,11 +68,19 @@ class MandVParameterModelFunction(
         A component responsible for parsing coefficients.
     initital_guesses : Union[base.InitialGuessCallable, base.InitialGuess, None], optional
         Preliminary assumptions for the parameter model function, defaults to None.
+    fit_budget : Optional[FitBudget], optional
+        Limits on function evaluations and wall-clock time for every fit of this model, defaults to None.
+    jac : Optional[Callable], optional
+        The Jacobian of f, passed to `scipy.optimize.curve_fit`, defaults to None for finite differences.
 
     Methods:
     --------
     initial_guesses -> Union[base.InitialGuessCallable, base.InitialGuess, None]:
         Provides the preliminary assumptions for the parameter model function.
+    fit_budget -> Optional[FitBudget]:
+        Provides the default FitBudget for fits of this model.
+    jac -> Optional[Callable]:
+        Provides the Jacobian of the model function.
     """
 
     def __init__(
@@ -84,6 +93,8 @@ class MandVParameterModelFunction(
         initital_guesses: Union[
             MandVModelingBase.InitialGuessCallable, MandVModelingBase.InitialGuess
         ] = None,
+        fit_budget: Optional[FitBudget] = None,
+        jac: Optional[Callable] = None,
     ):
         _validate_param(param=f, param_str="f", valid_type=Callable)
         _validate_param(
@@ -108,6 +119,14 @@ class MandVParameterModelFunction(
             self._initial_guesses = initital_guesses
         else:
             self._initial_guesses = None
+        if fit_budget is not None:
+            _validate_param(
+                param=fit_budget, param_str="fit_budget", valid_type=FitBudget
+            )
+        self._fit_budget = fit_budget
+        if jac is not None:
+            _validate_param(param=jac, param_str="jac", valid_type=Callable)
+        self._jac = jac
 
     @property
     def initial_guesses(
@@ -124,3 +143,27 @@ class MandVParameterModelFunction(
             The preliminary assumptions for the parameter model, if present.
         """
         return self._initial_guesses
+
+    @property
+    def fit_budget(self) -> Optional[FitBudget]:
+        """
+        Provides the default limits on function evaluations and wall-clock time for fits of this model.
+
+        Returns:
+        --------
+        Optional[FitBudget]
+            The FitBudget, if present.
+        """
+        return self._fit_budget
+
+    @property
+    def jac(self) -> Optional[Callable]:
+        """
+        Provides the Jacobian of the model function with respect to its coefficients.
+
+        Returns:
+        --------
+        Optional[Callable]
+            The Jacobian jac(X, *coeffs), if present. Otherwise curve_fit uses finite differences.
+        """
+        return self._jac
@@ -0,0 +1,163 @@
+"""The time-of-week and temperature (TOWT) model for hourly data.
+
+The model predicts the load of an hour as the coefficient of its hour of the week (168 indicators, Monday 00:00 is 0)
+plus a piecewise linear function of the temperature with fixed knots:
+
+    y = alpha[time_of_week] + sum_j beta[j] * T_j
+
+where T_j is the part of the temperature that falls into segment j between two knots (see `temperature_segments`).
+With an `occupancy` schedule, occupied and unoccupied hours get separate temperature coefficients.
+
+Every row of the design matrix has one indicator and one entry per temperature segment, so it is built directly as
+a `scipy.sparse.csr_matrix` with a fixed number of entries per row. A year of hourly data is 8760 x 175 but only
+holds 8760 x 8 entries, and it is never materialized as a dense matrix.
+"""
+
+from typing import Optional, Sequence, Tuple
+import numpy as np
+import numpy.typing as npt
+from scipy import sparse
+
+HOURS_PER_WEEK = 168
+
+# the temperature knots of the CalTRACK hourly methods, in degrees Fahrenheit
+DEFAULT_KNOTS: Tuple[float, ...] = (30.0, 45.0, 55.0, 65.0, 75.0, 90.0)
+
+
+def time_of_week(timestamps: npt.ArrayLike) -> npt.NDArray[np.intp]:
+    """
+    The hour of the week of timestamps, from 0 for Monday 00:00 to 167 for Sunday 23:00.
+
+    Args:
+      timestamps: npt.ArrayLike: The timestamps
+
+    Returns:
+      npt.NDArray[np.intp]: The hours of the week
+    """
+    hours = np.asarray(timestamps, dtype="datetime64[h]").astype(np.int64)
+    # 1970-01-01 was a Thursday, 3 days after Monday
+    return ((hours + 3 * 24) % HOURS_PER_WEEK).astype(np.intp)
+
+
+def temperature_segments(
+    temperatures: npt.ArrayLike, knots: Sequence[float] = DEFAULT_KNOTS
+) -> npt.NDArray[np.float64]:
+    """
+    Splits temperatures into the segments between the knots. The first segment holds min(T, knots[0]), segment j
+    the part of T between knots[j - 1] and knots[j], and the last segment max(T - knots[-1], 0). The segments of a
+    temperature sum to the temperature.
+
+    Args:
+      temperatures: npt.ArrayLike: The temperatures of shape (N,) or (N, 1)
+      knots: Sequence[float]: The increasing knots. Defaults to DEFAULT_KNOTS.
+
+    Returns:
+      npt.NDArray[np.float64]: The segments of shape (N, len(knots) + 1)
+    """
+    T = np.asarray(temperatures, dtype=np.float64).reshape(-1, 1)
+    k = np.asarray(knots, dtype=np.float64)
+    if k.ndim != 1 or len(k) == 0 or np.any(np.diff(k) <= 0):
+        raise ValueError("knots must be a non-empty increasing sequence")
+    segments = np.empty((len(T), len(k) + 1))
+    segments[:, :1] = np.minimum(T, k[0])
+    segments[:, 1:-1] = np.clip(T - k[:-1], 0.0, np.diff(k))
+    segments[:, -1:] = np.maximum(T - k[-1], 0.0)
+    return segments
+
+
+class TOWTModelFunction:
+    """The TOWT model. Like MandVParameterModelFunction it describes a model and leaves the fitting to an estimator,
+    `mandvmodeling.core.estimator.TOWTEstimator`.
+
+    Attributes:
+        name (str): "TOWT".
+        knots (Tuple[float, ...]): The temperature knots.
+        occupancy (Optional[npt.NDArray[np.bool_]]): Occupied hours of the week, of shape (168,), or None to use one
+            set of temperature coefficients for all hours.
+    """
+
+    name = "TOWT"
+
+    def __init__(
+        self,
+        knots: Sequence[float] = DEFAULT_KNOTS,
+        occupancy: Optional[npt.ArrayLike] = None,
+    ):
+        self.knots = tuple(float(k) for k in knots)
+        # validate the knots
+        temperature_segments(np.zeros(0), self.knots)
+        if occupancy is not None:
+            occupancy = np.asarray(occupancy, dtype=bool)
+            if occupancy.shape != (HOURS_PER_WEEK,):
+                raise ValueError(
+                    "occupancy must have one value per hour of the week (168)"
+                )
+        self.occupancy = occupancy
+
+    @property
+    def n_segments(self) -> int:
+        return len(self.knots) + 1
+
+    @property
+    def n_params(self) -> int:
+        return HOURS_PER_WEEK + self.n_segments * (1 if self.occupancy is None else 2)
+
+    def design_matrix(
+        self, X: npt.ArrayLike, sensor_reading_timestamps: npt.ArrayLike
+    ) -> sparse.csr_matrix:
+        """
+        Builds the sparse design matrix. Its first 168 columns are the time-of-week indicators, followed by the
+        temperature segments (of the occupied hours first, then the unoccupied hours, with an occupancy schedule).
+
+        Args:
+          X: npt.ArrayLike: The temperatures of shape (N,) or (N, 1)
+          sensor_reading_timestamps: npt.ArrayLike: The timestamps of shape (N,)
+
+        Returns:
+          sparse.csr_matrix: The design matrix of shape (N, n_params)
+        """
+        segments = temperature_segments(X, self.knots)
+        tow = time_of_week(sensor_reading_timestamps)
+        n, s = segments.shape
+        if len(tow) != n:
+            raise ValueError("X and sensor_reading_timestamps must have the same len")
+
+        offset = np.full(n, HOURS_PER_WEEK, dtype=np.intp)
+        if self.occupancy is not None:
+            offset[~self.occupancy[tow]] += s
+
+        # every row holds its indicator and its s segments, with the column indices in increasing order
+        indices = np.empty((n, 1 + s), dtype=np.intp)
+        indices[:, 0] = tow
+        indices[:, 1:] = offset[:, None] + np.arange(s)
+        data = np.empty((n, 1 + s))
+        data[:, 0] = 1.0
+        data[:, 1:] = segments
+        indptr = np.arange(0, n * (1 + s) + 1, 1 + s, dtype=np.intp)
+        return sparse.csr_matrix(
+            (data.reshape(-1), indices.reshape(-1), indptr), shape=(n, self.n_params)
+        )
+
+    def split_coefficients(
+        self, coeffs: npt.ArrayLike
+    ) -> Tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+        """
+        Splits coefficients into the 168 time-of-week coefficients and the temperature coefficients, of shape
+        (n_segments,) or (2, n_segments) for the occupied and unoccupied hours.
+
+        Args:
+          coeffs: npt.ArrayLike: The coefficients of shape (n_params,)
+
+        Returns:
+          Tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]: The time-of-week and temperature coefficients
+        """
+        coeffs = np.asarray(coeffs, dtype=np.float64)
+        temperature = coeffs[HOURS_PER_WEEK:]
+        if self.occupancy is not None:
+            temperature = temperature.reshape(2, self.n_segments)
+        return coeffs[:HOURS_PER_WEEK], temperature
+
+    def __repr__(self) -> str:
+        return "TOWTModelFunction(knots={}, occupancy={})".format(
+            self.knots, "None" if self.occupancy is None else "schedule"
+        )
@@ -0,0 +1,340 @@
+"""Readers for files of meter readings.
+
+Three formats are supported:
+
+- CSV and Parquet files in long format with one reading per row. The columns are named by `ReaderColumns`. Without a
+  meter column, the whole file is one meter named after the file.
+- JSON files in the format of the test fixtures, `{"X": [...], "y": [...], "Date": [...]}`, with one meter per file
+  named after the file.
+
+`read_meter_file` reads a whole file into memory, so its rows can be in any order. `stream_meter_file` reads a file
+sorted by meter in batches of rows and holds only the readings of the current meter, so memory stays bounded for
+files much larger than RAM. Both yield (meter id, MandVDataModel) pairs and compose with `split_day_types` and
+`mandvmodeling.core.selection.fit_stream` as a generator pipeline:
+
+    meters = split_day_types(stream_meter_file("portfolio.csv"))
+    for meter_id, est in fit_stream(meters, model="auto"):
+        ...
+
+Parquet files require the optional pyarrow dependency.
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+import csv
+import itertools
+import json
+import numpy as np
+import numpy.typing as npt
+from .schemas import MandVDataModel
+
+SUFFIXES = (".csv", ".parquet", ".json")
+
+PathLike = Union[str, Path]
+
+# meter ids, dates, X and y of a batch of rows
+Batch = Tuple[npt.NDArray, npt.NDArray, npt.NDArray, npt.NDArray]
+
+
+@dataclass(frozen=True)
+class ReaderColumns:
+    """The column names of long format files.
+
+    Attributes:
+        meter (str): The meter id. Defaults to "meter_id".
+        date (str): The date of the reading. Defaults to "date".
+        X (str): The temperature. Defaults to "X".
+        y (str): The usage. Defaults to "y".
+    """
+
+    meter: str = "meter_id"
+    date: str = "date"
+    X: str = "X"
+    y: str = "y"
+
+
+def find_meter_files(path: PathLike) -> List[Path]:
+    """
+    Lists the meter files in a directory, sorted by name, or returns a single file.
+
+    Args:
+      path: PathLike: A file or a directory
+
+    Returns:
+      List[Path]: The files with one of the supported suffixes
+    """
+    path = Path(path)
+    if path.is_dir():
+        return sorted(p for p in path.iterdir() if p.suffix.lower() in SUFFIXES)
+    if not path.exists():
+        raise FileNotFoundError(path)
+    if path.suffix.lower() not in SUFFIXES:
+        raise ValueError(
+            "Unsupported file type {}. Must be one of {}".format(path.suffix, SUFFIXES)
+        )
+    return [path]
+
+
+def make_data_model(
+    X: npt.ArrayLike, y: npt.ArrayLike, dates: npt.ArrayLike
+) -> MandVDataModel:
+    """
+    Builds a MandVDataModel from readings.
+
+    Args:
+      X: npt.ArrayLike: The temperatures
+      y: npt.ArrayLike: The usage
+      dates: npt.ArrayLike: The dates or timestamps of the readings. Their resolution is kept, so readings within a
+        day stay distinct.
+
+    Returns:
+      MandVDataModel: The data model
+    """
+    return MandVDataModel(
+        X=np.asarray(X, dtype=np.float64),
+        y=np.asarray(y, dtype=np.float64),
+        sensor_reading_timestamps=np.asarray(dates, dtype="datetime64"),
+    )
+
+
+def _read_json(path: Path) -> Iterator[Tuple[str, MandVDataModel]]:
+    with open(path, "r") as f:
+        data = json.load(f)
+    yield path.stem, make_data_model(data["X"], data["y"], data["Date"])
+
+
+def _read_csv(
+    path: Path, columns: ReaderColumns
+) -> Iterator[Tuple[str, MandVDataModel]]:
+    meters: Dict[str, Tuple[List[str], List[str], List[str]]] = {}
+    with open(path, "r", newline="") as f:
+        for row in csv.DictReader(f):
+            X, y, dates = meters.setdefault(
+                row.get(columns.meter) or path.stem, ([], [], [])
+            )
+            X.append(row[columns.X])
+            y.append(row[columns.y])
+            dates.append(row[columns.date])
+    for meter_id, (X, y, dates) in meters.items():
+        yield meter_id, make_data_model(X, y, dates)
+
+
+def _import_parquet() -> Any:
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Reading Parquet files requires pyarrow.") from None
+    return pq
+
+
+def _read_parquet(
+    path: Path, columns: ReaderColumns
+) -> Iterator[Tuple[str, MandVDataModel]]:
+    pq = _import_parquet()
+    names = pq.read_schema(path).names
+    table = pq.read_table(
+        path,
+        columns=[
+            c for c in (columns.meter, columns.date, columns.X, columns.y) if c in names
+        ],
+    )
+    X = table.column(columns.X).to_numpy()
+    y = table.column(columns.y).to_numpy()
+    dates = table.column(columns.date).to_numpy()
+    if columns.meter not in names:
+        yield path.stem, make_data_model(X, y, dates)
+        return
+
+    meter_ids = table.column(columns.meter).to_numpy().astype(str)
+    unique, first, inverse = np.unique(
+        meter_ids, return_index=True, return_inverse=True
+    )
+    # in the order the meters first appear in the file
+    for i in np.argsort(first):
+        rows = inverse == i
+        yield unique[i], make_data_model(X[rows], y[rows], dates[rows])
+
+
+def read_meter_file(
+    path: PathLike, columns: ReaderColumns = ReaderColumns()
+) -> Iterator[Tuple[str, MandVDataModel]]:
+    """
+    Reads the meters in a file.
+
+    Args:
+      path: PathLike: A CSV, Parquet or JSON file
+      columns: ReaderColumns: The column names of CSV and Parquet files. Defaults to ReaderColumns().
+
+    Yields:
+      Tuple[str, MandVDataModel]: The meter id and its data
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix == ".json":
+        return _read_json(path)
+    if suffix == ".csv":
+        return _read_csv(path, columns)
+    if suffix == ".parquet":
+        return _read_parquet(path, columns)
+    raise ValueError(
+        "Unsupported file type {}. Must be one of {}".format(path.suffix, SUFFIXES)
+    )
+
+
+def _csv_batches(
+    path: Path, columns: ReaderColumns, batch_size: int
+) -> Iterator[Batch]:
+    with open(path, "r", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        date, X, y = (header.index(c) for c in (columns.date, columns.X, columns.y))
+        meter = header.index(columns.meter) if columns.meter in header else None
+        while True:
+            rows = list(itertools.islice(reader, batch_size))
+            if not rows:
+                return
+            cols = list(zip(*rows))
+            yield (
+                np.asarray(cols[meter])
+                if meter is not None
+                else np.full(len(rows), path.stem),
+                np.asarray(cols[date]),
+                np.asarray(cols[X], dtype=np.float64),
+                np.asarray(cols[y], dtype=np.float64),
+            )
+
+
+def _parquet_batches(
+    path: Path, columns: ReaderColumns, batch_size: int
+) -> Iterator[Batch]:
+    pq = _import_parquet()
+    parquet = pq.ParquetFile(path)
+    has_meter = columns.meter in parquet.schema_arrow.names
+    names = [columns.date, columns.X, columns.y] + (
+        [columns.meter] if has_meter else []
+    )
+    for batch in parquet.iter_batches(batch_size=batch_size, columns=names):
+        date, X, y = (batch.column(i).to_numpy(zero_copy_only=False) for i in range(3))
+        meter = (
+            batch.column(3).to_numpy(zero_copy_only=False).astype(str)
+            if has_meter
+            else np.full(len(X), path.stem)
+        )
+        yield meter, date, X, y
+
+
+def _group_sorted(batches: Iterable[Batch]) -> Iterator[Tuple[str, MandVDataModel]]:
+    current: Optional[str] = None
+    chunks: List[Tuple[npt.NDArray, npt.NDArray, npt.NDArray]] = []
+    seen: Set[str] = set()
+
+    def flush() -> Tuple[str, MandVDataModel]:
+        dates, X, y = (np.concatenate(c) for c in zip(*chunks))
+        return current, make_data_model(X, y, dates)
+
+    for meter_ids, dates, X, y in batches:
+        meter_ids = np.asarray(meter_ids).astype(str)
+        # the rows where a new run of meter ids starts
+        starts = np.flatnonzero(np.r_[True, meter_ids[1:] != meter_ids[:-1]])
+        ends = np.r_[starts[1:], len(meter_ids)]
+        for start, end in zip(starts, ends):
+            meter_id = str(meter_ids[start])
+            if meter_id != current:
+                if current is not None:
+                    yield flush()
+                if meter_id in seen:
+                    raise ValueError(
+                        "The file is not sorted by meter: {} appears twice.".format(
+                            meter_id
+                        )
+                    )
+                seen.add(meter_id)
+                current = meter_id
+                chunks = []
+            chunks.append((dates[start:end], X[start:end], y[start:end]))
+
+    if current is not None:
+        yield flush()
+
+
+def stream_meter_file(
+    path: PathLike, columns: ReaderColumns = ReaderColumns(), batch_size: int = 65536
+) -> Iterator[Tuple[str, MandVDataModel]]:
+    """
+    Streams the meters of a CSV or Parquet file sorted by meter, holding at most one batch of rows and the readings
+    of the current meter in memory.
+
+    Args:
+      path: PathLike: A CSV or Parquet file with the rows of each meter next to each other
+      columns: ReaderColumns: The column names. Defaults to ReaderColumns().
+      batch_size: int: The number of rows read at a time. Defaults to 65536.
+
+    Raises:
+      ValueError: If the rows of a meter are not next to each other
+
+    Yields:
+      Tuple[str, MandVDataModel]: The meter id and its data
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix == ".csv":
+        return _group_sorted(_csv_batches(path, columns, batch_size))
+    if suffix == ".parquet":
+        return _group_sorted(_parquet_batches(path, columns, batch_size))
+    if suffix == ".json":
+        return _read_json(path)
+    raise ValueError(
+        "Unsupported file type {}. Must be one of {}".format(path.suffix, SUFFIXES)
+    )
+
+
+def weekday_weekend(dates: npt.NDArray[np.datetime64]) -> npt.NDArray[np.str_]:
+    """
+    Labels dates as "weekday" or "weekend".
+
+    Args:
+      dates: npt.NDArray[np.datetime64]: The dates
+
+    Returns:
+      npt.NDArray[np.str_]: The day types
+    """
+    return np.where(np.is_busday(dates.astype("datetime64[D]")), "weekday", "weekend")
+
+
+def split_day_types(
+    meters: Iterable[Tuple[str, MandVDataModel]],
+    day_type: Callable[[npt.NDArray[np.datetime64]], npt.NDArray] = weekday_weekend,
+) -> Iterator[Tuple[str, MandVDataModel]]:
+    """
+    Splits the data of every meter by day type. Each day type is yielded as its own meter with the id
+    "{meter id}/{day type}".
+
+    Args:
+      meters: Iterable[Tuple[str, MandVDataModel]]: Meter ids and data, such as from `stream_meter_file`
+      day_type: Callable[[npt.NDArray[np.datetime64]], npt.NDArray]: Labels the dates. Defaults to weekday_weekend.
+
+    Yields:
+      Tuple[str, MandVDataModel]: The meter and day type id and its data
+    """
+    for meter_id, data in meters:
+        dates = data.sensor_reading_timestamps.reshape(-1)
+        labels = np.asarray(day_type(dates))
+        X = data.X.reshape(-1)
+        for label in np.unique(labels):
+            rows = labels == label
+            yield (
+                "{}/{}".format(meter_id, label),
+                make_data_model(X[rows], data.y[rows], dates[rows]),
+            )
@@ -0,0 +1,374 @@
+"""Compact fit results and a memory-mappable store of them.
+
+`FitResult` holds the outcome of one fit (the scores, coefficients and covariance, and optionally the training data)
+in a few arrays. It pickles far more cheaply than a fitted MandVEnergyChangepointEstimator, which also holds a nested
+MandVCurvefitEstimator, the data model and its predictions, so it is what the parallel APIs return from worker
+processes. `FitResult.to_estimator` rebuilds the estimator when the training data was kept.
+
+Keeping a fitted estimator per meter to read a few coefficients later is expensive for large portfolios. A result
+store keeps one fixed-size record per meter instead, with the meter id, the model name and fit status, the
+coefficients and their covariance (padded with NaN to 5 and 5 x 5) and the scores of
+`mandvmodeling.core.diagnostics.score_estimators`.
+
+The store is a regular `.npy` file of a structured array. `ResultWriter` appends records in bulk and rewrites the
+array shape in the header after every append. The header is written with a fixed size so that it never has to move.
+`open_results` (or `np.load(path, mmap_mode="r")`) maps the file without reading it, so columns can be queried
+without loading the whole store:
+
+    results = open_results("results.npy")
+    passing = results[results["r2"] > 0.75]["meter_id"]
+"""
+
+from pathlib import Path
+from typing import BinaryIO, Optional, Sequence, Tuple, Union
+import ast
+import numpy as np
+import numpy.typing as npt
+from .calc import checks
+from .diagnostics import SCORE_FIELDS, score_estimators
+from .estimator import (
+    FitStatus,
+    MandVCurvefitEstimator,
+    MandVEnergyChangepointEstimator,
+)
+from .pmodels import MandVParameterModelFunction, get_model_function
+from .schemas import MandVDataModel
+
+PathLike = Union[str, Path]
+
+MAX_PARAMS = 5
+NO_MODEL_PASSED = "no_model_passed"
+
+# the .npy header is padded to this many bytes so the shape can be rewritten in place
+_HEADER_SIZE = 4096
+_MAGIC = b"\x93NUMPY\x02\x00"
+
+
+class FitResult:
+    """The outcome of one fit without the estimator.
+
+    Attributes:
+        scores (np.void): A row of `mandvmodeling.core.diagnostics.score_estimators`, with the name, status, n,
+            n_params, r2, adjusted_r2, rmse, cvrmse, tstats, dpop, shape and totals.
+        coeffs (npt.NDArray[np.float64]): The coefficients.
+        pcov (npt.NDArray[np.float64]): The coefficient covariance.
+        fit_check (checks.FittabilityCheck): The result of the pre-fit check.
+        X (Optional[npt.NDArray[np.float64]]): The training X sorted ascending, if kept.
+        y (Optional[npt.NDArray[np.float64]]): The training y, if kept.
+        sensor_reading_timestamps (Optional[npt.NDArray[np.datetime64]]): The training timestamps, if kept.
+        sigma (Optional[npt.NDArray[np.float64]]): The sigma passed to fit, if kept.
+        absolute_sigma (bool): The absolute_sigma passed to fit.
+    """
+
+    __slots__ = (
+        "scores",
+        "coeffs",
+        "pcov",
+        "fit_check",
+        "X",
+        "y",
+        "sensor_reading_timestamps",
+        "sigma",
+        "absolute_sigma",
+    )
+
+    def __init__(
+        self,
+        scores: np.void,
+        coeffs: npt.NDArray[np.float64],
+        pcov: npt.NDArray[np.float64],
+        fit_check: checks.FittabilityCheck = checks.FITTABLE,
+        X: Optional[npt.NDArray[np.float64]] = None,
+        y: Optional[npt.NDArray[np.float64]] = None,
+        sensor_reading_timestamps: Optional[npt.NDArray[np.datetime64]] = None,
+        sigma: Optional[npt.NDArray[np.float64]] = None,
+        absolute_sigma: bool = False,
+    ):
+        self.scores = scores
+        self.coeffs = coeffs
+        self.pcov = pcov
+        self.fit_check = fit_check
+        self.X = X
+        self.y = y
+        self.sensor_reading_timestamps = sensor_reading_timestamps
+        self.sigma = sigma
+        self.absolute_sigma = absolute_sigma
+
+    @classmethod
+    def from_estimator(
+        cls, est: MandVEnergyChangepointEstimator, keep_data: bool = False
+    ) -> "FitResult":
+        """
+        Takes the result of a fitted estimator.
+
+        Args:
+          est: MandVEnergyChangepointEstimator: A fitted estimator
+          keep_data: bool: Keep references to the training data, which `to_estimator` needs. Defaults to False.
+
+        Returns:
+          FitResult: The result
+        """
+        data = {}
+        if keep_data:
+            data = dict(
+                X=est.X_,
+                y=est.y_,
+                sensor_reading_timestamps=est.sensor_reading_timestamps,
+                sigma=est.sigma_,
+                absolute_sigma=est.absolute_sigma_,
+            )
+        return cls(
+            score_estimators([est])[0],
+            np.asarray(est.coeffs, dtype=np.float64),
+            np.asarray(est.cov, dtype=np.float64),
+            fit_check=est.fit_check,
+            **data,
+        )
+
+    @property
+    def name(self) -> str:
+        return str(self.scores["name"])
+
+    @property
+    def status(self) -> FitStatus:
+        return FitStatus(self.scores["status"])
+
+    @property
+    def has_data(self) -> bool:
+        return self.X is not None
+
+    def to_estimator(
+        self, model: Optional[MandVParameterModelFunction] = None
+    ) -> MandVEnergyChangepointEstimator:
+        """
+        Rebuilds a fitted estimator from the result without refitting. Needs the training data.
+
+        Args:
+          model: Optional[MandVParameterModelFunction]: The model that was fit. Defaults to the built-in model of the
+            same name with the default bounds.
+
+        Raises:
+          ValueError: If the training data was not kept
+
+        Returns:
+          MandVEnergyChangepointEstimator: The fitted estimator
+        """
+        if not self.has_data:
+            raise ValueError(
+                "The training data was not kept. Use FitResult.from_estimator(est, keep_data=True)."
+            )
+        if model is None:
+            model = get_model_function(self.name)
+
+        curvefit = MandVCurvefitEstimator(
+            model_func=model.f, bounds=model.bounds, p0=model.initial_guesses
+        )
+        curvefit.X_ = self.X
+        curvefit.y_ = self.y
+        curvefit.popt_ = self.coeffs.copy()
+        curvefit.pcov_ = self.pcov.copy()
+        curvefit.name_ = model.f.__name__
+        curvefit.fit_status_ = self.status
+        curvefit.fit_check_ = self.fit_check
+        curvefit.nfev_ = None
+
+        data_model = MandVDataModel(
+            X=self.X,
+            y=self.y,
+            sensor_reading_timestamps=self.sensor_reading_timestamps,
+            sigma=self.sigma,
+        )
+        return MandVEnergyChangepointEstimator(model)._set_fitted(
+            data_model, curvefit, self.sigma, self.absolute_sigma
+        )
+
+
+def result_dtype(meter_id_length: int = 64) -> np.dtype:
+    """
+    Returns the dtype of the records of a result store.
+
+    Args:
+      meter_id_length: int: The maximum length of the meter ids. Defaults to 64.
+
+    Returns:
+      np.dtype: The structured dtype
+    """
+    return np.dtype(
+        [
+            ("meter_id", "U{}".format(meter_id_length)),
+            ("name", "U8"),
+            ("status", "U16"),
+            ("coeffs", np.float64, (MAX_PARAMS,)),
+            ("pcov", np.float64, (MAX_PARAMS, MAX_PARAMS)),
+        ]
+        + SCORE_FIELDS
+    )
+
+
+def result_records(
+    meter_ids: Sequence[str],
+    estimators: Sequence[Union[MandVEnergyChangepointEstimator, FitResult, None]],
+    meter_id_length: int = 64,
+) -> npt.NDArray[np.void]:
+    """
+    Converts fitted estimators or FitResults to result records. A result of None, such as when no model passed
+    `select_model`, gets the status "no_model_passed" and NaN values.
+
+    Args:
+      meter_ids: Sequence[str]: The meter ids
+      estimators: Sequence[Union[MandVEnergyChangepointEstimator, FitResult, None]]: Fitted estimators,
+        FitResults or None
+      meter_id_length: int: The maximum length of the meter ids. Defaults to 64.
+
+    Raises:
+      ValueError: If the lengths differ or a meter id is too long
+
+    Returns:
+      npt.NDArray[np.void]: The records
+    """
+    if len(meter_ids) != len(estimators):
+        raise ValueError("meter_ids and estimators must have the same length")
+    for meter_id in meter_ids:
+        if len(meter_id) > meter_id_length:
+            raise ValueError(
+                "meter id {} is longer than {} characters".format(
+                    meter_id, meter_id_length
+                )
+            )
+
+    out = np.zeros(len(meter_ids), dtype=result_dtype(meter_id_length))
+    out["meter_id"] = meter_ids
+    out["status"] = NO_MODEL_PASSED
+    for field, dtype in SCORE_FIELDS:
+        if np.issubdtype(dtype, np.floating):
+            out[field] = np.nan
+    out["heating_points"] = out["cooling_points"] = -1
+    out["coeffs"] = np.nan
+    out["pcov"] = np.nan
+
+    for i, result in enumerate(estimators):
+        if result is None:
+            continue
+        if not isinstance(result, FitResult):
+            result = FitResult.from_estimator(result)
+        for name in result.scores.dtype.names:
+            out[name][i] = result.scores[name]
+        p = len(result.coeffs)
+        out["coeffs"][i, :p] = result.coeffs
+        out["pcov"][i, :p, :p] = result.pcov
+    return out
+
+
+def _header(dtype: np.dtype, n: int) -> bytes:
+    header = repr(
+        {
+            "descr": np.lib.format.dtype_to_descr(dtype),
+            "fortran_order": False,
+            "shape": (n,),
+        }
+    ).encode("latin1")
+    body_size = _HEADER_SIZE - len(_MAGIC) - 4
+    if len(header) + 1 > body_size:
+        raise ValueError("The dtype is too large for the result store header")
+    return (
+        _MAGIC + body_size.to_bytes(4, "little") + header.ljust(body_size - 1) + b"\n"
+    )
+
+
+def _read_header(f: BinaryIO) -> Tuple[np.dtype, int]:
+    if f.read(len(_MAGIC)) != _MAGIC:
+        raise ValueError("Not a result store")
+    body_size = int.from_bytes(f.read(4), "little")
+    header = ast.literal_eval(f.read(body_size).decode("latin1"))
+    return np.lib.format.descr_to_dtype(header["descr"]), header["shape"][0]
+
+
+class ResultWriter:
+    """Appends records to a result store. Use as a context manager, or call `close`.
+
+    Attributes:
+        path (Path): The store.
+        dtype (np.dtype): The dtype of the records.
+        n (int): The number of records in the store.
+    """
+
+    def __init__(self, path: PathLike, meter_id_length: int = 64, append: bool = False):
+        """
+        Opens a result store for writing.
+
+        Args:
+          path: PathLike: The store, conventionally a .npy file
+          meter_id_length: int: The maximum length of the meter ids of a new store. Defaults to 64.
+          append: bool: Append to an existing store rather than overwrite it. Defaults to False.
+        """
+        self.path = Path(path)
+        if append and self.path.exists():
+            self._f = open(self.path, "r+b")
+            self.dtype, self.n = _read_header(self._f)
+            # drop any records written after the last header update
+            self._f.truncate(_HEADER_SIZE + self.n * self.dtype.itemsize)
+        else:
+            self._f = open(self.path, "w+b")
+            self.dtype, self.n = result_dtype(meter_id_length), 0
+            self._f.write(_header(self.dtype, 0))
+        self._f.seek(0, 2)
+
+    def append(self, records: npt.NDArray[np.void]) -> None:
+        """
+        Appends records, such as from `result_records`, and updates the header.
+
+        Args:
+          records: npt.NDArray[np.void]: The records
+        """
+        records = np.ascontiguousarray(records, dtype=self.dtype)
+        self._f.seek(0, 2)
+        self._f.write(records.tobytes())
+        self._f.flush()
+        self.n += len(records)
+        self._f.seek(0)
+        self._f.write(_header(self.dtype, self.n))
+        self._f.flush()
+
+    def write(
+        self,
+        meter_ids: Sequence[str],
+        estimators: Sequence[Union[MandVEnergyChangepointEstimator, FitResult, None]],
+    ) -> None:
+        """
+        Appends the results of fitted estimators or FitResults.
+
+        Args:
+          meter_ids: Sequence[str]: The meter ids
+          estimators: Sequence[Union[MandVEnergyChangepointEstimator, FitResult, None]]: Fitted estimators,
+            FitResults or None
+        """
+        self.append(
+            result_records(
+                meter_ids,
+                estimators,
+                meter_id_length=self.dtype["meter_id"].itemsize // 4,
+            )
+        )
+
+    def close(self) -> None:
+        self._f.close()
+
+    def __enter__(self) -> "ResultWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def open_results(path: PathLike, mode: str = "r") -> np.memmap:
+    """
+    Memory maps a result store.
+
+    Args:
+      path: PathLike: The store
+      mode: str: The memmap mode. Defaults to "r".
+
+    Returns:
+      np.memmap: The records
+    """
+    return np.load(path, mmap_mode=mode)
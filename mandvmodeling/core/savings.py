@@ -0,0 +1,263 @@
+"""Adjusted and normalized savings for many pre and post retrofit pairs at once.
+
+`changepointmodel.core.savings` computes the savings of one pair at a time and re-predicts and revalidates each
+estimator on every call. `batch_savings` instead stacks the coefficients of every fit as 5P coefficients (see
+`mandvmodeling.core.calc.piecewise.canonical_coefficients`) and concatenates the data of every building, so the
+predictions and sums for the whole portfolio are computed in a few array operations.
+
+The uncertainties follow ASHRAE Guideline 14 without an autocorrelation correction. For a baseline with n points,
+p coefficients and a cvrmse of CV, predicted over m points with a total of E:
+
+    U = t(1 - (1 - confidence) / 2, n - p) * 1.26 * CV * E * sqrt((1 + 2 / n) / m)
+
+The adjusted savings use the pre retrofit model over the post retrofit period. The normalized savings combine the
+uncertainties of the pre and post retrofit models over the normalized period as sqrt(U_pre ** 2 + U_post ** 2).
+"""
+
+from dataclasses import dataclass
+from typing import Optional, Sequence, Union
+import numpy as np
+import numpy.typing as npt
+from scipy import stats
+from changepointmodel.core.nptypes import OneDimNDArray
+from .calc import kernels, piecewise
+from .estimator import MandVEnergyChangepointEstimator
+
+SAVINGS_FIELDS = [
+    ("adjusted_total_savings", np.float64),
+    ("adjusted_average_savings", np.float64),
+    ("adjusted_percent_savings", np.float64),
+    ("adjusted_savings_uncertainty", np.float64),
+    ("adjusted_percent_savings_uncertainty", np.float64),
+    ("normalized_total_savings", np.float64),
+    ("normalized_average_savings", np.float64),
+    ("normalized_percent_savings", np.float64),
+    ("normalized_savings_uncertainty", np.float64),
+    ("normalized_percent_savings_uncertainty", np.float64),
+]
+
+
+def stack_coefficients(
+    estimators: Sequence[MandVEnergyChangepointEstimator],
+) -> npt.NDArray[np.float64]:
+    """
+    Stacks the coefficients of fitted estimators of the built-in changepoint models as 5P coefficients.
+
+    Args:
+      estimators: Sequence[MandVEnergyChangepointEstimator]: Fitted estimators
+
+    Returns:
+      npt.NDArray[np.float64]: An M x 5 array of 5P coefficients
+    """
+    return np.array(
+        [
+            piecewise.canonical_coefficients(
+                piecewise.model_kind(est.model.f), est.coeffs
+            )
+            for est in estimators
+        ]
+    ).reshape(-1, 5)
+
+
+@dataclass(frozen=True)
+class CompactFits:
+    """The coefficients, statistics and data of M fitted estimators stacked into arrays.
+
+    Attributes:
+        coefficients (npt.NDArray[np.float64]): An M x 5 array of 5P coefficients (yint, ls, rs, lcp, rcp).
+        n (OneDimNDArray[np.int64]): The number of points of every fit.
+        n_params (OneDimNDArray[np.int64]): The number of coefficients of every model.
+        cvrmse (OneDimNDArray[np.float64]): The cvrmse of every fit.
+        X (OneDimNDArray[np.float64]): The X of every fit, concatenated.
+        y (OneDimNDArray[np.float64]): The y of every fit, concatenated.
+    """
+
+    coefficients: npt.NDArray[np.float64]
+    n: OneDimNDArray[np.int64]
+    n_params: OneDimNDArray[np.int64]
+    cvrmse: OneDimNDArray[np.float64]
+    X: OneDimNDArray[np.float64]
+    y: OneDimNDArray[np.float64]
+
+    def __post_init__(self) -> None:
+        m = len(self.coefficients)
+        if self.coefficients.shape != (m, 5):
+            raise ValueError("coefficients must be an M x 5 array")
+        for name in ("n", "n_params", "cvrmse"):
+            if len(getattr(self, name)) != m:
+                raise ValueError("{} must have one value per fit".format(name))
+        if len(self.X) != np.sum(self.n) or len(self.y) != len(self.X):
+            raise ValueError("X and y must have n points per fit")
+
+    def __len__(self) -> int:
+        return len(self.coefficients)
+
+    @classmethod
+    def from_estimators(
+        cls, estimators: Sequence[MandVEnergyChangepointEstimator]
+    ) -> "CompactFits":
+        """
+        Stacks fitted estimators of the built-in changepoint models.
+
+        Args:
+          estimators: Sequence[MandVEnergyChangepointEstimator]: Fitted estimators
+
+        Returns:
+          CompactFits: The stacked fits
+        """
+        return cls(
+            coefficients=stack_coefficients(estimators),
+            n=np.array([est.statistics.n for est in estimators], dtype=np.int64),
+            n_params=np.array(
+                [est.statistics.n_params for est in estimators], dtype=np.int64
+            ),
+            cvrmse=np.array([est.statistics.cvrmse for est in estimators]),
+            X=np.concatenate([est.X.reshape(-1) for est in estimators] or [[]]),
+            y=np.concatenate([est.y for est in estimators] or [[]]),
+        )
+
+
+def predict(
+    coefficients: npt.NDArray[np.float64], X: OneDimNDArray[np.float64]
+) -> npt.NDArray[np.float64]:
+    """
+    Predicts the same X with every row of 5P coefficients.
+
+    Args:
+      coefficients: npt.NDArray[np.float64]: An M x 5 array of 5P coefficients
+      X: OneDimNDArray[np.float64]: The X to predict
+
+    Returns:
+      npt.NDArray[np.float64]: An M x N array of predictions
+    """
+    return kernels.fivep(X, *coefficients.T)
+
+
+def predict_segments(
+    coefficients: npt.NDArray[np.float64],
+    X: OneDimNDArray[np.float64],
+    lengths: OneDimNDArray[np.int64],
+) -> OneDimNDArray[np.float64]:
+    """
+    Predicts concatenated segments of X, where the i-th segment of `lengths[i]` points is predicted by the i-th row
+    of 5P coefficients.
+
+    Args:
+      coefficients: npt.NDArray[np.float64]: An M x 5 array of 5P coefficients
+      X: OneDimNDArray[np.float64]: The concatenated X of every segment
+      lengths: OneDimNDArray[np.int64]: The number of points in every segment
+
+    Returns:
+      OneDimNDArray[np.float64]: The concatenated predictions
+    """
+    # a column of X lines up every point with its own row of coefficients
+    return kernels.fivep(
+        np.reshape(X, (-1, 1)), *np.repeat(coefficients, lengths, axis=0).T
+    ).reshape(-1)
+
+
+def _segment_sums(
+    values: OneDimNDArray[np.float64], lengths: OneDimNDArray[np.int64]
+) -> OneDimNDArray[np.float64]:
+    segments = np.repeat(np.arange(len(lengths)), lengths)
+    return np.bincount(segments, weights=values, minlength=len(lengths))
+
+
+def _uncertainty(
+    fits: CompactFits,
+    total: OneDimNDArray[np.float64],
+    m: OneDimNDArray[np.int64],
+    confidence: float,
+) -> OneDimNDArray[np.float64]:
+    t = stats.t.ppf(1 - (1 - confidence) / 2, fits.n - fits.n_params)
+    return t * 1.26 * fits.cvrmse * np.abs(total) * np.sqrt((1 + 2 / fits.n) / m)
+
+
+def batch_savings(
+    pre: Union[CompactFits, Sequence[MandVEnergyChangepointEstimator]],
+    post: Union[CompactFits, Sequence[MandVEnergyChangepointEstimator]],
+    norms: Optional[
+        Union[OneDimNDArray[np.float64], Sequence[OneDimNDArray[np.float64]]]
+    ] = None,
+    confidence: float = 0.8,
+) -> npt.NDArray[np.void]:
+    """
+    Computes the savings of every pre and post retrofit pair. Pairs with NaN coefficients (e.g. an estimator that was
+    not fittable) get NaN savings.
+
+    Percent savings are the savings as a percentage of the pre retrofit (baseline) total. Percent savings
+    uncertainties are the uncertainties as a percentage of the savings.
+
+    Args:
+      pre: Union[CompactFits, Sequence[MandVEnergyChangepointEstimator]]: The fitted pre retrofit estimators or
+        their CompactFits
+      post: Union[CompactFits, Sequence[MandVEnergyChangepointEstimator]]: The fitted post retrofit estimators or
+        their CompactFits, in the same order as pre
+      norms: Optional[Union[OneDimNDArray[np.float64], Sequence[OneDimNDArray[np.float64]]]]: The normalized X,
+        either one array shared by every pair or one array per pair. The normalized savings are NaN without it.
+        Defaults to None.
+      confidence: float: The confidence level of the uncertainties. Defaults to 0.8.
+
+    Returns:
+      npt.NDArray[np.void]: A structured array with one row per pair and the columns in SAVINGS_FIELDS
+    """
+    if not 0 < confidence < 1:
+        raise ValueError("confidence must be between 0 and 1")
+    if not isinstance(pre, CompactFits):
+        pre = CompactFits.from_estimators(pre)
+    if not isinstance(post, CompactFits):
+        post = CompactFits.from_estimators(post)
+    if len(pre) != len(post):
+        raise ValueError("pre and post must have the same number of fits")
+
+    out = np.full(len(pre), np.nan, dtype=np.dtype(SAVINGS_FIELDS))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        adjusted_baseline = _segment_sums(
+            predict_segments(pre.coefficients, post.X, post.n), post.n
+        )
+        total = adjusted_baseline - _segment_sums(post.y, post.n)
+        uncertainty = _uncertainty(pre, adjusted_baseline, post.n, confidence)
+        out["adjusted_total_savings"] = total
+        out["adjusted_average_savings"] = total / post.n
+        out["adjusted_percent_savings"] = 100 * total / adjusted_baseline
+        out["adjusted_savings_uncertainty"] = uncertainty
+        out["adjusted_percent_savings_uncertainty"] = 100 * uncertainty / np.abs(total)
+
+        if norms is None:
+            return out
+
+        if isinstance(norms, np.ndarray):
+            # one shared array: broadcast every model against it
+            X_norm = norms.reshape(-1).astype(np.float64)
+            lengths = np.full(len(pre), len(X_norm), dtype=np.int64)
+            normalized_pre = predict(pre.coefficients, X_norm).sum(axis=1)
+            normalized_post = predict(post.coefficients, X_norm).sum(axis=1)
+        else:
+            if len(norms) != len(pre):
+                raise ValueError("norms must have one array per pair")
+            lengths = np.array([np.size(x) for x in norms], dtype=np.int64)
+            X_norm = np.concatenate([np.reshape(x, -1) for x in norms]).astype(
+                np.float64
+            )
+            normalized_pre = _segment_sums(
+                predict_segments(pre.coefficients, X_norm, lengths), lengths
+            )
+            normalized_post = _segment_sums(
+                predict_segments(post.coefficients, X_norm, lengths), lengths
+            )
+
+        total = normalized_pre - normalized_post
+        uncertainty = np.sqrt(
+            _uncertainty(pre, normalized_pre, lengths, confidence) ** 2
+            + _uncertainty(post, normalized_post, lengths, confidence) ** 2
+        )
+        out["normalized_total_savings"] = total
+        out["normalized_average_savings"] = total / lengths
+        out["normalized_percent_savings"] = 100 * total / normalized_pre
+        out["normalized_savings_uncertainty"] = uncertainty
+        out["normalized_percent_savings_uncertainty"] = (
+            100 * uncertainty / np.abs(total)
+        )
+
+    return out
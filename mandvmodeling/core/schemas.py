@@ -1,9 +1,10 @@
-from typing import Annotated, Any, Optional
+from typing import Annotated, Any, Optional, Tuple
 from pydantic import BeforeValidator, PlainSerializer, WithJsonSchema
 import pydantic
-from changepointmodel.core.nptypes import NByOneNDArray, Ordering
+from changepointmodel.core.nptypes import NByOneNDArray, OneDimNDArray, Ordering
 from changepointmodel.core import CurvefitEstimatorDataModel
 import numpy as np
+import numpy.typing as npt
 
 
 def _validate_n_by_one_dim_timestamp(v: Any) -> NByOneNDArray[np.datetime64]:
@@ -37,13 +38,62 @@ TimestampArrayField = Annotated[
 ]
 
 
+def _validate_counts(v: Any) -> Optional[OneDimNDArray[np.float64]]:
+    """
+    Converts the input to a OneDimNDArray[np.float64] and raises an AssertionError if it is not one dimensional or
+    not finite and strictly positive.
+
+    Args:
+      v: Any: The input data
+
+    Returns:
+      Optional[OneDimNDArray[np.float64]]: The converted data
+    """
+    if v is None:
+        return None
+    arr = np.asarray(v, dtype=np.float64)
+
+    assert (
+        len(arr.shape) == 1
+    ), f"Shape of counts should be M x 1, got {arr.ndim}-dimensional array."
+    assert (
+        np.isfinite(arr).all() and (arr > 0).all()
+    ), "counts must be finite and strictly positive"
+
+    return arr
+
+
+CountArrayField = Annotated[
+    Optional[OneDimNDArray[np.float64]],
+    BeforeValidator(_validate_counts),
+    PlainSerializer(lambda x: None if x is None else x.tolist(), return_type=list),
+    WithJsonSchema({"type": "array", "items": {"type": "number"}}),
+]
+
+
+def _as_seconds(value: Any) -> np.datetime64:
+    return np.datetime64(value).astype("datetime64[s]")
+
+
 class MandVDataModel(CurvefitEstimatorDataModel):
     sensor_reading_timestamps: TimestampArrayField
     order: Optional[Ordering] = None
+    counts: CountArrayField = None
     """
   An extended version of CurvefitEstimatorDataModel that forces the data to be sorted by X
+
+  `counts` is the number of intervals aggregated into each reading, for example the hours of a day that have
+  interval data. Readings with partial coverage are less certain, so if no `sigma` is given, the readings are weighted
+  by their counts (see `fit_sigma`). sigma and counts are sorted along with X.
+
+  `slice_by_date` selects the readings of a date range by binary search on a timestamp-order permutation that is built
+  on first use and kept on the model.
   """
 
+    _time_index: Optional[Tuple[npt.NDArray[np.intp], npt.NDArray[np.datetime64]]] = (
+        pydantic.PrivateAttr(default=None)
+    )
+
     @pydantic.model_validator(mode="after")
     def check_sorted(self) -> "MandVDataModel":
         """
@@ -52,8 +102,93 @@ class MandVDataModel(CurvefitEstimatorDataModel):
         if any(self.X.squeeze() != np.sort(self.X.squeeze())):
             self.X, self.y, self.order = self.sorted_X_y()
             self.sensor_reading_timestamps = self.sensor_reading_timestamps[self.order]
+            # mismatched lengths are reported by validate_all
+            if self.sigma is not None and len(self.sigma) == len(self.order):
+                self.sigma = np.asarray(self.sigma)[self.order]
+            if self.counts is not None and len(self.counts) == len(self.order):
+                self.counts = self.counts[self.order]
         return self
 
+    def fit_sigma(self) -> Optional[OneDimNDArray[np.float64]]:
+        """
+        Returns the sigma to fit with: `sigma` if given, else 1 / sqrt(counts) so the weight 1 / sigma**2 of every
+        reading is its count, else None for an unweighted fit.
+        """
+        if self.sigma is not None:
+            return np.asarray(self.sigma, dtype=np.float64)
+        if self.counts is not None:
+            return 1.0 / np.sqrt(self.counts)
+        return None
+
+    def time_index(self) -> Tuple[npt.NDArray[np.intp], npt.NDArray[np.datetime64]]:
+        """
+        Returns the permutation that sorts the readings by time and the sorted timestamps (in seconds). Built once.
+        """
+        if self._time_index is None:
+            permutation = np.argsort(self.sensor_reading_timestamps, kind="stable")
+            times = self.sensor_reading_timestamps[permutation].astype("datetime64[s]")
+            permutation.setflags(write=False)
+            times.setflags(write=False)
+            self._time_index = (permutation, times)
+        return self._time_index
+
+    def date_indices(self, start: Any = None, end: Any = None) -> npt.NDArray[np.intp]:
+        """
+        Returns the positions of the readings with start <= timestamp < end, in increasing order, i.e. sorted by X.
+
+        Args:
+          start: Any: The first timestamp to include, as anything np.datetime64 accepts. Defaults to None for no limit.
+          end: Any: The first timestamp to exclude. Defaults to None for no limit.
+
+        Returns:
+          npt.NDArray[np.intp]: The positions
+        """
+        permutation, times = self.time_index()
+        lo = 0 if start is None else np.searchsorted(times, _as_seconds(start))
+        hi = len(times) if end is None else np.searchsorted(times, _as_seconds(end))
+        return np.sort(permutation[lo : max(lo, hi)])
+
+    def slice_by_date(self, start: Any = None, end: Any = None) -> "MandVDataModel":
+        """
+        Returns the readings with start <= timestamp < end as a new MandVDataModel, still sorted by X. The readings
+        are found by binary search on `time_index` and the sub-model is built without validation, since a subset of
+        valid sorted data is valid and sorted. `order` of the sub-model holds the positions of its readings in the
+        input of this model, if this model was sorted.
+
+        Args:
+          start: Any: The first timestamp to include, as anything np.datetime64 accepts. Defaults to None for no limit.
+          end: Any: The first timestamp to exclude. Defaults to None for no limit.
+
+        Returns:
+          MandVDataModel: The readings of the date range
+        """
+        idx = self.date_indices(start, end)
+        return self.take(idx)
+
+    def take(self, idx: npt.NDArray[np.intp]) -> "MandVDataModel":
+        """
+        Returns the readings at increasing positions idx as a new MandVDataModel, without validation.
+
+        Args:
+          idx: npt.NDArray[np.intp]: Increasing positions
+
+        Returns:
+          MandVDataModel: The readings
+        """
+
+        def pick(v: Any) -> Any:
+            return None if v is None else np.asarray(v)[idx]
+
+        return MandVDataModel.model_construct(
+            X=self.X[idx],
+            y=self.y[idx],
+            sigma=pick(self.sigma),
+            absolute_sigma=self.absolute_sigma,
+            sensor_reading_timestamps=self.sensor_reading_timestamps[idx],
+            order=pick(self.order),
+            counts=pick(self.counts),
+        )
+
     @pydantic.model_validator(mode="after")
     def validate_all(self) -> "MandVDataModel":
         """
@@ -66,6 +201,9 @@ class MandVDataModel(CurvefitEstimatorDataModel):
         if self.sigma is not None and len(self.sigma) != len(self.X):
             raise ValueError("len of sigma must match len X and y")
 
+        if self.counts is not None and len(self.counts) != len(self.X):
+            raise ValueError("len of counts must match len X and y")
+
         if self.order is not None and len(self.order) != len(self.X):
             raise ValueError("len of order must match len X and y")
 
@@ -0,0 +1,260 @@
+"""Chooses between candidate changepoint models without always fitting all of them.
+
+Candidates are fit in order of cost, i.e. by number of coefficients (2P, then 3PC/3PH, then 4P, then 5P). Once a model
+passes the ASHRAE-style `ModelFilter`, the remaining candidates with the same number of coefficients are still fit
+(3PC and 3PH are equally expensive) but every more expensive candidate is skipped. Since the simplest passing model is
+preferred, those fits could not change the result.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import time
+import numpy as np
+from .budget import FitBudget
+from .estimator import FitStatus, MandVEnergyChangepointEstimator, _n_params
+from .pmodels import MandVParameterModelFunction, get_model_function
+from .pmodels.builtin import MODEL_NAMES
+from .results import FitResult
+from .schemas import MandVDataModel
+
+
+@dataclass(frozen=True)
+class ModelFilter:
+    """ASHRAE-style thresholds a fitted model has to meet. A threshold of None disables that check.
+
+    Attributes:
+        r2 (Optional[float]): The minimum r2. Defaults to 0.75.
+        cvrmse (Optional[float]): The maximum cvrmse. Defaults to 0.5.
+        tstat (Optional[float]): The minimum absolute t-statistic of every slope. Defaults to 2.0.
+        dpop (Optional[int]): The minimum number of points on the heating and cooling side of every slope.
+            Defaults to 10.
+        shape (bool): Whether the coefficients must have the expected shape. Defaults to True.
+    """
+
+    r2: Optional[float] = 0.75
+    cvrmse: Optional[float] = 0.5
+    tstat: Optional[float] = 2.0
+    dpop: Optional[int] = 10
+    shape: bool = True
+
+    def passes(self, estimator: MandVEnergyChangepointEstimator) -> bool:
+        """
+        Checks a fitted estimator against the thresholds.
+
+        Args:
+          estimator: MandVEnergyChangepointEstimator: A fitted estimator
+
+        Returns:
+          bool: Whether the estimator meets every threshold
+        """
+        if estimator.fit_status is not FitStatus.OK:
+            return False
+        if self.r2 is not None and not estimator.r2() >= self.r2:
+            return False
+        if self.cvrmse is not None and not estimator.cvrmse() <= self.cvrmse:
+            return False
+        if self.shape and not estimator.shape():
+            return False
+
+        if self.tstat is not None or self.dpop is not None:
+            # the heating side comes first in both tuples. Sides without a slope have a tstat of None.
+            for tstat, npoints in zip(estimator.tstat(), estimator.dpop()):
+                if tstat is None:
+                    continue
+                if self.tstat is not None and not abs(tstat) >= self.tstat:
+                    return False
+                if self.dpop is not None and npoints < self.dpop:
+                    return False
+
+        return True
+
+
+@dataclass
+class ModelSelectionResult:
+    """The outcome of `select_model`.
+
+    Attributes:
+        best (Optional[MandVEnergyChangepointEstimator]): The selected estimator or None if no candidate passed.
+        estimators (Dict[str, MandVEnergyChangepointEstimator]): Every fitted estimator by model name.
+        passed (Dict[str, bool]): Whether each fitted estimator passed the filter by model name.
+        skipped (List[str]): The names of the candidates that were not fit.
+    """
+
+    best: Optional[MandVEnergyChangepointEstimator] = None
+    estimators: Dict[str, MandVEnergyChangepointEstimator] = field(default_factory=dict)
+    passed: Dict[str, bool] = field(default_factory=dict)
+    skipped: List[str] = field(default_factory=list)
+
+
+def select_model(
+    data_model: MandVDataModel,
+    models: Optional[Sequence[MandVParameterModelFunction]] = None,
+    model_filter: Optional[ModelFilter] = None,
+    budget: Optional[FitBudget] = None,
+    timeout: Optional[float] = None,
+) -> ModelSelectionResult:
+    """
+    Fits candidate models from cheapest to most expensive and stops once a model passes the filter.
+
+    Among the passing models with the fewest coefficients, the one with the highest r2 is selected.
+
+    Args:
+      data_model: MandVDataModel: The data to fit
+      models: Optional[Sequence[MandVParameterModelFunction]]: The candidates. Defaults to the registered 2P, 3PC, 3PH,
+        4P and 5P models with the default bounds.
+      model_filter: Optional[ModelFilter]: The thresholds a model has to meet. Defaults to ModelFilter().
+      budget: Optional[FitBudget]: The FitBudget for every single fit. Defaults to each model's fit_budget.
+      timeout: Optional[float]: The wall-clock time in seconds for the whole selection. Candidates that would start
+        after it has passed are skipped and the remaining time caps the timeout of each fit. Defaults to None.
+
+    Returns:
+      ModelSelectionResult: The selected estimator along with every fitted estimator
+    """
+    if models is None:
+        models = [get_model_function(name) for name in MODEL_NAMES]
+    if model_filter is None:
+        model_filter = ModelFilter()
+
+    deadline = None if timeout is None else time.perf_counter() + timeout
+    # sort is stable so candidates of equal cost stay in the order they were given
+    candidates = sorted(
+        models, key=lambda model: _n_params(model.f, None) or np.iinfo(np.int64).max
+    )
+
+    result = ModelSelectionResult()
+    passed_cost = None
+    for model in candidates:
+        cost = _n_params(model.f, None)
+        remaining = None if deadline is None else deadline - time.perf_counter()
+        if (passed_cost is not None and cost != passed_cost) or (
+            remaining is not None and remaining <= 0
+        ):
+            result.skipped.append(model.name)
+            continue
+
+        est = MandVEnergyChangepointEstimator(model=model)
+        est.fit(data_model, budget=_cap_budget(budget or model.fit_budget, remaining))
+        passed = model_filter.passes(est)
+
+        result.estimators[model.name] = est
+        result.passed[model.name] = passed
+        if passed:
+            passed_cost = cost
+            if result.best is None or est.r2() > result.best.r2():
+                result.best = est
+
+    return result
+
+
+def _cap_budget(
+    budget: Optional[FitBudget], remaining: Optional[float]
+) -> Optional[FitBudget]:
+    """
+    Helper to cap the timeout of a FitBudget by the time remaining for the selection.
+    """
+    if remaining is None:
+        return budget
+    if budget is None:
+        return FitBudget(timeout=remaining)
+    if budget.timeout is not None and budget.timeout <= remaining:
+        return budget
+    return FitBudget(max_nfev=budget.max_nfev, timeout=remaining)
+
+
+def fit_model(
+    data_model: MandVDataModel,
+    model: str = "auto",
+    bounds: str = "default",
+    budget: Optional[FitBudget] = None,
+) -> Optional[MandVEnergyChangepointEstimator]:
+    """
+    Fits one of the built-in models by name, or selects one of them with `select_model`.
+
+    Args:
+      data_model: MandVDataModel: The data to fit
+      model: str: One of "2P", "3PC", "3PH", "4P" or "5P", or "auto" to use `select_model`. Defaults to "auto".
+      bounds: str: The bounds strategy, either "default" or "daily". Defaults to "default".
+      budget: Optional[FitBudget]: The FitBudget for every fit. Defaults to None.
+
+    Returns:
+      Optional[MandVEnergyChangepointEstimator]: The fitted estimator, or None if no model passed the selection
+    """
+    if model == "auto":
+        models = [get_model_function(name, bounds=bounds) for name in MODEL_NAMES]
+        return select_model(data_model, models=models, budget=budget).best
+    est = MandVEnergyChangepointEstimator(get_model_function(model, bounds=bounds))
+    return est.fit(data_model, budget=budget)
+
+
+def fit_stream(
+    meters: Iterable[Tuple[str, MandVDataModel]],
+    model: str = "auto",
+    bounds: str = "default",
+    budget: Optional[FitBudget] = None,
+) -> Iterator[Tuple[str, Optional[MandVEnergyChangepointEstimator]]]:
+    """
+    Fits a stream of meters one at a time with `fit_model`, such as from
+    `mandvmodeling.core.readers.stream_meter_file`.
+
+    Args:
+      meters: Iterable[Tuple[str, MandVDataModel]]: Meter ids and data
+      model: str: One of "2P", "3PC", "3PH", "4P" or "5P", or "auto" to use `select_model`. Defaults to "auto".
+      bounds: str: The bounds strategy, either "default" or "daily". Defaults to "default".
+      budget: Optional[FitBudget]: The FitBudget for every fit. Defaults to None.
+
+    Yields:
+      Tuple[str, Optional[MandVEnergyChangepointEstimator]]: The meter id and its fitted estimator, or None if no
+      model passed the selection
+    """
+    for meter_id, data_model in meters:
+        yield meter_id, fit_model(data_model, model=model, bounds=bounds, budget=budget)
+
+
+def _fit_result(
+    data_model: MandVDataModel,
+    model: str,
+    bounds: str,
+    budget: Optional[FitBudget],
+    keep_data: bool,
+) -> Optional[FitResult]:
+    """
+    Helper that fits one data model and returns a FitResult. Runs in a worker process when n_jobs > 1.
+    """
+    est = fit_model(data_model, model=model, bounds=bounds, budget=budget)
+    return None if est is None else FitResult.from_estimator(est, keep_data=keep_data)
+
+
+def fit_many(
+    data_models: Sequence[MandVDataModel],
+    model: str = "auto",
+    bounds: str = "default",
+    budget: Optional[FitBudget] = None,
+    n_jobs: int = 1,
+    keep_data: bool = False,
+) -> List[Optional[FitResult]]:
+    """
+    Fits many data models with `fit_model`, in parallel worker processes when n_jobs > 1. Only the compact
+    FitResults are sent back from the workers.
+
+    Args:
+      data_models: Sequence[MandVDataModel]: The data to fit
+      model: str: One of "2P", "3PC", "3PH", "4P" or "5P", or "auto" to use `select_model`. Defaults to "auto".
+      bounds: str: The bounds strategy, either "default" or "daily". Defaults to "default".
+      budget: Optional[FitBudget]: The FitBudget for every fit. Defaults to None.
+      n_jobs: int: The number of worker processes. Defaults to 1.
+      keep_data: bool: Keep the training data in the results so they can be turned back into estimators. Defaults
+        to False.
+
+    Returns:
+      List[Optional[FitResult]]: The results in the order of data_models, None where no model passed the selection
+    """
+    fit = partial(
+        _fit_result, model=model, bounds=bounds, budget=budget, keep_data=keep_data
+    )
+    if n_jobs == 1:
+        return [fit(data_model) for data_model in data_models]
+    chunksize = max(1, len(data_models) // (n_jobs * 4))
+    with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+        return list(pool.map(fit, data_models, chunksize=chunksize))
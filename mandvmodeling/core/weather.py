@@ -0,0 +1,287 @@
+"""A store of weather station temperatures that attaches them to meter readings without per-meter joins.
+
+`WeatherStore` keeps the timestamps of every station sorted once, as int64 seconds, next to the temperatures in the
+same order. `WeatherStore.align` matches the `sensor_reading_timestamps` of a meter to the station with one
+`np.searchsorted` call: to the nearest, previous or next station reading, optionally within a tolerance. Alignments are
+cached by station, timestamps and matching rule, so meters that share a station and reading times (for example every
+daily meter on a station) share one alignment.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, List, Optional, Tuple, Union
+import hashlib
+import numpy as np
+import numpy.typing as npt
+from changepointmodel.core.nptypes import OneDimNDArray
+from . import degree_days
+from .cache import LRUCache
+
+METHODS: Tuple[str, ...] = ("nearest", "previous", "next")
+
+Tolerance = Union[np.timedelta64, str, None]
+
+
+@dataclass(frozen=True, eq=False)
+class StationSeries:
+    """The temperatures of one weather station, sorted by time.
+
+    Attributes:
+        timestamps (OneDimNDArray[np.datetime64]): The sorted timestamps.
+        temperatures (OneDimNDArray[np.float64]): The temperatures in the same order.
+        seconds (OneDimNDArray[np.int64]): The timestamps as seconds since the epoch, for searchsorted.
+    """
+
+    timestamps: OneDimNDArray[np.datetime64]
+    temperatures: OneDimNDArray[np.float64]
+    seconds: OneDimNDArray[np.int64]
+
+    @classmethod
+    def from_arrays(
+        cls, timestamps: npt.ArrayLike, temperatures: npt.ArrayLike
+    ) -> "StationSeries":
+        """
+        Sorts the readings of a station by time and drops NaN temperatures.
+
+        Args:
+          timestamps: npt.ArrayLike: The timestamps
+          temperatures: npt.ArrayLike: The temperatures
+
+        Returns:
+          StationSeries: The series
+        """
+        ts = np.asarray(timestamps, dtype="datetime64[s]").reshape(-1)
+        T = np.asarray(temperatures, dtype=np.float64).reshape(-1)
+        if len(ts) != len(T):
+            raise ValueError("timestamps and temperatures must have the same len")
+        keep = np.isfinite(T) & ~np.isnat(ts)
+        ts, T = ts[keep], T[keep]
+        order = np.argsort(ts, kind="stable")
+        ts, T = ts[order], T[order]
+        seconds = ts.astype(np.int64)
+        for arr in (ts, T, seconds):
+            arr.setflags(write=False)
+        return cls(timestamps=ts, temperatures=T, seconds=seconds)
+
+
+def _tolerance_seconds(tolerance: Tolerance) -> Optional[int]:
+    if tolerance is None:
+        return None
+    if isinstance(tolerance, str):
+        # e.g. "30m" or "2h"
+        value, unit = int(tolerance[:-1]), tolerance[-1]
+        tolerance = np.timedelta64(value, unit)
+    seconds = int(np.timedelta64(tolerance, "s").astype(np.int64))
+    if seconds < 0:
+        raise ValueError("tolerance must not be negative")
+    return seconds
+
+
+def align_indices(
+    station_seconds: npt.NDArray[np.int64],
+    seconds: npt.NDArray[np.int64],
+    method: str = "nearest",
+    tolerance: Optional[int] = None,
+) -> npt.NDArray[np.intp]:
+    """
+    Matches times to sorted station times.
+
+    Args:
+      station_seconds: npt.NDArray[np.int64]: The sorted station times in seconds
+      seconds: npt.NDArray[np.int64]: The times to match in seconds, in any order
+      method: str: "nearest", "previous" (the last station time at or before) or "next" (the first station time at or
+        after). Defaults to "nearest".
+      tolerance: Optional[int]: The largest distance of a match in seconds. Defaults to None for any distance.
+
+    Returns:
+      npt.NDArray[np.intp]: The index of the matching station time, or -1 where there is none
+    """
+    if method not in METHODS:
+        raise ValueError("Unknown method {}. Must be one of {}".format(method, METHODS))
+    n = len(station_seconds)
+    if n == 0:
+        return np.full(len(seconds), -1, dtype=np.intp)
+
+    previous = np.searchsorted(station_seconds, seconds, side="right") - 1
+    following = np.searchsorted(station_seconds, seconds, side="left")
+    has_previous = previous >= 0
+    has_next = following < n
+    previous_distance = np.where(
+        has_previous,
+        seconds - station_seconds[np.maximum(previous, 0)],
+        np.iinfo(np.int64).max,
+    )
+    next_distance = np.where(
+        has_next,
+        station_seconds[np.minimum(following, n - 1)] - seconds,
+        np.iinfo(np.int64).max,
+    )
+
+    if method == "previous":
+        index, distance = np.where(has_previous, previous, -1), previous_distance
+    elif method == "next":
+        index, distance = np.where(has_next, following, -1), next_distance
+    else:
+        # ties go to the previous reading
+        use_next = next_distance < previous_distance
+        index = np.where(use_next, following, np.where(has_previous, previous, -1))
+        distance = np.minimum(previous_distance, next_distance)
+
+    if tolerance is not None:
+        index = np.where(distance <= tolerance, index, -1)
+    return index.astype(np.intp)
+
+
+class AlignmentCache(LRUCache[OneDimNDArray[np.float64]]):
+    """A least recently used cache of aligned temperatures keyed by station, timestamps and matching rule.
+
+    Args:
+        maxsize (Optional[int]): The maximum number of alignments to keep. Defaults to 256. None for no limit.
+    """
+
+
+class WeatherStore:
+    """The temperatures of many weather stations.
+
+    Args:
+        cache_size (Optional[int]): The maximum number of alignments to cache. Defaults to 256. 0 disables caching and
+            None removes the limit.
+    """
+
+    def __init__(self, cache_size: Optional[int] = 256):
+        self.cache = AlignmentCache(cache_size) if cache_size != 0 else None
+        self.degree_day_cache = degree_days.DegreeDayCache()
+        self._stations: Dict[Hashable, StationSeries] = {}
+
+    def __contains__(self, station: Hashable) -> bool:
+        return station in self._stations
+
+    def __len__(self) -> int:
+        return len(self._stations)
+
+    @property
+    def stations(self) -> List[Hashable]:
+        return list(self._stations)
+
+    def add(
+        self, station: Hashable, timestamps: npt.ArrayLike, temperatures: npt.ArrayLike
+    ) -> StationSeries:
+        """
+        Adds or replaces the temperatures of a station. Replacing a station clears the caches.
+
+        Args:
+          station: Hashable: Identifies the station
+          timestamps: npt.ArrayLike: The timestamps
+          temperatures: npt.ArrayLike: The temperatures
+
+        Returns:
+          StationSeries: The sorted series
+        """
+        if station in self._stations:
+            self.degree_day_cache.clear()
+            if self.cache is not None:
+                self.cache.clear()
+        series = StationSeries.from_arrays(timestamps, temperatures)
+        self._stations[station] = series
+        return series
+
+    def series(self, station: Hashable) -> StationSeries:
+        try:
+            return self._stations[station]
+        except KeyError:
+            raise KeyError("Unknown weather station {!r}".format(station)) from None
+
+    def align(
+        self,
+        station: Hashable,
+        timestamps: npt.ArrayLike,
+        method: str = "nearest",
+        tolerance: Tolerance = None,
+    ) -> OneDimNDArray[np.float64]:
+        """
+        The temperatures of a station at timestamps.
+
+        Args:
+          station: Hashable: The station
+          timestamps: npt.ArrayLike: The timestamps, e.g. the sensor_reading_timestamps of a meter, in any order
+          method: str: "nearest", "previous" or "next". See align_indices. Defaults to "nearest".
+          tolerance: Tolerance: The largest distance of a match as a np.timedelta64 or a string such as "30m" or
+            "2h". Defaults to None for any distance.
+
+        Returns:
+          OneDimNDArray[np.float64]: The temperatures in the order of timestamps, NaN where there is no match. The
+            array is read-only because it may be shared with other meters.
+        """
+        series = self.series(station)
+        seconds = np.ascontiguousarray(
+            np.asarray(timestamps, dtype="datetime64[s]").reshape(-1).astype(np.int64)
+        )
+        tolerance_seconds = _tolerance_seconds(tolerance)
+
+        key: Any = None
+        if self.cache is not None:
+            digest = hashlib.sha1(seconds.tobytes()).hexdigest()
+            key = (station, digest, method, tolerance_seconds)
+            found = self.cache.get(key)
+            if found is not None:
+                return found
+
+        index = align_indices(series.seconds, seconds, method, tolerance_seconds)
+        out = np.where(index >= 0, series.temperatures[np.maximum(index, 0)], np.nan)
+        out.setflags(write=False)
+        if self.cache is not None:
+            self.cache.put(key, out)
+        return out
+
+    def data_model(
+        self,
+        station: Hashable,
+        y: npt.ArrayLike,
+        sensor_reading_timestamps: npt.ArrayLike,
+        method: str = "nearest",
+        tolerance: Tolerance = None,
+    ) -> Any:
+        """
+        Builds the MandVDataModel of a meter with the temperatures of a station as X. Readings without a matching
+        temperature are dropped.
+
+        Args:
+          station: Hashable: The station
+          y: npt.ArrayLike: The readings of the meter
+          sensor_reading_timestamps: npt.ArrayLike: Their timestamps
+          method: str: See align. Defaults to "nearest".
+          tolerance: Tolerance: See align. Defaults to None.
+
+        Returns:
+          MandVDataModel: The data model
+        """
+        from .schemas import MandVDataModel
+
+        X = self.align(station, sensor_reading_timestamps, method, tolerance)
+        keep = ~np.isnan(X)
+        return MandVDataModel(
+            X=X[keep],
+            y=np.asarray(y, dtype=np.float64)[keep],
+            sensor_reading_timestamps=np.asarray(sensor_reading_timestamps)[keep],
+        )
+
+    def degree_day_table(
+        self, station: Hashable, periods: degree_days.Periods = "D"
+    ) -> degree_days.DegreeDayTable:
+        """
+        The degree day table of a station, cached in `degree_day_cache` (see `mandvmodeling.core.degree_days`).
+
+        Args:
+          station: Hashable: The station
+          periods: degree_days.Periods: The periods. Defaults to "D".
+
+        Returns:
+          degree_days.DegreeDayTable: The table
+        """
+        series = self.series(station)
+        return degree_days.station_table(
+            station,
+            series.temperatures,
+            series.timestamps,
+            periods=periods,
+            cache=self.degree_day_cache,
+        )
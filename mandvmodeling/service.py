@@ -0,0 +1,477 @@
+"""An optional local HTTP/JSON service for fitting, prediction and savings.
+
+The service keeps scipy, pydantic and the worker processes warm between requests. Requests that arrive within
+`batch_window` seconds of each other are coalesced into batches of up to `max_batch_size` requests of the same kind,
+and every batch is run in a worker pool with a single call. The request queue is bounded: once `max_queue` requests
+are waiting the service answers 503 instead of queueing more work, and at most `workers` batches run at a time.
+
+Endpoints (all JSON):
+
+    POST /fit      {"X": [...], "y": [...], "dates": [...], "model": "3PC", "bounds": "default"}
+                   "dates" is optional. "model" is one of the built-in models or "auto" to use `select_model`.
+    POST /predict  {"model": "3PC", "coeffs": [...], "X": [...]}
+    POST /savings  {"pre": <fit request>, "post": <fit request>, "norms": [...]}
+                   "norms" is optional.
+    GET  /health
+    GET  /metrics
+
+Only the standard library is used for the server. Run it with
+
+    python -m mandvmodeling.service --port 8080
+"""
+
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import argparse
+import asyncio
+import collections
+import json
+import multiprocessing
+import os
+import time
+import numpy as np
+from mandvmodeling.core.calc import kernels
+from mandvmodeling.core.diagnostics import jsonable, score_record
+from mandvmodeling.core.estimator import MandVEnergyChangepointEstimator
+from mandvmodeling.core.savings import batch_savings
+from mandvmodeling.core.schemas import MandVDataModel
+from mandvmodeling.core.selection import fit_model
+
+OPERATIONS = ("fit", "predict", "savings")
+
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+@dataclass(frozen=True)
+class ServiceConfig:
+    """The settings of a FittingService.
+
+    Attributes:
+        host (str): The interface to listen on. Defaults to "127.0.0.1".
+        port (int): The port to listen on. 0 picks a free port. Defaults to 8080.
+        batch_window (float): How long in seconds to wait for more requests after the first one of a batch.
+            Defaults to 0.01.
+        max_batch_size (int): The maximum number of requests in a batch. Defaults to 64.
+        max_queue (int): The maximum number of requests waiting to be batched. Defaults to 1024.
+        workers (Optional[int]): The number of workers and of batches running at a time. Defaults to None for the
+            number of CPUs.
+        executor (str): `"process"` or `"thread"`. Defaults to "process".
+        max_body_size (int): The maximum request body in bytes. Defaults to 16 MiB.
+        confidence (float): The confidence level of the savings uncertainties. Defaults to 0.8.
+    """
+
+    host: str = "127.0.0.1"
+    port: int = 8080
+    batch_window: float = 0.01
+    max_batch_size: int = 64
+    max_queue: int = 1024
+    workers: Optional[int] = None
+    executor: str = "process"
+    max_body_size: int = 16 * 1024 * 1024
+    confidence: float = 0.8
+
+    def __post_init__(self):
+        if self.batch_window < 0:
+            raise ValueError("batch_window must not be negative")
+        if self.max_batch_size < 1 or self.max_queue < 1:
+            raise ValueError("max_batch_size and max_queue must be positive integers")
+        if self.workers is not None and self.workers < 1:
+            raise ValueError("workers must be a positive integer")
+        if self.executor not in ("process", "thread"):
+            raise ValueError('executor must be "process" or "thread"')
+
+
+def _data_model(payload: Dict[str, Any]) -> MandVDataModel:
+    y = np.asarray(payload["y"], dtype=np.float64)
+    dates = payload.get("dates")
+    if dates is None:
+        dates = np.arange(len(y)).astype("datetime64[D]")
+    return MandVDataModel(
+        X=np.asarray(payload["X"], dtype=np.float64),
+        y=y,
+        sensor_reading_timestamps=np.asarray(dates, dtype="datetime64[D]"),
+    )
+
+
+def _fit(payload: Dict[str, Any]) -> Optional[MandVEnergyChangepointEstimator]:
+    return fit_model(
+        _data_model(payload),
+        model=payload.get("model", "auto"),
+        bounds=payload.get("bounds", "default"),
+    )
+
+
+def _predict(payload: Dict[str, Any]) -> Dict[str, Any]:
+    pred_y = kernels.predict(
+        payload["model"],
+        np.asarray(payload["X"], dtype=np.float64).reshape(-1),
+        np.asarray(payload["coeffs"], dtype=np.float64),
+    )
+    return jsonable({"pred_y": pred_y})
+
+
+def _error(exc: BaseException) -> Dict[str, Any]:
+    return {"error": "{}: {}".format(type(exc).__name__, exc)}
+
+
+def run_batch(
+    operation: str, payloads: Sequence[Dict[str, Any]], confidence: float = 0.8
+) -> List[Dict[str, Any]]:
+    """
+    Runs a batch of requests of one kind. This is what runs in the worker pool. A request that fails gets an
+    `{"error": ...}` result without failing the rest of the batch.
+
+    Args:
+      operation: str: One of "fit", "predict" or "savings"
+      payloads: Sequence[Dict[str, Any]]: The request bodies
+      confidence: float: The confidence level of the savings uncertainties. Defaults to 0.8.
+
+    Returns:
+      List[Dict[str, Any]]: One result per request
+    """
+    if operation not in OPERATIONS:
+        raise ValueError("Unknown operation {}".format(operation))
+
+    results: List[Dict[str, Any]] = []
+    if operation in ("fit", "predict"):
+        for payload in payloads:
+            try:
+                if operation == "fit":
+                    results.append(score_record(_fit(payload)))
+                else:
+                    results.append(_predict(payload))
+            except Exception as exc:
+                results.append(_error(exc))
+        return results
+
+    # savings: fit every pair, then compute the savings of the pairs with and without norms in one call each
+    pairs: Dict[bool, List[Tuple[int, Any, Any, Any]]] = {False: [], True: []}
+    results = [{} for _ in payloads]
+    for i, payload in enumerate(payloads):
+        try:
+            pre, post = _fit(payload["pre"]), _fit(payload["post"])
+            if pre is None or post is None:
+                raise ValueError("No model passed the filter.")
+            norms = payload.get("norms")
+            pairs[norms is not None].append((i, pre, post, norms))
+        except Exception as exc:
+            results[i] = _error(exc)
+
+    for has_norms, group in pairs.items():
+        if not group:
+            continue
+        try:
+            out = batch_savings(
+                [pre for _, pre, _, _ in group],
+                [post for _, _, post, _ in group],
+                norms=[np.asarray(n, dtype=np.float64) for *_, n in group]
+                if has_norms
+                else None,
+                confidence=confidence,
+            )
+        except Exception as exc:
+            for i, *_ in group:
+                results[i] = _error(exc)
+            continue
+        for row, (i, pre, post, _) in zip(out, group):
+            result = {name: row[name] for name in row.dtype.names}
+            result["pre"] = score_record(pre)
+            result["post"] = score_record(post)
+            results[i] = jsonable(result)
+    return results
+
+
+class ServiceMetrics:
+    """Counters of a running FittingService."""
+
+    def __init__(self):
+        self.started = time.time()
+        self.requests: Dict[str, int] = collections.Counter()
+        self.responses: Dict[int, int] = collections.Counter()
+        self.rejected = 0
+        self.batches = 0
+        self.batched_requests = 0
+        self.latency_total = 0.0
+        self.latency_count = 0
+
+    def snapshot(self, queue_depth: int, in_flight: int) -> Dict[str, Any]:
+        return {
+            "uptime": time.time() - self.started,
+            "requests": dict(self.requests),
+            "responses": {str(k): v for k, v in self.responses.items()},
+            "rejected": self.rejected,
+            "batches": self.batches,
+            "batched_requests": self.batched_requests,
+            "mean_batch_size": self.batched_requests / self.batches
+            if self.batches
+            else 0.0,
+            "mean_latency": self.latency_total / self.latency_count
+            if self.latency_count
+            else 0.0,
+            "queue_depth": queue_depth,
+            "in_flight_batches": in_flight,
+        }
+
+
+class FittingService:
+    """A micro-batching HTTP/JSON server.
+
+    Args:
+        config (ServiceConfig): The settings. Defaults to ServiceConfig().
+    """
+
+    def __init__(self, config: ServiceConfig = ServiceConfig()):
+        self.config = config
+        self.metrics = ServiceMetrics()
+        self._workers = config.workers or os.cpu_count() or 1
+        self._queue: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._executor: Optional[Executor] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._batcher: Optional[asyncio.Task] = None
+        self._in_flight = 0
+
+    @property
+    def port(self) -> int:
+        """The port the server listens on."""
+        if self._server is None:
+            raise RuntimeError("The service has not been started.")
+        return self._server.sockets[0].getsockname()[1]
+
+    async def start(self) -> None:
+        """Starts the worker pool, the batcher and the server."""
+        self._queue = asyncio.Queue(maxsize=self.config.max_queue)
+        self._slots = asyncio.Semaphore(self._workers)
+        if self.config.executor == "process":
+            # forked workers would inherit the sockets of open connections and keep them from closing, so start
+            # workers from a clean process instead
+            method = (
+                "forkserver"
+                if "forkserver" in multiprocessing.get_all_start_methods()
+                else "spawn"
+            )
+            self._executor = ProcessPoolExecutor(
+                max_workers=self._workers,
+                mp_context=multiprocessing.get_context(method),
+            )
+            # import scipy, pydantic and the models in every worker before the first request arrives
+            loop = asyncio.get_running_loop()
+            await asyncio.gather(
+                *[
+                    loop.run_in_executor(self._executor, run_batch, "predict", [])
+                    for _ in range(self._workers)
+                ]
+            )
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=self._workers)
+        self._batcher = asyncio.create_task(self._batch_forever())
+        self._server = await asyncio.start_server(
+            self._handle, self.config.host, self.config.port
+        )
+
+    async def stop(self) -> None:
+        """Stops accepting requests and shuts down the batcher and the worker pool."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._batcher is not None:
+            self._batcher.cancel()
+            try:
+                await self._batcher
+            except asyncio.CancelledError:
+                pass
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+
+    async def serve_forever(self) -> None:
+        """Starts the service and runs until cancelled."""
+        await self.start()
+        try:
+            await self._server.serve_forever()  # type: ignore
+        finally:
+            await self.stop()
+
+    async def submit(self, operation: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Queues one request and waits for its result.
+
+        Args:
+          operation: str: One of "fit", "predict" or "savings"
+          payload: Dict[str, Any]: The request body
+
+        Raises:
+          asyncio.QueueFull: If max_queue requests are already waiting.
+
+        Returns:
+          Dict[str, Any]: The result
+        """
+        if operation not in OPERATIONS:
+            raise ValueError("Unknown operation {}".format(operation))
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((operation, payload, future))  # type: ignore
+        return await future
+
+    async def _batch_forever(self) -> None:
+        loop = asyncio.get_running_loop()
+        queue = self._queue
+        while True:
+            # wait for a free worker before taking more work off the queue so that a busy pool leaves requests
+            # waiting in the bounded queue
+            await self._slots.acquire()  # type: ignore
+            batch = [await queue.get()]  # type: ignore
+            deadline = loop.time() + self.config.batch_window
+            while len(batch) < self.config.max_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), remaining))  # type: ignore
+                except asyncio.TimeoutError:
+                    break
+
+            groups: Dict[str, List[Tuple[Dict[str, Any], asyncio.Future]]] = (
+                collections.defaultdict(list)
+            )
+            for operation, payload, future in batch:
+                groups[operation].append((payload, future))
+
+            # the first group uses the acquired slot, every other group waits for its own
+            for n, (operation, items) in enumerate(groups.items()):
+                if n:
+                    await self._slots.acquire()  # type: ignore
+                asyncio.create_task(self._dispatch(operation, items))
+
+    async def _dispatch(
+        self, operation: str, items: List[Tuple[Dict[str, Any], asyncio.Future]]
+    ) -> None:
+        loop = asyncio.get_running_loop()
+        self._in_flight += 1
+        self.metrics.batches += 1
+        self.metrics.batched_requests += len(items)
+        try:
+            results = await loop.run_in_executor(
+                self._executor,
+                run_batch,
+                operation,
+                [payload for payload, _ in items],
+                self.config.confidence,
+            )
+            for (_, future), result in zip(items, results):
+                if not future.done():
+                    future.set_result(result)
+        except Exception as exc:
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(exc)
+        finally:
+            self._in_flight -= 1
+            self._slots.release()  # type: ignore
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        started = time.perf_counter()
+        try:
+            status, body = await self._respond(reader)
+        except Exception as exc:  # malformed requests
+            status, body = 400, _error(exc)
+
+        self.metrics.responses[status] += 1
+        self.metrics.latency_total += time.perf_counter() - started
+        self.metrics.latency_count += 1
+
+        data = json.dumps(body).encode()
+        writer.write(
+            "HTTP/1.1 {} {}\r\nContent-Type: application/json\r\nContent-Length: {}\r\n"
+            "Connection: close\r\n\r\n".format(
+                status, _REASONS.get(status, ""), len(data)
+            ).encode()
+            + data
+        )
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def _respond(self, reader: asyncio.StreamReader) -> Tuple[int, Any]:
+        request_line = (await reader.readline()).decode("latin-1").strip()
+        method, path, _ = request_line.split(" ", 2)
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            key, _, value = line.partition(":")
+            headers[key.strip().lower()] = value.strip()
+
+        path = path.split("?", 1)[0].rstrip("/") or "/"
+        self.metrics.requests[path] += 1
+
+        if path == "/health":
+            return 200, {"status": "ok"}
+        if path == "/metrics":
+            return 200, self.metrics.snapshot(self._queue.qsize(), self._in_flight)  # type: ignore
+
+        operation = path.lstrip("/")
+        if operation not in OPERATIONS:
+            return 404, {"error": "Not found: {}".format(path)}
+        if method != "POST":
+            return 405, {"error": "Use POST for {}".format(path)}
+
+        length = int(headers.get("content-length", 0))
+        if length > self.config.max_body_size:
+            return 413, {"error": "The request body is too large."}
+        payload = json.loads(await reader.readexactly(length))
+
+        try:
+            result = await self.submit(operation, payload)
+        except asyncio.QueueFull:
+            self.metrics.rejected += 1
+            return 503, {"error": "The service is busy. Try again later."}
+        except Exception as exc:
+            return 500, _error(exc)
+        return (400 if "error" in result else 200), result
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m mandvmodeling.service", description=__doc__.split("\n")[0]
+    )
+    defaults = ServiceConfig()
+    parser.add_argument("--host", default=defaults.host)
+    parser.add_argument("--port", type=int, default=defaults.port)
+    parser.add_argument("--batch-window", type=float, default=defaults.batch_window)
+    parser.add_argument("--max-batch-size", type=int, default=defaults.max_batch_size)
+    parser.add_argument("--max-queue", type=int, default=defaults.max_queue)
+    parser.add_argument("--workers", type=int, default=defaults.workers)
+    parser.add_argument(
+        "--executor", choices=("process", "thread"), default=defaults.executor
+    )
+    args = parser.parse_args(argv)
+
+    config = ServiceConfig(
+        host=args.host,
+        port=args.port,
+        batch_window=args.batch_window,
+        max_batch_size=args.max_batch_size,
+        max_queue=args.max_queue,
+        workers=args.workers,
+        executor=args.executor,
+    )
+    try:
+        asyncio.run(FittingService(config).serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
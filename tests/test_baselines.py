@@ -0,0 +1,141 @@
+import numpy as np
+import pytest
+
+from mandvmodeling.core.baselines import search_baseline_windows, window_ends
+from mandvmodeling.core.calc import piecewise, robust
+from mandvmodeling.core.calc.statistics import FitStatistics
+from mandvmodeling.core.estimator import MandVEnergyChangepointEstimator
+from mandvmodeling.core.pmodels import get_model_function
+from mandvmodeling.core.schemas import MandVDataModel
+
+
+def _daily_meter(days=2 * 365, counts=False, disturbed=None):
+    rng = np.random.default_rng(11)
+    timestamps = np.arange("2021-01-01", days, dtype="datetime64[D]")
+    day = np.arange(days)
+    T = 55 + 25 * np.sin(2 * np.pi * (day / 365 - 0.3)) + rng.normal(0, 4, days)
+    y = (
+        100
+        + 3 * np.maximum(T - 62, 0)
+        + 2 * np.maximum(62 - T, 0)
+        + rng.normal(0, 4, days)
+    )
+    if disturbed is not None:
+        y[disturbed] += rng.normal(0, 80, len(y[disturbed]))
+    return MandVDataModel(
+        X=T,
+        y=y,
+        sensor_reading_timestamps=timestamps,
+        counts=rng.integers(1, 5, days) if counts else None,
+    )
+
+
+def test_window_ends():
+    data_model = _daily_meter(days=400)
+    ends = window_ends(data_model)
+    assert ends[0] == np.datetime64("2022-01-01")
+    # the last window ends the day after the last reading
+    assert ends[-1] == np.datetime64("2022-02-05")
+    assert len(ends) == 36
+    ends = window_ends(data_model, length="30D", step="7D", last_end="2021-03-01")
+    np.testing.assert_array_equal(
+        ends,
+        np.array(
+            ["2021-01-31", "2021-02-07", "2021-02-14", "2021-02-21", "2021-02-28"],
+            dtype="datetime64[s]",
+        ),
+    )
+    with pytest.raises(ValueError):
+        window_ends(data_model, step="0D")
+
+
+@pytest.mark.parametrize("kind", ["2P", "3PC", "4P", "5P"])
+@pytest.mark.parametrize("counts", [False, True])
+def test_window_statistics_match_the_readings_of_the_window(kind, counts):
+    data_model = _daily_meter(counts=counts)
+    windows = search_baseline_windows(data_model, kind, step="30D", n_grid=15)
+    # the last window ends after the last reading
+    assert len(windows) == 14
+    assert windows.kind == kind
+    assert windows.n[0] == 365 and windows.n[-1] == 340
+    for i in range(len(windows)):
+        sub = data_model.slice_by_date(windows.starts[i], windows.ends[i])
+        assert windows.n[i] == len(sub.y)
+        X = sub.X.reshape(-1)
+        pred_y = robust.piecewise_predict(kind, X, windows.coeffs[i])
+        sigma = sub.fit_sigma()
+        stats = FitStatistics.from_arrays(
+            sub.y,
+            pred_y,
+            piecewise.N_PARAMS[kind],
+            weights=None if sigma is None else sigma**-2,
+        )
+        np.testing.assert_allclose(windows.r2[i], stats.r2, rtol=1e-8)
+        np.testing.assert_allclose(windows.cvrmse[i], stats.cvrmse, rtol=1e-8)
+
+        # the linear coefficients are the weighted least squares fit for the chosen changepoints
+        linear, cps = piecewise.split_coefficients(kind, windows.coeffs[i])
+        A = piecewise.design_matrix(kind, X, cps)
+        sw = np.ones_like(sub.y) if sigma is None else 1 / sigma
+        expected = np.linalg.lstsq(A * sw[:, None], sub.y * sw, rcond=None)[0]
+        np.testing.assert_allclose(linear, expected, rtol=1e-6, atol=1e-8)
+
+
+def test_search_matches_a_grid_search_per_window():
+    data_model = _daily_meter()
+    windows = search_baseline_windows(data_model, "4P", step="60D")
+    model = get_model_function("4P")
+    for i in range(len(windows)):
+        sub = data_model.slice_by_date(windows.starts[i], windows.ends[i])
+        X = sub.X.reshape(-1)
+        lower, upper = model.bounds(sub.X)
+        # the grid is shared by all windows, so a finer grid per window can only fit as well or better
+        grid = robust._changepoint_grid("4P", X, np.array(lower), np.array(upper), 200)
+        coeffs = robust.weighted_fit("4P", X, sub.y, np.ones_like(sub.y), grid)
+        residuals = sub.y - robust.piecewise_predict("4P", X, coeffs)
+        assert windows.sse[i] >= residuals @ residuals - 1e-6
+        assert windows.sse[i] <= 1.02 * (residuals @ residuals)
+        assert lower[-1] <= windows.coeffs[i, -1] <= upper[-1]
+
+
+def test_refined_windows_match_a_fit_per_window():
+    data_model = _daily_meter()
+    windows = search_baseline_windows(data_model, "4P", step="45D", refine=True)
+    assert windows.refined
+    for i in range(len(windows)):
+        sub = data_model.slice_by_date(windows.starts[i], windows.ends[i])
+        est = MandVEnergyChangepointEstimator(get_model_function("4P")).fit(sub)
+        np.testing.assert_allclose(windows.r2[i], est.r2(), rtol=1e-6)
+        np.testing.assert_allclose(windows.cvrmse[i], est.cvrmse(), rtol=1e-6)
+
+
+def test_best_window_avoids_disturbed_readings():
+    data_model = _daily_meter(days=3 * 365, disturbed=slice(200, 260))
+    windows = search_baseline_windows(data_model, "4P", step="7D")
+    best = windows.best()
+    # a window starting after the disturbance
+    assert windows.starts[best] >= np.datetime64("2021-09-18")
+    assert windows.best("r2") == int(np.nanargmax(windows.r2))
+    with pytest.raises(ValueError):
+        windows.best("aic")
+
+
+def test_windows_without_enough_readings():
+    data_model = _daily_meter(days=400)
+    ends = np.array(["2020-06-01", "2022-01-01"], dtype="datetime64[D]")
+    windows = search_baseline_windows(data_model, "3PC", ends=ends)
+    assert windows.n[0] == 0
+    assert np.isnan(windows.coeffs[0]).all()
+    assert np.isnan(windows.cvrmse[0])
+    assert np.isfinite(windows.cvrmse[1])
+    assert windows.best() == 1
+
+    windows = search_baseline_windows(data_model, "3PC", ends=ends[:1])
+    with pytest.raises(ValueError):
+        windows.best()
+
+
+def test_search_requires_a_builtin_model():
+    data_model = _daily_meter(days=400)
+    with pytest.raises(ValueError):
+        search_baseline_windows(data_model, "6P")
@@ -0,0 +1,146 @@
+import numpy as np
+import pytest
+from numpy.testing import assert_array_almost_equal
+
+from mandvmodeling.core import bootstrap
+from mandvmodeling.core.budget import FitBudget
+from mandvmodeling.core.calc import piecewise
+from mandvmodeling.core.estimator import (
+    MandVCurvefitEstimator,
+    MandVEnergyChangepointEstimator,
+)
+from mandvmodeling.core.pmodels import create_model_function
+from mandvmodeling.core.schemas import MandVDataModel
+
+from changepointmodel.core.calc import models as ChangepointModelModels
+
+
+def _fit(name, f, n=60, seed=1729, counts=False):
+    rng = np.random.default_rng(seed)
+    X = rng.uniform(20, 90, n)
+    y = f(X) + rng.normal(0, 5, n)
+    sensor_reading_timestamps = np.arange("2024-01-01", n, dtype="datetime64[D]")
+    est = MandVEnergyChangepointEstimator(create_model_function(name))
+    return est.fit(
+        MandVDataModel(
+            X=X,
+            y=y,
+            sensor_reading_timestamps=sensor_reading_timestamps,
+            counts=rng.integers(1, 24, n) if counts else None,
+        )
+    )
+
+
+def _threepc(X):
+    return ChangepointModelModels.threepc(X, 500.0, 10.0, 60.0)
+
+
+def test_resample_y_residual_and_block():
+    est = _fit("3PC", _threepc)
+    residuals = est.statistics.residuals
+
+    Y = bootstrap.resample_y(est, n_resamples=20, random_state=1)
+    assert Y.shape == (20, 60)
+    # every resampled residual is one of the fitted residuals
+    assert np.isin(np.round(Y - est.pred_y, 8), np.round(residuals, 8)).all()
+
+    Y = bootstrap.resample_y(
+        est, n_resamples=20, method="block", block_length=60, random_state=1
+    )
+    # a single block covering all points is a circular shift of the residuals in time order
+    order = np.argsort(est.sensor_reading_timestamps)
+    shifted = (Y - est.pred_y)[:, order]
+    for row in shifted:
+        shift = int(np.flatnonzero(np.isclose(residuals[order], row[0]))[0])
+        assert_array_almost_equal(row, np.roll(residuals[order], -shift))
+
+    with pytest.raises(ValueError):
+        bootstrap.resample_y(est, method="jackknife")
+
+
+def test_bootstrap_coefficients_linear_matches_lstsq():
+    est = _fit("3PC", _threepc)
+    result = bootstrap.bootstrap_coefficients(
+        est, n_resamples=50, refit="linear", random_state=2
+    )
+    assert result.coefficients.shape == (50, 3)
+    assert (result.statuses == "ok").all()
+    # the changepoint is held fixed
+    assert np.allclose(result.coefficients[:, 2], est.coeffs[2])
+
+    lower, upper = result.interval(0.9)
+    assert (lower <= upper).all()
+    assert lower[1] < 10.0 < upper[1]
+
+
+def test_weighted_bootstrap_matches_weighted_refitting():
+    est = _fit("3PC", _threepc, counts=True)
+    sigma = est.sigma_
+    assert sigma is not None
+
+    # the residuals are resampled standardized and scaled by the sigma of their target point
+    Y = bootstrap.resample_y(est, n_resamples=20, random_state=1)
+    standardized = est.statistics.residuals / sigma
+    assert np.isin(
+        np.round((Y - est.pred_y) / sigma, 8), np.round(standardized, 8)
+    ).all()
+
+    linear = bootstrap.bootstrap_coefficients(
+        est, n_resamples=20, refit="linear", random_state=1
+    )
+    A = piecewise.design_matrix("3PC", est.X, est.coeffs[2:])
+    expected = np.linalg.lstsq(A / sigma[:, None], (Y / sigma).T, rcond=None)[0].T
+    assert_array_almost_equal(linear.coefficients[:, :2], expected)
+
+    full = bootstrap.bootstrap_coefficients(
+        est, n_resamples=3, refit="full", random_state=1
+    )
+    for y, coefficients in zip(Y, full.coefficients):
+        refit = MandVCurvefitEstimator(
+            model_func=est.model.f, p0=tuple(est.coeffs), bounds=est.model.bounds
+        ).fit(est.X, y, sigma=sigma)
+        assert_array_almost_equal(coefficients, refit.popt_)
+
+
+def test_bootstrap_coefficients_full_refit_warm_started():
+    est = _fit("3PC", _threepc)
+    result = bootstrap.bootstrap_coefficients(
+        est, n_resamples=10, refit="full", random_state=3
+    )
+    assert result.coefficients.shape == (10, 3)
+    assert np.isfinite(result.coefficients).all()
+    assert_array_almost_equal(result.base_coefficients, est.coeffs)
+
+    budgeted = bootstrap.bootstrap_coefficients(
+        est, n_resamples=4, budget=FitBudget(max_nfev=1), random_state=3
+    )
+    assert (budgeted.statuses == "max_nfev").all()
+
+    with pytest.raises(ValueError):
+        bootstrap.bootstrap_coefficients(est, refit="bayes")
+
+
+def test_bootstrap_savings():
+    pre = _fit("3PC", _threepc)
+    post = _fit("3PC", lambda X: 0.8 * _threepc(X), seed=42)
+    result = bootstrap.bootstrap_savings(
+        pre, post, n_resamples=200, refit="linear", random_state=4
+    )
+    expected = np.sum(pre.predict(post.X)) - np.sum(post.y)
+    assert result.total_savings == pytest.approx(expected)
+    assert result.distribution.shape == (200,)
+    assert result.lower < result.total_savings < result.upper
+    assert result.lower > 0
+
+
+def test_bootstrap_savings_distribution_matches_the_model_function():
+    pre = _fit("3PC", _threepc)
+    post = _fit("3PC", lambda X: 0.8 * _threepc(X), seed=42)
+    result = bootstrap.bootstrap_savings(
+        pre, post, n_resamples=50, refit="linear", random_state=4
+    )
+    expected = [
+        np.sum(pre.model.f(post.X, *coeffs)) - np.sum(post.y)
+        for coeffs in result.coefficients.coefficients
+    ]
+    assert_array_almost_equal(result.distribution, expected)
@@ -0,0 +1,182 @@
+import io
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from mandvmodeling import cli
+
+from changepointmodel.core.calc import models as ChangepointModelModels
+
+
+def _write_meter(path, seed, n=60):
+    rng = np.random.default_rng(seed)
+    X = rng.uniform(20, 90, n)
+    y = ChangepointModelModels.threepc(X, 500.0, 10.0, 60.0) + rng.normal(0, 5, n)
+    dates = np.arange("2024-01-01", n, dtype="datetime64[D]").astype(str)
+    path.write_text(
+        json.dumps({"X": X.tolist(), "y": y.tolist(), "Date": dates.tolist()})
+    )
+
+
+def _run(argv):
+    stream = io.StringIO()
+    progress = cli.run(cli.build_parser().parse_args(argv), stream=stream)
+    return progress, stream.getvalue()
+
+
+def _results(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+@pytest.fixture
+def meters(tmp_path):
+    folder = tmp_path / "meters"
+    folder.mkdir()
+    for i in range(3):
+        _write_meter(folder / "meter-{}.json".format(i), seed=i)
+    return folder
+
+
+def test_fit_meter_records_errors():
+    result = cli.fit_meter(("m", "f.json", [1.0], [1.0], ["2024-01-01"]), model="6P")
+    assert result["meter_id"] == "m"
+    assert result["status"] == "error"
+
+
+def test_cli_fits_every_meter(meters, tmp_path):
+    output = tmp_path / "out.jsonl"
+    progress, report = _run(
+        [str(meters), "-o", str(output), "--model", "3PC", "-j", "1"]
+    )
+    results = _results(output)
+    assert sorted(r["meter_id"] for r in results) == ["meter-0", "meter-1", "meter-2"]
+    assert all(r["name"] == "3PC" and len(r["coeffs"]) == 3 for r in results)
+    assert progress.fitted == 3
+    assert "meters/s" in report
+    checkpoint = (tmp_path / "out.jsonl.checkpoint").read_text().splitlines()
+    assert [json.loads(line) for line in checkpoint] == [
+        [str(Path(r["source"]).resolve()), r["meter_id"]] for r in results
+    ]
+
+
+def test_cli_resumes_from_checkpoint(meters, tmp_path):
+    output = tmp_path / "out.jsonl"
+    checkpoint = tmp_path / "out.jsonl.checkpoint"
+    _run([str(meters), "-o", str(output), "--model", "3PC", "-j", "1"])
+    first = _results(output)
+
+    # an interrupted run: meter-2 is not checkpointed and its result line is torn
+    checkpoint.write_text(
+        "".join(json.dumps([r["source"], r["meter_id"]]) + "\n" for r in first[:2])
+    )
+    with open(output, "w") as f:
+        f.writelines(json.dumps(r) + "\n" for r in first[:2])
+        f.write('{"meter_id": "meter-2", "na')
+
+    progress, _ = _run([str(meters), "-o", str(output), "--model", "3PC", "-j", "1"])
+    assert progress.fitted == 1
+    assert progress.skipped == 2
+    assert [r["meter_id"] for r in _results(output)] == [
+        "meter-0",
+        "meter-1",
+        "meter-2",
+    ]
+
+    progress, _ = _run(
+        [str(meters), "-o", str(output), "--model", "3PC", "--restart", "-j", "1"]
+    )
+    assert progress.fitted == 3
+    assert len(_results(output)) == 3
+
+
+def test_cli_checkpoint_tells_meters_of_different_files_apart(tmp_path):
+    folder = tmp_path / "sites"
+    for site in ("a", "b"):
+        (folder / site).mkdir(parents=True)
+        _write_meter(folder / site / "meter.json", seed=len(site))
+    output = tmp_path / "out.jsonl"
+    checkpoint = tmp_path / "out.jsonl.checkpoint"
+    _run([str(folder / "a"), "-o", str(output), "--model", "3PC", "-j", "1"])
+
+    # the meter of site b has the same id but was not fitted yet
+    progress, _ = _run(
+        [str(folder / "b"), "-o", str(output), "--model", "3PC", "-j", "1"]
+    )
+    assert progress.fitted == 1
+    assert len(checkpoint.read_text().splitlines()) == 2
+    assert [r["meter_id"] for r in _results(output)] == ["meter", "meter"]
+
+
+def test_cli_resumes_with_a_differently_spelled_input(meters, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    _run(["meters", "-o", "out.jsonl", "--model", "3PC", "-j", "1"])
+    for spelling in ("./meters", str(meters)):
+        progress, _ = _run([spelling, "-o", "out.jsonl", "--model", "3PC", "-j", "1"])
+        assert progress.fitted == 0
+        assert progress.skipped == 3
+    assert len(_results(tmp_path / "out.jsonl")) == 3
+
+
+def test_cli_retries_errors_on_resume(meters, tmp_path, mocker):
+    output = tmp_path / "out.jsonl"
+    fit_model = cli.fit_model
+    mocker.patch(
+        "mandvmodeling.cli.fit_model", side_effect=RuntimeError("transient failure")
+    )
+    progress, _ = _run([str(meters), "-o", str(output), "--model", "3PC", "-j", "1"])
+    assert progress.errors == 3
+    assert (tmp_path / "out.jsonl.checkpoint").read_text() == ""
+
+    mocker.patch("mandvmodeling.cli.fit_model", side_effect=fit_model)
+    progress, _ = _run([str(meters), "-o", str(output), "--model", "3PC", "-j", "1"])
+    assert progress.fitted == 3 and progress.errors == 0
+    assert [r["status"] for r in _results(output)] == ["ok"] * 3
+
+
+def test_cli_process_workers(meters, tmp_path):
+    output = tmp_path / "out.jsonl"
+    progress, _ = _run([str(meters), "-o", str(output), "--model", "3PC", "-j", "2"])
+    assert progress.fitted == 3
+    assert sorted(r["meter_id"] for r in _results(output)) == [
+        "meter-0",
+        "meter-1",
+        "meter-2",
+    ]
+
+
+def test_cli_streams_sorted_csv_by_day_type(tmp_path):
+    rng = np.random.default_rng(0)
+    dates = np.arange("2024-01-01", 60, dtype="datetime64[D]").astype(str)
+    path = tmp_path / "portfolio.csv"
+    with open(path, "w") as f:
+        f.write("meter_id,date,X,y\n")
+        for meter in ("a", "b"):
+            X = rng.uniform(20, 90, len(dates))
+            y = ChangepointModelModels.threepc(X, 500.0, 10.0, 60.0)
+            for row in zip(dates, X, y + rng.normal(0, 5, len(dates))):
+                f.write("{},{},{},{}\n".format(meter, *row))
+
+    output = tmp_path / "out.jsonl"
+    progress, _ = _run(
+        [
+            str(path),
+            "-o",
+            str(output),
+            "--model",
+            "3PC",
+            "-j",
+            "1",
+            "--sorted",
+            "--day-types",
+        ]
+    )
+    assert progress.fitted == 4
+    assert [r["meter_id"] for r in _results(output)] == [
+        "a/weekday",
+        "a/weekend",
+        "b/weekday",
+        "b/weekend",
+    ]
@@ -0,0 +1,145 @@
+import numpy as np
+import pytest
+from numpy.testing import assert_almost_equal, assert_array_almost_equal
+
+from mandvmodeling.core import cross_validation
+from mandvmodeling.core.calc import piecewise
+from mandvmodeling.core.estimator import MandVEnergyChangepointEstimator
+from mandvmodeling.core.pmodels import (
+    MandVParameterModelFunction,
+    create_model_function,
+)
+from mandvmodeling.core.schemas import MandVDataModel
+
+from changepointmodel.core.calc import models as ChangepointModelModels
+from changepointmodel.core.pmodels import ThreeParameterCoolingModel
+from changepointmodel.core.pmodels.coeffs_parser import (
+    ThreeParameterCoefficientsParser,
+)
+
+
+def _fit(name, f, n=60, counts=False):
+    rng = np.random.default_rng(1729)
+    X = rng.uniform(20, 90, n)
+    y = f(X) + rng.normal(0, 5, n)
+    sensor_reading_timestamps = np.arange("2024-01-01", n, dtype="datetime64[D]")
+    est = MandVEnergyChangepointEstimator(create_model_function(name))
+    return est.fit(
+        MandVDataModel(
+            X=X,
+            y=y,
+            sensor_reading_timestamps=sensor_reading_timestamps,
+            counts=rng.integers(1, 10, n) if counts else None,
+        )
+    )
+
+
+def _refit_residuals(est, folds):
+    # brute force: refit the linear model with fixed changepoints without each fold
+    kind = piecewise.model_kind(est.model.f)
+    _, changepoints = piecewise.split_coefficients(kind, est.coeffs)
+    A = piecewise.design_matrix(kind, est.X, changepoints)
+    sw = np.ones_like(est.y) if est.sigma_ is None else 1 / est.sigma_
+    out = np.empty(len(est.y))
+    for fold in np.unique(folds):
+        test = folds == fold
+        beta = np.linalg.lstsq(
+            A[~test] * sw[~test, None], est.y[~test] * sw[~test], rcond=None
+        )[0]
+        out[test] = est.y[test] - A[test] @ beta
+    return out
+
+
+def test_design_matrix_reproduces_model_functions():
+    X = np.linspace(20, 90, 30)
+    cases = [
+        ("2P", ChangepointModelModels.twop, (10.0, 2.0)),
+        ("3PC", ChangepointModelModels.threepc, (10.0, 2.0, 55.0)),
+        ("3PH", ChangepointModelModels.threeph, (10.0, -2.0, 55.0)),
+        ("4P", ChangepointModelModels.fourp, (10.0, -2.0, 3.0, 55.0)),
+        ("5P", ChangepointModelModels.fivep, (10.0, -2.0, 3.0, 40.0, 70.0)),
+        # crossed changepoints, where the right segment wins for X >= rcp
+        ("5P", ChangepointModelModels.fivep, (10.0, -2.0, 3.0, 70.0, 40.0)),
+    ]
+    for kind, f, coeffs in cases:
+        assert piecewise.model_kind(f) == kind
+        linear, changepoints = piecewise.split_coefficients(kind, coeffs)
+        A = piecewise.design_matrix(kind, X, changepoints)
+        assert_array_almost_equal(A @ linear, f(X, *coeffs))
+
+    with pytest.raises(ValueError):
+        piecewise.model_kind(np.sum)
+
+
+def test_leave_one_out_matches_refitting():
+    est = _fit("3PC", lambda X: ChangepointModelModels.threepc(X, 500.0, 10.0, 60.0))
+    res = cross_validation.leave_one_out(est)
+
+    expected = _refit_residuals(est, np.arange(len(est.y)))
+    assert_array_almost_equal(res.residuals, expected)
+    assert_almost_equal(res.press, np.sum(expected**2))
+    assert res.rmse > est.rmse()
+    assert_almost_equal(res.cvrmse, res.rmse / np.mean(est.y))
+
+
+@pytest.mark.parametrize("blocked", [True, False])
+def test_kfold_matches_refitting(blocked):
+    est = _fit(
+        "5P",
+        lambda X: ChangepointModelModels.fivep(X, 500.0, -8.0, 10.0, 45.0, 65.0),
+        n=100,
+    )
+    res = cross_validation.kfold(est, n_splits=4, blocked=blocked, random_state=3)
+
+    assert sorted(np.bincount(res.folds)) == [25, 25, 25, 25]
+    assert_array_almost_equal(res.residuals, _refit_residuals(est, res.folds))
+
+
+def test_kfold_blocked_folds_follow_timestamps():
+    est = _fit("2P", lambda X: 100.0 + 2.0 * X, n=10)
+    folds = cross_validation.kfold_folds(est, n_splits=2)
+
+    order = np.argsort(est.sensor_reading_timestamps)
+    assert list(folds[order]) == [0] * 5 + [1] * 5
+
+    with pytest.raises(ValueError):
+        cross_validation.kfold_folds(est, n_splits=11)
+
+
+def test_weighted_cross_validation_matches_weighted_refitting():
+    est = _fit(
+        "4P",
+        lambda X: ChangepointModelModels.fourp(X, 500.0, -8.0, 10.0, 60.0),
+        counts=True,
+    )
+    assert est.sigma_ is not None
+    loo = cross_validation.leave_one_out(est)
+    assert_array_almost_equal(loo.residuals, _refit_residuals(est, loo.folds))
+    res = cross_validation.kfold(est, n_splits=5)
+    assert_array_almost_equal(res.residuals, _refit_residuals(est, res.folds))
+
+
+def test_leave_one_out_scores_skip_a_single_point_beyond_the_changepoint():
+    X = np.append(np.linspace(20, 88, 29), 90.0)
+    y = 100 + np.random.default_rng(5).normal(0, 1, 30)
+    y[-1] += 50
+    # the changepoint bounds leave only the last point beyond the changepoint
+    model = MandVParameterModelFunction(
+        name="3PC",
+        f=ChangepointModelModels.threepc,
+        bounds=((0, 0, 88.0), (np.inf, np.inf, 89.9)),
+        parameter_model=ThreeParameterCoolingModel(),
+        coefficients_parser=ThreeParameterCoefficientsParser(),
+    )
+    sensor_reading_timestamps = np.arange("2024-01-01", 30, dtype="datetime64[D]")
+    est = MandVEnergyChangepointEstimator(model).fit(
+        MandVDataModel(X=X, y=y, sensor_reading_timestamps=sensor_reading_timestamps)
+    )
+
+    res = cross_validation.leave_one_out(est)
+    missing = np.isnan(res.residuals)
+    assert missing.sum() == 1 and missing[-1]
+    expected = res.residuals[~missing]
+    assert_almost_equal(res.press, np.sum(expected**2))
+    assert_almost_equal(res.rmse, np.sqrt(np.mean(expected**2)))
+    assert np.isfinite(res.cvrmse)
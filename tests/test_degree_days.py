@@ -0,0 +1,122 @@
+import numpy as np
+import pytest
+
+from mandvmodeling.core import degree_days
+from mandvmodeling.core.schemas import MandVDataModel
+
+
+def _hourly(days=60, seed=0):
+    rng = np.random.default_rng(seed)
+    timestamps = np.arange("2024-01-01T00", days * 24, dtype="datetime64[h]")
+    hours = np.arange(days * 24)
+    T = 50 + 20 * np.sin(2 * np.pi * hours / (24 * 30)) + rng.normal(0, 4, len(hours))
+    return T, timestamps
+
+
+def _brute(T, timestamps, b):
+    days = timestamps.astype("datetime64[D]")
+    hdd, cdd = [], []
+    for day in np.unique(days):
+        t = T[days == day]
+        hdd.append(np.maximum(b - t, 0).sum() / 24)
+        cdd.append(np.maximum(t - b, 0).sum() / 24)
+    return np.array(hdd), np.array(cdd)
+
+
+def test_degree_days_match_brute_force():
+    T, timestamps = _hourly()
+    table = degree_days.degree_day_table(T, timestamps)
+    assert table.n_periods == 60
+    assert table.duration == pytest.approx(1 / 24)
+
+    balance_points = np.array([-100.0, 30.0, 55.5, 65.0, 200.0])
+    hdd, cdd = table.hdd(balance_points), table.cdd(balance_points)
+    assert hdd.shape == cdd.shape == (60, 5)
+    for i, b in enumerate(balance_points):
+        expected_hdd, expected_cdd = _brute(T, timestamps, b)
+        np.testing.assert_allclose(hdd[:, i], expected_hdd, atol=1e-9)
+        np.testing.assert_allclose(cdd[:, i], expected_cdd, atol=1e-9)
+    np.testing.assert_allclose(table.hdd(65.0), hdd[:, 3])
+
+
+def test_daily_temperatures_and_billing_periods():
+    days = np.arange("2024-01-01", "2024-04-01", dtype="datetime64[D]")
+    T = np.linspace(20, 80, len(days))
+    boundaries = np.array(
+        ["2024-01-05", "2024-02-03", "2024-03-06"], dtype="datetime64[D]"
+    )
+    table = degree_days.degree_day_table(T, days, periods=boundaries)
+    assert table.duration == 1.0
+    np.testing.assert_array_equal(table.days, [29, 32])
+    np.testing.assert_array_equal(table.counts, [29, 32])
+
+    inside = (days >= boundaries[0]) & (days < boundaries[1])
+    assert table.hdd(65.0)[0] == pytest.approx(np.maximum(65.0 - T[inside], 0).sum())
+
+    monthly = degree_days.degree_day_table(T, days, periods="M")
+    np.testing.assert_array_equal(monthly.days, [31, 29, 31])
+    assert monthly.period_starts[1] == np.datetime64("2024-02")
+
+    with pytest.raises(ValueError):
+        degree_days.degree_day_table(T, days, periods=boundaries[::-1])
+
+
+def test_station_table_is_cached():
+    T, timestamps = _hourly(days=10)
+    cache = degree_days.DegreeDayCache(maxsize=2)
+    table = degree_days.station_table("KBOS", T, timestamps, cache=cache)
+    assert degree_days.station_table("KBOS", T, timestamps, cache=cache) is table
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    monthly = degree_days.station_table("KBOS", T, timestamps, periods="M", cache=cache)
+    assert monthly is not table
+    degree_days.station_table("KJFK", T, timestamps, cache=cache)
+    assert len(cache) == 2
+    assert degree_days.station_table("KBOS", T, timestamps, cache=None) is not table
+
+
+def _bills(table, heating=55.0, cooling=None, seed=1):
+    rng = np.random.default_rng(seed)
+    y = 10 + 3.0 * table.hdd(heating) / table.days
+    if cooling is not None:
+        y = y + 5.0 * table.cdd(cooling) / table.days
+    return (y + rng.normal(0, 0.01, len(y))) * table.days
+
+
+def test_balance_point_search():
+    T, timestamps = _hourly(days=120)
+    table = degree_days.degree_day_table(T, timestamps)
+    candidates = np.arange(40.0, 70.5, 0.5)
+
+    result = degree_days.balance_point_search(table, _bills(table), heating=candidates)
+    assert result.kind == "heating"
+    assert result.sse.shape == candidates.shape
+    assert result.balance_point == (55.0,)
+    np.testing.assert_allclose(result.coefficients, (10.0, 3.0), atol=0.01)
+    assert result.r2.max() > 0.999
+
+    both = degree_days.balance_point_search(
+        table,
+        _bills(table, heating=45.0, cooling=60.0),
+        heating=candidates,
+        cooling=candidates,
+    )
+    assert both.sse.shape == (len(candidates), len(candidates))
+    assert both.balance_point == (45.0, 60.0)
+    np.testing.assert_allclose(both.coefficients, (10.0, 3.0, 5.0), atol=0.05)
+    # pairs with the heating balance point above the cooling balance point are skipped
+    assert np.isinf(both.sse[-1, 0])
+
+    with pytest.raises(ValueError):
+        degree_days.balance_point_search(table, _bills(table))
+
+
+def test_data_model():
+    T, timestamps = _hourly(days=30)
+    table = degree_days.degree_day_table(T, timestamps)
+    data_model = table.data_model(_bills(table), 55.0)
+    assert isinstance(data_model, MandVDataModel)
+    assert len(data_model.X) == 30
+    np.testing.assert_allclose(
+        np.sort(data_model.X.reshape(-1)), np.sort(table.hdd(55.0))
+    )
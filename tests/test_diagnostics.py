@@ -0,0 +1,99 @@
+import numpy as np
+from numpy.testing import assert_almost_equal
+
+from mandvmodeling.core.calc.statistics import FitStatistics
+from mandvmodeling.core.diagnostics import score_estimators
+from mandvmodeling.core.estimator import MandVEnergyChangepointEstimator
+from mandvmodeling.core.pmodels import create_model_function
+from mandvmodeling.core.schemas import MandVDataModel
+
+from changepointmodel.core.calc import models as ChangepointModelModels
+from sklearn import metrics
+
+
+def _fit(name, y):
+    X = np.linspace(20, 90, 60)
+    sensor_reading_timestamps = np.arange(
+        "2024-01-01", "2024-03-01", dtype="datetime64[D]"
+    )
+    est = MandVEnergyChangepointEstimator(create_model_function(name))
+    est.fit(
+        MandVDataModel(X=X, y=y(X), sensor_reading_timestamps=sensor_reading_timestamps)
+    )
+    return est
+
+
+def test_fit_statistics_match_sklearn_metrics():
+    rng = np.random.default_rng(1729)
+    y = rng.normal(100, 10, 50)
+    pred_y = y + rng.normal(0, 3, 50)
+
+    stats = FitStatistics.from_arrays(y, pred_y, n_params=2)
+    assert stats.n == 50
+    assert_almost_equal(stats.r2, metrics.r2_score(y, pred_y))
+    assert_almost_equal(stats.rmse, np.sqrt(metrics.mean_squared_error(y, pred_y)))
+    assert_almost_equal(stats.cvrmse, stats.rmse / np.mean(y))
+    assert_almost_equal(stats.total_pred_y, np.sum(pred_y))
+    assert_almost_equal(stats.residuals, y - pred_y)
+
+
+def test_fit_statistics_constant_y():
+    y = np.full(5, 3.0)
+    assert FitStatistics.from_arrays(y, y, n_params=2).r2 == 1.0
+    assert FitStatistics.from_arrays(y, y + 1, n_params=2).r2 == 0.0
+
+
+def test_score_estimators():
+    rng = np.random.default_rng(1729)
+    noise = rng.normal(0, 5, 60)
+    est_2p = _fit("2P", lambda X: 100.0 + 2.0 * X + noise)
+    est_3pc = _fit(
+        "3PC", lambda X: ChangepointModelModels.threepc(X, 500.0, 10.0, 60.0) + noise
+    )
+    est_flat = _fit("2P", lambda X: np.full(len(X), 5.0))
+
+    scores = score_estimators([est_2p, est_3pc, est_flat])
+
+    assert scores.shape == (3,)
+    assert list(scores["name"]) == ["2P", "3PC", "2P"]
+    assert list(scores["status"]) == ["ok", "ok", "not_fittable"]
+    assert_almost_equal(scores["r2"][:2], [est_2p.r2(), est_3pc.r2()])
+    assert_almost_equal(scores["cvrmse"][:2], [est_2p.cvrmse(), est_3pc.cvrmse()])
+    assert_almost_equal(scores["adjusted_r2"][1], est_3pc.adjusted_r2())
+    assert np.isnan(scores["heating_tstat"][1])
+    assert_almost_equal(scores["cooling_tstat"][1], est_3pc.tstat()[1])
+    assert tuple(scores[["heating_points", "cooling_points"]][1]) == est_3pc.dpop()
+    assert scores["heating_points"][2] == -1
+    assert scores["shape"][0]
+    assert score_estimators([]).shape == (0,)
+
+
+def test_point_counts_are_computed_at_fit_time(mocker):
+    est = _fit("2P", lambda X: 100.0 + 2.0 * X)
+    dpop = mocker.patch.object(est.model, "dpop")
+    scores = score_estimators([est])
+    dpop.assert_not_called()
+    assert scores["cooling_points"][0] == len(est.y)
+
+
+def test_weighted_fit_statistics_match_sklearn_metrics():
+    rng = np.random.default_rng(1729)
+    y = rng.normal(100, 10, 50)
+    pred_y = y + rng.normal(0, 3, 50)
+    weights = rng.uniform(0.5, 24, 50)
+
+    stats = FitStatistics.from_arrays(y, pred_y, n_params=2, weights=weights)
+    assert_almost_equal(stats.r2, metrics.r2_score(y, pred_y, sample_weight=weights))
+    assert_almost_equal(
+        stats.rmse,
+        np.sqrt(metrics.mean_squared_error(y, pred_y, sample_weight=weights)),
+    )
+    assert_almost_equal(stats.cvrmse, stats.rmse / np.average(y, weights=weights))
+    assert_almost_equal(stats.total_y, np.sum(y))
+    assert_almost_equal(np.mean(stats.weights), 1.0)
+
+    # equal weights are the unweighted statistics
+    unweighted = FitStatistics.from_arrays(y, pred_y, n_params=2)
+    equal = FitStatistics.from_arrays(y, pred_y, n_params=2, weights=np.full(50, 3.0))
+    assert_almost_equal(equal.r2, unweighted.r2)
+    assert_almost_equal(equal.rmse, unweighted.rmse)
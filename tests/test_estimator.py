@@ -12,13 +12,20 @@ import pytest
 from sklearn.exceptions import NotFittedError
 
 from mandvmodeling.core.pmodels import MandVParameterModelFunction
-from mandvmodeling.core.estimator import MandVEnergyChangepointEstimator
+from mandvmodeling.core.estimator import (
+    FitStatus,
+    MandVCurvefitEstimator,
+    MandVEnergyChangepointEstimator,
+)
 from mandvmodeling.core.schemas import MandVDataModel
+from mandvmodeling.core.budget import FitBudget
+from mandvmodeling.core.calc import checks
+from mandvmodeling.core.calc.bounds import daily_bounds
 
 # `cunybpl/changepointmodel` imports
 from changepointmodel.core.pmodels import TwoParameterModel
 from changepointmodel.core.pmodels.coeffs_parser import TwoParameterCoefficientParser
-from changepointmodel.core.calc.models import twop
+from changepointmodel.core.calc.models import twop, threepc, fivep
 
 
 def test_mandvenergychangepointestimator_fit_calls_mandvcurvefitestimator_fit(mocker):
@@ -407,3 +414,313 @@ def test_estimator_scalar_handling_for_load_and_nac(mocker):
     nac_scaled = est.nac(reshaped_X, scalar=30.437)
 
     assert_almost_equal(nac_scaled, nac_not_scaled * 30.437)
+
+
+def test_mandvcurvefitestimator_not_fittable_data_skips_curve_fit(mocker):
+    mock = mocker.patch("mandvmodeling.core.estimator.optimize.curve_fit")
+
+    X = np.linspace(1, 10, 10).reshape(-1, 1)
+    y = np.ones(10)
+    est = MandVCurvefitEstimator(model_func=twop)
+    est.fit(X, y)
+
+    mock.assert_not_called()
+    assert est.fit_status_ is FitStatus.NOT_FITTABLE
+    assert est.fit_check_.reason == checks.CONSTANT_Y
+    assert np.isnan(est.popt_).all()
+    assert est.popt_.shape == (2,)
+    assert est.pcov_.shape == (2, 2)
+
+
+def test_mandvcurvefitestimator_short_series_with_daily_bounds_not_fittable():
+    X = np.linspace(1, 10, 5).reshape(-1, 1)
+    y = np.linspace(1, 10, 5)
+
+    # daily_bounds.fivep indexes X[5], which raises an IndexError on 5 points
+    est = MandVCurvefitEstimator(model_func=fivep, bounds=daily_bounds.fivep)
+    est.fit(X, y)
+    assert est.fit_status_ is FitStatus.NOT_FITTABLE
+    assert est.fit_check_.reason == checks.TOO_FEW_POINTS
+
+    est = MandVCurvefitEstimator(
+        model_func=fivep, bounds=daily_bounds.fivep, p0=(1.0, 1.0, 1.0, 1.0, 1.0)
+    )
+    est.fit(X, y)
+    assert est.fit_check_.reason == checks.TOO_FEW_POINTS
+
+
+def test_mandvcurvefitestimator_nan_data_is_not_fittable():
+    X = np.linspace(1, 10, 10).reshape(-1, 1)
+    y = np.linspace(1, 10, 10)
+    y[4] = np.nan
+
+    est = MandVCurvefitEstimator(model_func=twop)
+    est.fit(X, y)
+    assert est.fit_check_.reason == checks.NONFINITE
+
+    est = MandVCurvefitEstimator(model_func=twop, precheck=False)
+    with pytest.raises(ValueError):
+        est.fit(X, y)
+
+
+def test_mandvcurvefitestimator_bounded_model_without_changepoints_is_fittable():
+    def linear(X, a, b):
+        return a + b * X.squeeze()
+
+    X = np.linspace(100, 200, 20).reshape(-1, 1)
+    y = 2.0 + 3.0 * X.squeeze()
+    # both coefficients are bounded on both sides, but neither is a changepoint
+    est = MandVCurvefitEstimator(model_func=linear, bounds=((0, 0), (10, 10)))
+    est.fit(X, y)
+    assert est.fit_status_ is FitStatus.OK
+    assert_array_almost_equal(est.popt_, (2.0, 3.0))
+
+    # the changepoint of a built-in model must still have data in its range
+    est = MandVCurvefitEstimator(model_func=threepc, bounds=((0, 0, 0), (10, 10, 10)))
+    est.fit(X, y)
+    assert est.fit_check_.reason == checks.EMPTY_CHANGEPOINT_RANGE
+
+
+def test_mandvenergychangepointestimator_not_fittable_sets_status():
+    bounds = ((0, -np.inf), (np.inf, np.inf))
+    mymodel = MandVParameterModelFunction(
+        name="2P",
+        f=twop,
+        bounds=bounds,
+        parameter_model=TwoParameterModel(),
+        coefficients_parser=TwoParameterCoefficientParser(),
+    )
+
+    X = np.linspace(1, 10, 10)
+    y = np.full(10, 5.0)
+    sensor_reading_timestamps = np.arange(
+        "2024-10-20", "2024-10-30", dtype="datetime64[D]"
+    )
+    data_model = MandVDataModel(
+        X=X, y=y, sensor_reading_timestamps=sensor_reading_timestamps
+    )
+
+    est = MandVEnergyChangepointEstimator(mymodel)
+    est.fit(data_model)
+    assert est.fit_status is FitStatus.NOT_FITTABLE
+    assert est.fit_check.reason == checks.CONSTANT_Y
+    assert np.isnan(est.pred_y).all()
+
+    est.fit(
+        MandVDataModel(
+            X=X,
+            y=np.linspace(1, 10, 10),
+            sensor_reading_timestamps=sensor_reading_timestamps,
+        )
+    )
+    assert est.fit_status is FitStatus.OK
+    assert est.fit_check.fittable
+
+
+def test_unfit_estimator_raises_notfittederror_on_fit_status():
+    est = MandVEnergyChangepointEstimator()
+    with pytest.raises(NotFittedError):
+        est.fit_status
+
+
+def test_mandvcurvefitestimator_max_nfev_budget_returns_best_so_far():
+    X = np.linspace(1, 10, 50).reshape(-1, 1)
+    y = fivep(X, 10.0, -2.0, 3.0, 4.0, 7.0)
+
+    est = MandVCurvefitEstimator(
+        model_func=fivep, bounds=daily_bounds.fivep, p0=(1.0, -1.0, 1.0, 3.0, 8.0)
+    )
+    est.fit(X, y, budget=FitBudget(max_nfev=2))
+
+    assert est.fit_status_ is FitStatus.MAX_NFEV
+    assert est.popt_.shape == (5,)
+    assert np.isfinite(est.popt_).all()
+    assert np.isinf(est.pcov_).all()
+    assert est.nfev_ > 0
+
+    est.fit(X, y, budget=FitBudget(max_nfev=1000))
+    assert est.fit_status_ is FitStatus.OK
+    assert_array_almost_equal(est.popt_, (10.0, -2.0, 3.0, 4.0, 7.0), decimal=2)
+
+
+def test_mandvcurvefitestimator_timeout_budget(mocker):
+    mocker.patch("mandvmodeling.core.budget.time.perf_counter", side_effect=[0, 0, 10])
+    X = np.linspace(1, 10, 10).reshape(-1, 1)
+    y = np.linspace(1, 10, 10)
+
+    est = MandVCurvefitEstimator(model_func=twop, p0=(0.5, 0.5))
+    est.fit(X, y, budget=FitBudget(timeout=1))
+
+    assert est.fit_status_ is FitStatus.TIMEOUT
+    assert est.nfev_ == 1
+    assert_array_equal(est.popt_, (0.5, 0.5))
+
+
+def test_fit_budget_validates_values():
+    with pytest.raises(ValueError):
+        FitBudget(max_nfev=0)
+    with pytest.raises(ValueError):
+        FitBudget(timeout=-1)
+
+
+def test_mandvenergychangepointestimator_uses_model_fit_budget(mocker):
+    budget = FitBudget(max_nfev=100)
+    mymodel = MandVParameterModelFunction(
+        name="2P",
+        f=twop,
+        bounds=((0, -np.inf), (np.inf, np.inf)),
+        parameter_model=TwoParameterModel(),
+        coefficients_parser=TwoParameterCoefficientParser(),
+        fit_budget=budget,
+    )
+    assert mymodel.fit_budget is budget
+
+    X = np.linspace(1, 10, 10)
+    y = np.linspace(1, 10, 10)
+    sensor_reading_timestamps = np.arange(
+        "2024-10-20", "2024-10-30", dtype="datetime64[D]"
+    )
+    data_model = MandVDataModel(
+        X=X, y=y, sensor_reading_timestamps=sensor_reading_timestamps
+    )
+
+    spy = mocker.spy(MandVCurvefitEstimator, "fit")
+    est = MandVEnergyChangepointEstimator(mymodel)
+    est.fit(data_model)
+    assert spy.call_args.kwargs["budget"] is budget
+    assert est.fit_status is FitStatus.OK
+
+    # a budget passed to fit overrides the one on the model
+    other = FitBudget(timeout=60)
+    est.fit(data_model, budget=other)
+    assert spy.call_args.kwargs["budget"] is other
+
+
+def test_estimator_diagnostics_are_cached_until_next_fit(mocker):
+    mymodel = MandVParameterModelFunction(
+        name="2P",
+        f=twop,
+        bounds=((0, -np.inf), (np.inf, np.inf)),
+        parameter_model=TwoParameterModel(),
+        coefficients_parser=TwoParameterCoefficientParser(),
+    )
+
+    X = np.linspace(1, 10, 10)
+    y = np.linspace(1, 10, 10) + np.array([0.1, -0.1] * 5)
+    sensor_reading_timestamps = np.arange(
+        "2024-10-20", "2024-10-30", dtype="datetime64[D]"
+    )
+    data_model = MandVDataModel(
+        X=X, y=y, sensor_reading_timestamps=sensor_reading_timestamps
+    )
+
+    est = MandVEnergyChangepointEstimator(mymodel)
+    est.fit(data_model)
+    assert_array_almost_equal(est.statistics.residuals, est.y - est.pred_y)
+    assert_almost_equal(est.total_y(), np.sum(y))
+    assert_almost_equal(est.total_pred_y(), np.sum(est.pred_y))
+    assert est.len_y() == 10
+
+    tstat_spy = mocker.spy(mymodel, "tstat")
+    dpop_spy = mocker.spy(mymodel, "dpop")
+    load_spy = mocker.spy(mymodel, "load")
+    for _ in range(3):
+        est.tstat()
+        est.dpop()
+        est.load()
+    assert tstat_spy.call_count == 1
+    # the point counts were computed at fit time
+    assert dpop_spy.call_count == 0
+    assert load_spy.call_count == 1
+
+    est.load(scalar=2.0)
+    assert load_spy.call_count == 2
+
+    est.fit(data_model)
+    est.tstat()
+    est.dpop()
+    assert tstat_spy.call_count == 2
+    assert dpop_spy.call_count == 1
+
+
+def test_unfit_estimator_raises_notfittederror_on_diagnostics():
+    est = MandVEnergyChangepointEstimator()
+
+    with pytest.raises(NotFittedError):
+        est.r2()
+
+    with pytest.raises(NotFittedError):
+        est.tstat()
+
+    with pytest.raises(NotFittedError):
+        est.statistics
+
+
+def _weighted_data_model(**kwargs):
+    rng = np.random.default_rng(7)
+    X = rng.uniform(20, 90, 60)
+    y = twop(X, 100.0, 2.0) + rng.normal(0, 5, 60)
+    # readings with partial coverage are off
+    y[:10] += 40.0
+    return MandVDataModel(
+        X=X,
+        y=y,
+        sensor_reading_timestamps=np.arange("2024-01-01", 60, dtype="datetime64[D]"),
+        **kwargs,
+    )
+
+
+def _twop_model():
+    return MandVParameterModelFunction(
+        name="2P",
+        f=twop,
+        bounds=((-np.inf, -np.inf), (np.inf, np.inf)),
+        parameter_model=TwoParameterModel(),
+        coefficients_parser=TwoParameterCoefficientParser(),
+    )
+
+
+def test_mandvenergychangepointestimator_fit_uses_data_model_sigma():
+    sigma = np.where(np.arange(60) < 10, 10.0, 1.0)
+    unsorted = _weighted_data_model()
+    # the data model sorts sigma along with X
+    data_model = _weighted_data_model(sigma=sigma, absolute_sigma=True)
+
+    est = MandVEnergyChangepointEstimator(model=_twop_model()).fit(data_model)
+    explicit = MandVEnergyChangepointEstimator(model=_twop_model()).fit(
+        unsorted, sigma=sigma[unsorted.order], absolute_sigma=True
+    )
+    assert_array_almost_equal(est.coeffs, explicit.coeffs)
+    assert_array_almost_equal(est.cov, explicit.cov)
+    assert est.absolute_sigma_ is True
+
+    plain = MandVEnergyChangepointEstimator(model=_twop_model()).fit(unsorted)
+    truth = twop(data_model.X, 100.0, 2.0)
+    assert np.abs(est.pred_y - truth).mean() < np.abs(plain.pred_y - truth).mean()
+
+    # sigma passed to fit takes precedence
+    unweighted = MandVEnergyChangepointEstimator(model=_twop_model()).fit(
+        data_model, sigma=np.ones(60), absolute_sigma=False
+    )
+    assert_array_almost_equal(unweighted.coeffs, plain.coeffs)
+
+
+def test_mandvenergychangepointestimator_fit_weights_by_counts():
+    counts = np.where(np.arange(60) < 10, 1.0, 24.0)
+    est = MandVEnergyChangepointEstimator(model=_twop_model()).fit(
+        _weighted_data_model(counts=counts)
+    )
+    explicit = MandVEnergyChangepointEstimator(model=_twop_model()).fit(
+        _weighted_data_model(sigma=counts**-0.5)
+    )
+    assert_array_almost_equal(est.coeffs, explicit.coeffs)
+
+    # the weighted scores discount the partial readings
+    assert est.weighted_statistics.weights is not None
+    assert est.weighted_statistics.rmse < est.rmse()
+    assert est.weighted_statistics.total_y == est.total_y()
+
+    plain = MandVEnergyChangepointEstimator(model=_twop_model()).fit(
+        _weighted_data_model()
+    )
+    assert plain.weighted_statistics is plain.statistics
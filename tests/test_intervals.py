@@ -0,0 +1,129 @@
+import numpy as np
+import pytest
+import scipy.stats
+from numpy.testing import assert_array_almost_equal
+
+from mandvmodeling.core.calc import intervals, piecewise
+from mandvmodeling.core.estimator import MandVEnergyChangepointEstimator
+from mandvmodeling.core.intervals import batch_intervals
+from mandvmodeling.core.pmodels import create_model_function
+from mandvmodeling.core.schemas import MandVDataModel
+
+from changepointmodel.core.calc import models as ChangepointModelModels
+
+
+def _fit(name, f, n=80, seed=1729, counts=False):
+    rng = np.random.default_rng(seed)
+    X = rng.uniform(20, 90, n)
+    y = f(X) + rng.normal(0, 5, n)
+    sensor_reading_timestamps = np.arange("2024-01-01", n, dtype="datetime64[D]")
+    est = MandVEnergyChangepointEstimator(create_model_function(name))
+    return est.fit(
+        MandVDataModel(
+            X=X,
+            y=y,
+            sensor_reading_timestamps=sensor_reading_timestamps,
+            counts=rng.integers(1, 24, n) if counts else None,
+        )
+    )
+
+
+def _threepc(X):
+    return ChangepointModelModels.threepc(X, 500.0, 10.0, 60.0)
+
+
+def _fourp(X):
+    return ChangepointModelModels.fourp(X, 500.0, -5.0, 10.0, 55.0)
+
+
+def test_canonical_jacobian_matches_numerical_jacobian():
+    # avoid points at the changepoints, where the models are not differentiable
+    X = np.linspace(20.5, 90.5, 40)
+    cases = [
+        ("2P", ChangepointModelModels.twop, (10.0, 2.0)),
+        ("3PC", ChangepointModelModels.threepc, (10.0, 2.0, 55.0)),
+        ("3PH", ChangepointModelModels.threeph, (10.0, -2.0, 55.0)),
+        ("4P", ChangepointModelModels.fourp, (10.0, -2.0, 3.0, 55.0)),
+        ("5P", ChangepointModelModels.fivep, (10.0, -2.0, 3.0, 40.0, 70.0)),
+    ]
+    for kind, f, coeffs in cases:
+        T = piecewise.canonical_map(kind)
+        assert_array_almost_equal(
+            T @ np.array(coeffs), piecewise.canonical_coefficients(kind, coeffs)
+        )
+        # chain rule: the Jacobian of the model is the 5P Jacobian times T
+        J = intervals.canonical_jacobian(X, T @ np.array(coeffs)) @ T
+        assert_array_almost_equal(
+            J, intervals.numerical_jacobian(f, X, coeffs), decimal=4
+        )
+
+
+def test_estimator_intervals():
+    est = _fit("3PC", _threepc)
+    X = np.linspace(20, 90, 200).reshape(-1, 1)
+    bands = est.intervals(X, confidence=0.9)
+
+    assert_array_almost_equal(bands.pred_y, est.predict(X))
+    assert (bands.confidence_lower <= bands.pred_y).all()
+    assert (bands.prediction_lower < bands.confidence_lower).all()
+    assert (bands.prediction_upper > bands.confidence_upper).all()
+
+    # the same as the bands from a forward difference Jacobian
+    stats = est.statistics
+    dof = stats.n - stats.n_params
+    expected = intervals.bands(
+        est.predict(X),
+        intervals.numerical_jacobian(est.model.f, X.reshape(-1), est.coeffs),
+        est.cov,
+        stats.sse / dof,
+        dof,
+        confidence=0.9,
+    )
+    assert_array_almost_equal(
+        bands.confidence_upper, expected.confidence_upper, decimal=3
+    )
+
+    # a wider confidence level gives wider bands
+    wider = est.intervals(X, confidence=0.99)
+    assert (wider.prediction_upper > bands.prediction_upper).all()
+
+    with pytest.raises(ValueError):
+        est.intervals(X, confidence=1.5)
+
+
+def test_batch_intervals_match_single_estimators():
+    estimators = [_fit("3PC", _threepc), _fit("4P", _fourp), _fit("2P", _threepc)]
+    X = np.linspace(20, 90, 100)
+    bands = batch_intervals(estimators, X, confidence=0.8)
+    assert bands.pred_y.shape == (3, 100)
+
+    for i, est in enumerate(estimators):
+        single = est.intervals(X.reshape(-1, 1), confidence=0.8)
+        for field in (
+            "pred_y",
+            "confidence_lower",
+            "confidence_upper",
+            "prediction_lower",
+            "prediction_upper",
+        ):
+            assert_array_almost_equal(getattr(bands, field)[i], getattr(single, field))
+
+
+def test_weighted_intervals_use_the_weighted_residual_variance():
+    est = _fit("3PC", _threepc, counts=True)
+    X = np.linspace(20, 90, 50)
+    bands = est.intervals(X.reshape(-1, 1), confidence=0.9)
+
+    stats = est.weighted_statistics
+    dof = stats.n - stats.n_params
+    t = scipy.stats.t.ppf(0.95, dof)
+    mean_halfwidth = bands.confidence_upper - bands.pred_y
+    observation_halfwidth = bands.prediction_upper - bands.pred_y
+    assert_array_almost_equal(
+        observation_halfwidth**2 - mean_halfwidth**2,
+        np.full(len(X), t**2 * stats.sse / dof),
+    )
+    assert stats.sse != est.statistics.sse
+
+    single = batch_intervals([est], X, confidence=0.9)
+    assert_array_almost_equal(single.prediction_upper[0], bands.prediction_upper)
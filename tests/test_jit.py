@@ -0,0 +1,118 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from mandvmodeling.core.calc import intervals, jit, kernels
+from mandvmodeling.core.estimator import MandVEnergyChangepointEstimator
+from mandvmodeling.core.pmodels import create_model_function, get_model_function
+from mandvmodeling.core.schemas import MandVDataModel
+
+from changepointmodel.core.calc import models as ChangepointModelModels
+
+COEFFS = {
+    "2P": (100.0, 2.0),
+    "3PC": (300.0, 8.0, 60.0),
+    "3PH": (300.0, -6.0, 55.0),
+    "4P": (300.0, -5.0, 8.0, 58.0),
+    "5P": (300.0, -5.0, 8.0, 45.0, 65.0),
+}
+
+
+@pytest.fixture(params=["numba", "numpy"])
+def backend(request, monkeypatch):
+    if request.param == "numba":
+        pytest.importorskip("numba")
+    else:
+        monkeypatch.setattr(jit, "HAS_NUMBA", False)
+    return request.param
+
+
+@pytest.mark.parametrize("kind", list(COEFFS))
+def test_jit_functions_match_the_models(backend, kind):
+    # off the changepoints, where the models are not differentiable
+    X = np.linspace(20.5, 90.5, 71).reshape(-1, 1)
+    coeffs = COEFFS[kind]
+    f, jac = jit.model_functions(kind)
+    expected = kernels.predict(kind, X.reshape(-1), coeffs)
+    np.testing.assert_allclose(f(X, *coeffs), expected)
+
+    y = expected + 1.0
+    np.testing.assert_allclose(jit.jit_function(kind, "residuals")(X, y, *coeffs), 1.0)
+
+    J = jac(X, *coeffs)
+    assert J.shape == (71, len(coeffs))
+    numerical = intervals.numerical_jacobian(f, X, coeffs)
+    np.testing.assert_allclose(J, numerical, atol=1e-4)
+
+
+def test_jit_functions_are_shared_and_pickle_by_name():
+    f, jac = jit.model_functions("4P")
+    assert jit.model_functions("4P") == (f, jac)
+    assert pickle.loads(pickle.dumps(f)) is f
+    assert f.__name__ == "fourp"
+    with pytest.raises(ValueError):
+        jit.jit_function("6P")
+
+
+def test_jit_functions_are_registered_explicitly():
+    from mandvmodeling.core.calc import piecewise
+
+    f = jit.jit_function("3PC")
+    assert piecewise.MODEL_KINDS.get(f) in (None, "3PC")
+    jit.register_model_kinds()
+    assert piecewise.model_kind(f) == "3PC"
+    assert piecewise.model_kind(ChangepointModelModels.threepc) == "3PC"
+    with pytest.raises(ValueError):
+        piecewise.register_model_kind(f, "6P")
+
+
+def _data_model():
+    rng = np.random.default_rng(0)
+    X = rng.uniform(20, 90, 40)
+    y = ChangepointModelModels.fivep(X.reshape(-1, 1), *COEFFS["5P"])
+    return MandVDataModel(
+        X=X,
+        y=y + rng.normal(0, 3, 40),
+        sensor_reading_timestamps=np.arange("2024-01-01", 40, dtype="datetime64[D]"),
+    )
+
+
+@pytest.mark.parametrize("kind", list(COEFFS))
+def test_jit_backend_fits_like_the_default_backend(backend, kind):
+    data_model = _data_model()
+    pairs = [
+        (
+            MandVEnergyChangepointEstimator(create_model_function(kind)),
+            MandVEnergyChangepointEstimator(create_model_function(kind), backend="jit"),
+        ),
+        (
+            MandVEnergyChangepointEstimator(get_model_function(kind)),
+            MandVEnergyChangepointEstimator(get_model_function(kind, backend="jit")),
+        ),
+    ]
+    for default, est in pairs:
+        default.fit(data_model)
+        est.fit(data_model)
+        assert est.name == kind
+        # a changepoint between two readings can move without changing the fit, so compare the fits
+        assert est.statistics.sse == pytest.approx(default.statistics.sse, rel=1e-6)
+        np.testing.assert_allclose(est.pred_y, default.pred_y, rtol=1e-3)
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        MandVEnergyChangepointEstimator(create_model_function("2P"), backend="gpu")
+    with pytest.raises(ValueError):
+        get_model_function("2P", backend="gpu")
+
+
+def test_jit_fivep_with_crossed_changepoints(backend):
+    X = np.linspace(0.5, 99.5, 100).reshape(-1, 1)
+    coeffs = (50.0, -2.0, 3.0, 70.0, 40.0)
+    f, jac = jit.model_functions("5P")
+    expected = ChangepointModelModels.fivep(X, *coeffs)
+    np.testing.assert_allclose(f(X, *coeffs), expected)
+    np.testing.assert_allclose(
+        jac(X, *coeffs), intervals.numerical_jacobian(f, X, coeffs), atol=1e-4
+    )
@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+from numpy.testing import assert_array_almost_equal
+
+from mandvmodeling.core.calc import kernels
+from mandvmodeling.core.estimator import MandVCurvefitEstimator
+
+from changepointmodel.core.calc import models as ChangepointModelModels
+
+CASES = [
+    ("2P", ChangepointModelModels.twop, (10.0, 2.0)),
+    ("3PC", ChangepointModelModels.threepc, (10.0, 2.0, 55.0)),
+    ("3PH", ChangepointModelModels.threeph, (10.0, -2.0, 55.0)),
+    ("4P", ChangepointModelModels.fourp, (10.0, -2.0, 3.0, 55.0)),
+    ("5P", ChangepointModelModels.fivep, (10.0, -2.0, 3.0, 40.0, 70.0)),
+]
+
+
+def test_kernels_match_model_functions():
+    X = np.linspace(20, 90, 50)
+    for kind, f, coeffs in CASES:
+        assert_array_almost_equal(kernels.KERNELS[kind](X, *coeffs), f(X, *coeffs))
+        assert_array_almost_equal(kernels.predict(kind, X, coeffs), f(X, *coeffs))
+
+    with pytest.raises(ValueError):
+        kernels.predict("6P", X, (1.0,))
+
+
+def test_kernels_broadcast_m_coefficient_sets():
+    X = np.linspace(20, 90, 50)
+    for kind, f, coeffs in CASES:
+        sets = np.array([coeffs, np.multiply(coeffs, 1.1), np.multiply(coeffs, 0.9)])
+        expected = np.array([f(X, *c) for c in sets])
+
+        # M coefficient sets against one X
+        assert_array_almost_equal(kernels.predict(kind, X, sets), expected)
+
+        # M coefficient sets against M x N X
+        XX = np.vstack([X, X + 5, X - 5])
+        expected = np.array([f(x, *c) for x, c in zip(XX, sets)])
+        assert_array_almost_equal(kernels.predict(kind, XX, sets), expected)
+
+
+def test_kernels_out_buffer_and_float32():
+    X = np.linspace(20, 90, 50, dtype=np.float32)
+    sets = np.array([[10.0, -2.0, 3.0, 55.0], [12.0, -1.0, 4.0, 50.0]])
+
+    out = kernels.predict("4P", X, sets)
+    assert out.dtype == np.float32
+    assert out.shape == (2, 50)
+
+    buffer = np.empty((2, 50), dtype=np.float32)
+    result = kernels.predict("4P", X, sets, out=buffer)
+    assert result is buffer
+    assert_array_almost_equal(buffer, out)
+
+    with pytest.raises(ValueError):
+        kernels.predict("4P", X, sets, out=np.empty((2, 50)))
+    with pytest.raises(ValueError):
+        kernels.predict("4P", X, sets, out=np.empty(50, dtype=np.float32))
+
+    # integer X is evaluated in float64
+    assert kernels.twop(np.arange(5), 1.0, 0.5).dtype == np.float64
+
+
+def test_curvefit_estimator_predict_uses_kernels(mocker):
+    rng = np.random.default_rng(1729)
+    X = rng.uniform(20, 90, 60).reshape(-1, 1)
+    y = ChangepointModelModels.fourp(X.reshape(-1), 500.0, -5.0, 10.0, 55.0)
+    y = y + rng.normal(0, 5, 60)
+
+    est = MandVCurvefitEstimator(
+        model_func=ChangepointModelModels.fourp, p0=(500.0, -5.0, 10.0, 55.0)
+    ).fit(X, y)
+    spy = mocker.spy(kernels, "predict")
+    pred = est.predict(X)
+    assert spy.call_count == 1
+    assert_array_almost_equal(
+        pred, ChangepointModelModels.fourp(X.reshape(-1), *est.popt_)
+    )
+
+    # other model functions are called as before
+    def line(X, a, b):
+        return a + b * X.reshape(-1)
+
+    est = MandVCurvefitEstimator(model_func=line).fit(X, y)
+    assert_array_almost_equal(est.predict(X), line(X, *est.popt_))
+    assert spy.call_count == 1
+
+
+def test_fivep_with_crossed_changepoints_matches_the_model_function():
+    # the daily 5P bounds let lcp and rcp cross
+    X = np.linspace(0, 100, 11)
+    coeffs = (50.0, -2.0, 3.0, 70.0, 40.0)
+    expected = ChangepointModelModels.fivep(X, *coeffs)
+    assert_array_almost_equal(expected[4:7], [50.0, 80.0, 110.0])
+    assert_array_almost_equal(kernels.predict("5P", X, coeffs), expected)
+    sets = np.array([coeffs, (10.0, -2.0, 3.0, 40.0, 70.0)])
+    assert_array_almost_equal(
+        kernels.predict("5P", X, sets),
+        [ChangepointModelModels.fivep(X, *c) for c in sets],
+    )
+
+    est = MandVCurvefitEstimator(ChangepointModelModels.fivep)
+    est.popt_, est.pcov_, est.name_ = np.array(coeffs), np.eye(5), "fivep"
+    assert_array_almost_equal(est.predict(X.reshape(-1, 1)), expected)
@@ -0,0 +1,50 @@
+import subprocess
+import sys
+
+import pytest
+
+import mandvmodeling
+from mandvmodeling import core
+from mandvmodeling.core import calc
+
+
+def _loaded(statement, modules):
+    script = (
+        "import sys\n{}\nprint(' '.join(m for m in {!r} if m in sys.modules))".format(
+            statement, modules
+        )
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", script], check=True, capture_output=True, text=True
+    )
+    return out.stdout.split()
+
+
+def test_import_mandvmodeling_is_lazy():
+    heavy = ["mandvmodeling.core", "scipy", "sklearn", "pydantic", "changepointmodel"]
+    assert _loaded("import mandvmodeling", heavy) == []
+
+
+def test_import_kernels_does_not_load_the_estimator():
+    heavy = ["mandvmodeling.core.estimator", "scipy", "sklearn", "pydantic"]
+    assert _loaded("import mandvmodeling.core.calc.kernels", heavy) == []
+
+
+def test_lazy_attributes():
+    from mandvmodeling.core import estimator
+
+    assert mandvmodeling.estimator is estimator
+    assert (
+        core.MandVEnergyChangepointEstimator
+        is estimator.MandVEnergyChangepointEstimator
+    )
+    assert "MandVDataModel" in dir(core)
+    assert "kernels" in dir(calc)
+    with pytest.raises(AttributeError):
+        calc.not_a_module
+
+
+def test_import_estimator_does_not_load_numba():
+    heavy = ["numba", "mandvmodeling.core.calc.jit"]
+    assert _loaded("import mandvmodeling.core.estimator", heavy) == []
+    assert _loaded("import mandvmodeling.core.calc.jit", ["numba"]) == []
@@ -0,0 +1,64 @@
+import numpy as np
+from mandvmodeling.core.calc import checks
+from mandvmodeling.core.calc.bounds import daily_bounds
+
+
+def test_check_fittable_passes_good_data():
+    X = np.linspace(1.0, 10.0)
+    y = np.linspace(5.0, 20.0)
+    res = checks.check_fittable(X, y, n_params=5)
+    assert res.fittable
+    assert res.reason is None
+
+
+def test_check_fittable_rejects_nonfinite():
+    X = np.linspace(1.0, 10.0)
+    y = np.linspace(5.0, 20.0)
+    y[3] = np.nan
+    assert checks.check_fittable(X, y).reason == checks.NONFINITE
+
+    X[0] = np.inf
+    y[3] = 1.0
+    assert checks.check_fittable(X, y).reason == checks.NONFINITE
+
+
+def test_check_fittable_rejects_invalid_sigma():
+    X = np.linspace(1.0, 10.0)
+    y = np.linspace(5.0, 20.0)
+    sigma = np.ones(len(X))
+    sigma[0] = 0
+    assert checks.check_fittable(X, y, sigma=sigma).reason == checks.INVALID_SIGMA
+
+
+def test_check_fittable_rejects_too_few_points():
+    X = np.linspace(1.0, 10.0, 5)
+    y = np.linspace(5.0, 20.0, 5)
+    res = checks.check_fittable(X, y, n_params=5)
+    assert not res.fittable
+    assert res.reason == checks.TOO_FEW_POINTS
+    assert checks.check_fittable(X, y, n_params=4).fittable
+
+
+def test_check_fittable_rejects_constant_data():
+    X = np.ones(10)
+    y = np.linspace(5.0, 20.0, 10)
+    assert checks.check_fittable(X, y).reason == checks.CONSTANT_X
+    assert checks.check_fittable(y, X).reason == checks.CONSTANT_Y
+
+
+def test_check_changepoint_ranges():
+    X = np.linspace(1.0, 10.0)
+    assert checks.check_changepoint_ranges(X, daily_bounds.fivep(X), 2).fittable
+    assert checks.check_changepoint_ranges(X, daily_bounds.twop(), 0).fittable
+    assert checks.check_changepoint_ranges(X, (-np.inf, np.inf), 1).fittable
+
+    # lower bound of the changepoint is not less than the upper bound
+    res = checks.check_changepoint_ranges(X, ((0, 0, 5.0), (np.inf, np.inf, 5.0)), 1)
+    assert res.reason == checks.EMPTY_CHANGEPOINT_RANGE
+
+    # no data between the changepoint bounds
+    res = checks.check_changepoint_ranges(X, ((0, 0, 5.01), (np.inf, np.inf, 5.02)), 1)
+    assert res.reason == checks.EMPTY_CHANGEPOINT_RANGE
+
+    # coefficients bounded on both sides before the changepoints are not changepoints
+    assert checks.check_changepoint_ranges(X, ((0, 0, 1), (0.1, 0.1, 2)), 1).fittable
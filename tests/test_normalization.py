@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+from numpy.testing import assert_array_almost_equal
+
+from mandvmodeling.core import normalization
+from mandvmodeling.core.estimator import MandVEnergyChangepointEstimator
+from mandvmodeling.core.pmodels import create_model_function
+from mandvmodeling.core.savings import CompactFits
+from mandvmodeling.core.schemas import MandVDataModel
+
+from changepointmodel.core.calc import models as ChangepointModelModels
+
+
+def _fit(name, f, n=60, seed=1729):
+    rng = np.random.default_rng(seed)
+    X = rng.uniform(20, 90, n)
+    y = f(X) + rng.normal(0, 5, n)
+    sensor_reading_timestamps = np.arange("2024-01-01", n, dtype="datetime64[D]")
+    est = MandVEnergyChangepointEstimator(create_model_function(name))
+    return est.fit(
+        MandVDataModel(X=X, y=y, sensor_reading_timestamps=sensor_reading_timestamps)
+    )
+
+
+def _threepc(X):
+    return ChangepointModelModels.threepc(X, 500.0, 10.0, 60.0)
+
+
+def _threeph(X):
+    return ChangepointModelModels.threeph(X, 500.0, -10.0, 50.0)
+
+
+def test_normalized_consumption_matches_predict():
+    estimators = [_fit("3PC", _threepc), _fit("3PH", _threeph), _fit("2P", _threepc)]
+    tmy = 55 + 25 * np.sin(np.linspace(0, 2 * np.pi, 365))
+    weather = normalization.TypicalWeather.from_array(tmy.reshape(-1, 1))
+
+    out = normalization.normalized_consumption(estimators, weather, cache=None)
+    expected = [np.sum(est.predict(tmy.reshape(-1, 1))) for est in estimators]
+    assert_array_almost_equal(out, expected)
+
+    # the same result from compact fits and from 5P coefficients
+    compact = CompactFits.from_estimators(estimators)
+    assert_array_almost_equal(
+        normalization.normalized_consumption(compact, weather, cache=None), expected
+    )
+    assert_array_almost_equal(
+        normalization.normalized_consumption(compact.coefficients, weather, cache=None),
+        expected,
+    )
+
+    with pytest.raises(ValueError):
+        normalization.normalized_consumption(np.zeros((2, 3)), weather)
+
+
+def test_normalized_consumption_cache(mocker):
+    estimators = [_fit("3PC", _threepc), _fit("3PH", _threeph)]
+    tmy = np.linspace(10, 95, 365)
+    weather = normalization.TypicalWeather.from_array(tmy, key="KNYC")
+    other = normalization.TypicalWeather.from_array(tmy + 1)
+    cache = normalization.NormalizedConsumptionCache(maxsize=3)
+    spy = mocker.spy(normalization, "predict")
+
+    first = normalization.normalized_consumption(estimators, weather, cache=cache)
+    assert len(cache) == 2 and cache.misses == 2
+
+    # cached totals are not predicted again
+    second = normalization.normalized_consumption(estimators, weather, cache=cache)
+    assert_array_almost_equal(first, second)
+    assert cache.hits == 2
+    assert spy.call_count == 1
+
+    # a different weather file is a different key and the oldest total is evicted
+    normalization.normalized_consumption(estimators[:1], other, cache=cache)
+    assert spy.call_count == 2
+    assert len(cache) == 3
+    normalization.normalized_consumption(estimators[1:], other, cache=cache)
+    assert len(cache) == 3
+
+    cache.clear()
+    assert len(cache) == 0 and cache.hits == 0
+
+    with pytest.raises(ValueError):
+        normalization.NormalizedConsumptionCache(maxsize=0)
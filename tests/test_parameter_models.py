@@ -4,6 +4,7 @@ from changepointmodel.core.pmodels import (
 )
 from changepointmodel.core.pmodels.coeffs_parser import TwoParameterCoefficientParser
 from mandvmodeling.core.pmodels import MandVParameterModelFunction
+from mandvmodeling.core.budget import FitBudget
 import pytest
 
 
@@ -103,3 +104,31 @@ def test_modelfunction_validator():
             parameter_model=parser,
             coefficients_parser=parser,
         )
+
+
+def test_modelfunction_fit_budget():
+    def f(X, y):
+        return (X + y).squeeze()
+
+    bound = (42,), (43,)
+    budget = FitBudget(max_nfev=10, timeout=1.0)
+
+    model = MandVParameterModelFunction(
+        "mymodel",
+        f=f,
+        bounds=bound,
+        parameter_model=TwoParameterModel(),
+        coefficients_parser=TwoParameterCoefficientParser(),
+        fit_budget=budget,
+    )
+    assert model.fit_budget == budget
+
+    with pytest.raises(TypeError):
+        MandVParameterModelFunction(
+            "mymodel",
+            f=f,
+            bounds=bound,
+            parameter_model=TwoParameterModel(),
+            coefficients_parser=TwoParameterCoefficientParser(),
+            fit_budget={"max_nfev": 10},
+        )
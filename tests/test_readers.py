@@ -0,0 +1,173 @@
+import json
+
+import numpy as np
+import pytest
+
+from mandvmodeling.core.readers import (
+    ReaderColumns,
+    find_meter_files,
+    make_data_model,
+    read_meter_file,
+    split_day_types,
+    stream_meter_file,
+)
+
+
+def _write_csv(path, rows, header="meter_id,date,X,y"):
+    path.write_text(
+        header + "\n" + "\n".join(",".join(map(str, r)) for r in rows) + "\n"
+    )
+
+
+def test_find_meter_files(tmp_path):
+    for name in ("b.csv", "a.json", "c.txt"):
+        (tmp_path / name).write_text("")
+    assert [p.name for p in find_meter_files(tmp_path)] == ["a.json", "b.csv"]
+    assert find_meter_files(tmp_path / "b.csv") == [tmp_path / "b.csv"]
+
+    with pytest.raises(ValueError):
+        find_meter_files(tmp_path / "c.txt")
+    with pytest.raises(FileNotFoundError):
+        find_meter_files(tmp_path / "missing.csv")
+
+
+def test_read_json(tmp_path):
+    path = tmp_path / "meter-1.json"
+    path.write_text(
+        json.dumps(
+            {"X": [50.0, 60.0], "y": [1.0, 2.0], "Date": ["2024-01-01", "2024-01-02"]}
+        )
+    )
+    [(meter_id, data)] = list(read_meter_file(path))
+    assert meter_id == "meter-1"
+    np.testing.assert_array_equal(data.X.reshape(-1), [50.0, 60.0])
+    np.testing.assert_array_equal(data.y, [1.0, 2.0])
+
+
+def test_read_csv_groups_meters(tmp_path):
+    path = tmp_path / "readings.csv"
+    _write_csv(
+        path,
+        [
+            ("b", "2024-01-01", 50, 1),
+            ("a", "2024-01-01", 55, 2),
+            ("b", "2024-01-02", 60, 3),
+            ("a", "2024-01-02", 65, 4),
+        ],
+    )
+    meters = dict(read_meter_file(path))
+    assert list(meters) == ["b", "a"]
+    np.testing.assert_array_equal(meters["b"].y, [1.0, 3.0])
+    assert meters["a"].sensor_reading_timestamps[0] == np.datetime64("2024-01-01")
+
+
+def test_make_data_model_keeps_the_timestamp_resolution():
+    hourly = make_data_model(
+        [50.0, 51.0], [1.0, 2.0], ["2024-01-01T00:00", "2024-01-01T01:00"]
+    )
+    assert hourly.sensor_reading_timestamps[1] == np.datetime64("2024-01-01T01:00")
+    daily = make_data_model([50.0, 51.0], [1.0, 2.0], ["2024-01-01", "2024-01-02"])
+    assert daily.sensor_reading_timestamps.dtype == np.dtype("datetime64[D]")
+
+
+def test_read_csv_custom_columns_without_meter(tmp_path):
+    path = tmp_path / "site.csv"
+    _write_csv(
+        path, [("2024-01-01", 50, 1), ("2024-01-02", 60, 2)], header="day,temp,kwh"
+    )
+    [(meter_id, data)] = list(
+        read_meter_file(path, ReaderColumns(date="day", X="temp", y="kwh"))
+    )
+    assert meter_id == "site"
+    np.testing.assert_array_equal(data.y, [1.0, 2.0])
+
+
+def test_read_parquet(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = tmp_path / "readings.parquet"
+    table = pa.table(
+        {
+            "meter_id": ["b", "a", "b", "a"],
+            "date": ["2024-01-01", "2024-01-01", "2024-01-02", "2024-01-02"],
+            "X": [50.0, 55.0, 60.0, 65.0],
+            "y": [1.0, 2.0, 3.0, 4.0],
+        }
+    )
+    pq.write_table(table, path)
+    meters = dict(read_meter_file(path))
+    assert list(meters) == ["b", "a"]
+    np.testing.assert_array_equal(meters["b"].y, [1.0, 3.0])
+
+
+def _sorted_rows(n_meters=5, n_days=10):
+    dates = np.arange("2024-01-01", n_days, dtype="datetime64[D]").astype(str)
+    return [
+        ("m{}".format(m), d, 40 + i, m * 100 + i)
+        for m in range(n_meters)
+        for i, d in enumerate(dates)
+    ]
+
+
+@pytest.mark.parametrize("batch_size", [1, 3, 7, 1000])
+def test_stream_meter_file_matches_read_meter_file(tmp_path, batch_size):
+    path = tmp_path / "readings.csv"
+    _write_csv(path, _sorted_rows())
+    streamed = list(stream_meter_file(path, batch_size=batch_size))
+    read = list(read_meter_file(path))
+    assert (
+        [m for m, _ in streamed]
+        == [m for m, _ in read]
+        == ["m0", "m1", "m2", "m3", "m4"]
+    )
+    for (_, a), (_, b) in zip(streamed, read):
+        np.testing.assert_array_equal(a.X, b.X)
+        np.testing.assert_array_equal(a.y, b.y)
+        np.testing.assert_array_equal(
+            a.sensor_reading_timestamps, b.sensor_reading_timestamps
+        )
+
+
+def test_stream_meter_file_is_lazy(tmp_path):
+    path = tmp_path / "readings.csv"
+    rows = _sorted_rows(n_meters=2)
+    # an unsorted tail is only found once the reader gets there
+    _write_csv(path, rows + rows[:2])
+    meters = stream_meter_file(path, batch_size=4)
+    assert next(meters)[0] == "m0"
+    assert next(meters)[0] == "m1"
+    with pytest.raises(ValueError):
+        next(meters)
+
+
+def test_stream_parquet(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = tmp_path / "readings.parquet"
+    rows = _sorted_rows()
+    pq.write_table(
+        pa.table(
+            {
+                "meter_id": [r[0] for r in rows],
+                "date": [r[1] for r in rows],
+                "X": [float(r[2]) for r in rows],
+                "y": [float(r[3]) for r in rows],
+            }
+        ),
+        path,
+    )
+    meters = list(stream_meter_file(path, batch_size=7))
+    assert [m for m, _ in meters] == ["m0", "m1", "m2", "m3", "m4"]
+    np.testing.assert_array_equal(meters[1][1].y, np.arange(100, 110))
+
+
+def test_split_day_types(tmp_path):
+    path = tmp_path / "readings.csv"
+    _write_csv(path, _sorted_rows(n_meters=1, n_days=14))
+    meters = dict(split_day_types(stream_meter_file(path)))
+    assert list(meters) == ["m0/weekday", "m0/weekend"]
+    assert len(meters["m0/weekday"].y) == 10
+    assert len(meters["m0/weekend"].y) == 4
+    assert not np.is_busday(
+        meters["m0/weekend"].sensor_reading_timestamps.astype("datetime64[D]")
+    ).any()
@@ -0,0 +1,150 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from mandvmodeling.core.estimator import FitStatus, MandVEnergyChangepointEstimator
+from mandvmodeling.core.pmodels import create_model_function
+from mandvmodeling.core.results import (
+    FitResult,
+    ResultWriter,
+    open_results,
+    result_records,
+)
+from mandvmodeling.core.schemas import MandVDataModel
+from mandvmodeling.core.selection import fit_many
+
+from changepointmodel.core.calc import models as ChangepointModelModels
+
+
+def _fit(name, y, seed=0, n=60):
+    rng = np.random.default_rng(seed)
+    X = rng.uniform(20, 90, n)
+    data = MandVDataModel(
+        X=X,
+        y=y(X) + rng.normal(0, 5, n),
+        sensor_reading_timestamps=np.arange("2024-01-01", n, dtype="datetime64[D]"),
+    )
+    return MandVEnergyChangepointEstimator(create_model_function(name)).fit(data)
+
+
+@pytest.fixture
+def estimators():
+    return [
+        _fit("2P", lambda X: ChangepointModelModels.twop(X, 100.0, 5.0)),
+        _fit("3PC", lambda X: ChangepointModelModels.threepc(X, 500.0, 10.0, 60.0)),
+        None,
+    ]
+
+
+def test_result_records(estimators):
+    records = result_records(["a", "b", "c"], estimators)
+    assert list(records["name"]) == ["2P", "3PC", ""]
+    assert list(records["status"]) == ["ok", "ok", "no_model_passed"]
+    np.testing.assert_allclose(records["coeffs"][1, :3], estimators[1].coeffs)
+    assert np.isnan(records["coeffs"][1, 3:]).all()
+    np.testing.assert_allclose(records["pcov"][0, :2, :2], estimators[0].cov)
+    assert np.isnan(records["pcov"][0, 2:]).all()
+    assert records["r2"][1] == pytest.approx(estimators[1].r2())
+    assert np.isnan(records["r2"][2])
+
+    with pytest.raises(ValueError):
+        result_records(["a" * 65], [None])
+    with pytest.raises(ValueError):
+        result_records(["a"], [])
+
+
+def test_result_store_appends_and_mmaps(tmp_path, estimators):
+    path = tmp_path / "results.npy"
+    with ResultWriter(path) as writer:
+        writer.write(["a", "b"], estimators[:2])
+        writer.write(["c"], estimators[2:])
+
+    results = open_results(path)
+    assert isinstance(results, np.memmap)
+    assert list(results["meter_id"]) == ["a", "b", "c"]
+    assert np.load(path).tobytes() == results.tobytes()
+
+    with ResultWriter(path, append=True) as writer:
+        writer.write(["d"], estimators[:1])
+    results = open_results(path)
+    assert list(results["meter_id"]) == ["a", "b", "c", "d"]
+    assert results["name"][3] == "2P"
+
+    with ResultWriter(path) as writer:
+        pass
+    assert len(open_results(path)) == 0
+
+
+def test_result_store_drops_records_after_the_header(tmp_path, estimators):
+    path = tmp_path / "results.npy"
+    with ResultWriter(path) as writer:
+        writer.write(["a"], estimators[:1])
+    # an interrupted append that wrote half a record but not the header
+    with open(path, "ab") as f:
+        f.write(b"\0" * 10)
+    assert len(open_results(path)) == 1
+
+    with ResultWriter(path, append=True) as writer:
+        writer.write(["b"], estimators[1:2])
+    assert list(open_results(path)["meter_id"]) == ["a", "b"]
+
+
+def test_fit_result_is_compact_and_restores_the_estimator(estimators):
+    est = estimators[1]
+    result = FitResult.from_estimator(est, keep_data=True)
+    assert not hasattr(result, "__dict__")
+    assert result.name == "3PC"
+    assert result.status is FitStatus.OK
+    assert result.scores["r2"] == pytest.approx(est.r2())
+    np.testing.assert_array_equal(result.coeffs, est.coeffs)
+
+    lean = FitResult.from_estimator(est)
+    assert not lean.has_data
+    assert len(pickle.dumps(lean)) < len(pickle.dumps(est)) / 4
+    with pytest.raises(ValueError):
+        lean.to_estimator()
+
+    restored = pickle.loads(pickle.dumps(result)).to_estimator()
+    assert restored.name == "3PC"
+    np.testing.assert_array_equal(restored.coeffs, est.coeffs)
+    np.testing.assert_allclose(restored.pred_y, est.pred_y)
+    assert restored.r2() == pytest.approx(est.r2())
+    assert restored.tstat() == pytest.approx(est.tstat())
+    np.testing.assert_array_equal(
+        restored.sensor_reading_timestamps, est.sensor_reading_timestamps
+    )
+    np.testing.assert_allclose(
+        restored.predict(np.array([[30.0], [80.0]])),
+        est.predict(np.array([[30.0], [80.0]])),
+    )
+
+
+def test_result_records_accepts_fit_results(estimators):
+    from_estimators = result_records(["a", "b", "c"], estimators)
+    from_results = result_records(
+        ["a", "b", "c"],
+        [None if e is None else FitResult.from_estimator(e) for e in estimators],
+    )
+    assert from_estimators.tobytes() == from_results.tobytes()
+
+
+@pytest.mark.parametrize("n_jobs", [1, 2])
+def test_fit_many(n_jobs):
+    rng = np.random.default_rng(0)
+    data_models = []
+    for _ in range(3):
+        X = rng.uniform(20, 90, 60)
+        data_models.append(
+            MandVDataModel(
+                X=X,
+                y=ChangepointModelModels.threepc(X, 500.0, 10.0, 60.0)
+                + rng.normal(0, 5, 60),
+                sensor_reading_timestamps=np.arange(
+                    "2024-01-01", 60, dtype="datetime64[D]"
+                ),
+            )
+        )
+    results = fit_many(data_models, model="3PC", n_jobs=n_jobs)
+    assert [r.name for r in results] == ["3PC"] * 3
+    assert all(not r.has_data for r in results)
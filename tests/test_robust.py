@@ -0,0 +1,141 @@
+import numpy as np
+import pytest
+
+from mandvmodeling.core.calc import kernels, robust
+from mandvmodeling.core.estimator import MandVEnergyChangepointEstimator
+from mandvmodeling.core.pmodels import create_model_function, get_model_function
+from mandvmodeling.core.schemas import MandVDataModel
+
+COEFFS = {
+    "2P": (100.0, 2.0),
+    "3PC": (300.0, 8.0, 60.0),
+    "3PH": (300.0, -6.0, 55.0),
+    "4P": (300.0, -5.0, 8.0, 58.0),
+    "5P": (300.0, -5.0, 8.0, 45.0, 65.0),
+}
+
+OUTLIERS = [3, 17, 29, 41]
+
+
+def _data(kind, n=60):
+    rng = np.random.default_rng(1)
+    X = np.sort(rng.uniform(20, 90, n))
+    y = kernels.predict(kind, X, COEFFS[kind]) + rng.normal(0, 2, n)
+    y[OUTLIERS] += 400.0
+    return X, y
+
+
+def test_robust_weights():
+    r = np.array([0.0, 1.0, -1.0, 2.0, -2.0, 100.0])
+    weights, scale = robust.robust_weights(r, "huber")
+    assert scale > 0
+    assert weights[0] == 1.0
+    assert 0 < weights[-1] < 0.1
+
+    weights, _ = robust.robust_weights(r, "bisquare")
+    assert weights[-1] == 0.0
+    assert np.all((weights >= 0) & (weights <= 1))
+
+    # a perfect fit has no scale, so nothing is downweighted
+    weights, scale = robust.robust_weights(np.zeros(5))
+    assert scale == 0
+    np.testing.assert_array_equal(weights, 1.0)
+
+    with pytest.raises(ValueError):
+        robust.robust_weights(r, "l1")
+
+
+@pytest.mark.parametrize("kind", list(COEFFS))
+@pytest.mark.parametrize("loss", robust.LOSSES)
+def test_irls_ignores_outliers(kind, loss):
+    X, y = _data(kind)
+    result = robust.irls(kind, X, y, loss=loss)
+    assert result.converged
+    assert result.weights.shape == y.shape
+    inliers = np.setdiff1d(np.arange(len(y)), OUTLIERS)
+    assert np.all(result.weights[OUTLIERS] < 0.1)
+    assert np.median(result.weights[inliers]) > 0.9
+    np.testing.assert_allclose(result.coeffs, COEFFS[kind], rtol=0.1, atol=1.0)
+
+
+def test_irls_searches_changepoints_within_the_bounds():
+    X, y = _data("3PC")
+    result = robust.irls(
+        "3PC", X, y, bounds=((-np.inf, -np.inf, 62.0), (np.inf, np.inf, 80.0))
+    )
+    assert 62.0 <= result.coeffs[2] <= 80.0
+
+
+def _data_model(kind):
+    X, y = _data(kind)
+    return MandVDataModel(
+        X=X,
+        y=y,
+        sensor_reading_timestamps=np.arange(
+            "2024-01-01", len(X), dtype="datetime64[D]"
+        ),
+    )
+
+
+@pytest.mark.parametrize("kind", list(COEFFS))
+def test_fit_robust(kind):
+    data_model = _data_model(kind)
+    ols = MandVEnergyChangepointEstimator(get_model_function(kind)).fit(data_model)
+    est = MandVEnergyChangepointEstimator(get_model_function(kind)).fit_robust(
+        data_model
+    )
+    assert est.name == kind
+    assert est.fit_status == "ok"
+    assert np.all(est.weights[OUTLIERS] < 0.1)
+    assert est.robust_.converged
+
+    truth = kernels.predict(kind, data_model.X.reshape(-1), COEFFS[kind])
+    robust_error = np.abs(est.pred_y - truth).mean()
+    assert robust_error < np.abs(ols.pred_y - truth).mean()
+    assert robust_error < 3.0
+
+    # a plain fit reports weights of 1
+    np.testing.assert_array_equal(ols.weights, 1.0)
+    assert ols.robust_ is None
+
+
+def test_fit_robust_with_the_jit_backend():
+    data_model = _data_model("4P")
+    default = MandVEnergyChangepointEstimator(create_model_function("4P")).fit_robust(
+        data_model, loss="bisquare"
+    )
+    est = MandVEnergyChangepointEstimator(
+        create_model_function("4P"), backend="jit"
+    ).fit_robust(data_model, loss="bisquare")
+    np.testing.assert_allclose(est.weights, default.weights)
+    np.testing.assert_allclose(est.pred_y, default.pred_y, rtol=1e-3)
+
+
+def test_fit_robust_errors():
+    est = MandVEnergyChangepointEstimator(get_model_function("2P"))
+    with pytest.raises(ValueError):
+        est.fit_robust(_data_model("2P"), loss="l1")
+    with pytest.raises(TypeError):
+        est.fit_robust(np.arange(3))
+
+
+def test_fit_robust_uses_data_model_counts_as_prior_weights():
+    X, y = _data("3PC")
+    counts = np.full(len(X), 24.0)
+    data_model = MandVDataModel(
+        X=X,
+        y=y,
+        counts=counts,
+        sensor_reading_timestamps=np.arange(
+            "2024-01-01", len(X), dtype="datetime64[D]"
+        ),
+    )
+    est = MandVEnergyChangepointEstimator(get_model_function("3PC")).fit_robust(
+        data_model
+    )
+    # equal counts do not change the robust weights, only the scale of sigma
+    plain = MandVEnergyChangepointEstimator(get_model_function("3PC")).fit_robust(
+        _data_model("3PC")
+    )
+    np.testing.assert_allclose(est.weights, plain.weights)
+    np.testing.assert_allclose(est.sigma_, plain.sigma_ / np.sqrt(24.0))
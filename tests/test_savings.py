@@ -0,0 +1,118 @@
+import numpy as np
+import pytest
+from numpy.testing import assert_array_almost_equal
+
+from mandvmodeling.core import savings
+from mandvmodeling.core.calc import piecewise
+from mandvmodeling.core.estimator import MandVEnergyChangepointEstimator
+from mandvmodeling.core.pmodels import create_model_function
+from mandvmodeling.core.schemas import MandVDataModel
+
+from changepointmodel.core.calc import models as ChangepointModelModels
+
+
+def _fit(name, f, n=60, seed=1729):
+    rng = np.random.default_rng(seed)
+    X = rng.uniform(20, 90, n)
+    y = f(X) + rng.normal(0, 5, n)
+    sensor_reading_timestamps = np.arange("2024-01-01", n, dtype="datetime64[D]")
+    est = MandVEnergyChangepointEstimator(create_model_function(name))
+    return est.fit(
+        MandVDataModel(X=X, y=y, sensor_reading_timestamps=sensor_reading_timestamps)
+    )
+
+
+def _threepc(X):
+    return ChangepointModelModels.threepc(X, 500.0, 10.0, 60.0)
+
+
+def _fourp(X):
+    return ChangepointModelModels.fourp(X, 500.0, -5.0, 10.0, 55.0)
+
+
+def _pairs():
+    pre = [_fit("3PC", _threepc), _fit("4P", _fourp, n=80), _fit("2P", _threepc)]
+    post = [
+        _fit("3PC", lambda X: 0.8 * _threepc(X), n=40, seed=1),
+        _fit("4P", lambda X: 0.9 * _fourp(X), n=50, seed=2),
+        _fit("3PC", lambda X: 0.8 * _threepc(X), n=30, seed=3),
+    ]
+    return pre, post
+
+
+def test_canonical_coefficients_reproduce_model_functions():
+    X = np.linspace(20, 90, 30)
+    cases = [
+        ("2P", ChangepointModelModels.twop, (10.0, 2.0)),
+        ("3PC", ChangepointModelModels.threepc, (10.0, 2.0, 55.0)),
+        ("3PH", ChangepointModelModels.threeph, (10.0, -2.0, 55.0)),
+        ("4P", ChangepointModelModels.fourp, (10.0, -2.0, 3.0, 55.0)),
+        ("5P", ChangepointModelModels.fivep, (10.0, -2.0, 3.0, 40.0, 70.0)),
+    ]
+    coefficients = np.array(
+        [piecewise.canonical_coefficients(kind, c) for kind, _, c in cases]
+    )
+    pred = savings.predict(coefficients, X)
+    for (_, f, c), row in zip(cases, pred):
+        assert_array_almost_equal(row, f(X, *c))
+
+
+def test_batch_adjusted_savings_match_pairwise():
+    pre, post = _pairs()
+    out = savings.batch_savings(pre, post)
+    assert out.shape == (3,)
+
+    for row, p, q in zip(out, pre, post):
+        baseline = np.sum(p.predict(q.X))
+        total = baseline - np.sum(q.y)
+        assert row["adjusted_total_savings"] == pytest.approx(total)
+        assert row["adjusted_average_savings"] == pytest.approx(total / len(q.y))
+        assert row["adjusted_percent_savings"] == pytest.approx(100 * total / baseline)
+        assert row["adjusted_savings_uncertainty"] > 0
+    assert np.isnan(out["normalized_total_savings"]).all()
+
+
+def test_batch_normalized_savings_shared_and_per_pair_norms():
+    pre, post = _pairs()
+    norms = np.linspace(10, 95, 365)
+    shared = savings.batch_savings(pre, post, norms=norms.reshape(-1, 1))
+    per_pair = savings.batch_savings(pre, post, norms=[norms] * 3)
+
+    for field in ("normalized_total_savings", "normalized_savings_uncertainty"):
+        assert_array_almost_equal(shared[field], per_pair[field])
+    for row, p, q in zip(shared, pre, post):
+        total = np.sum(p.predict(norms.reshape(-1, 1))) - np.sum(
+            q.predict(norms.reshape(-1, 1))
+        )
+        assert row["normalized_total_savings"] == pytest.approx(total)
+
+    with pytest.raises(ValueError):
+        savings.batch_savings(pre, post, norms=[norms])
+
+
+def test_batch_savings_from_compact_fits():
+    pre, post = _pairs()
+    compact_pre = savings.CompactFits.from_estimators(pre)
+    compact_post = savings.CompactFits.from_estimators(post)
+    assert len(compact_pre) == 3
+    assert compact_post.X.shape == (120,)
+
+    expected = savings.batch_savings(pre, post)
+    out = savings.batch_savings(compact_pre, compact_post)
+    assert_array_almost_equal(
+        out["adjusted_total_savings"], expected["adjusted_total_savings"]
+    )
+
+    with pytest.raises(ValueError):
+        savings.batch_savings(
+            compact_pre, savings.CompactFits.from_estimators(post[:2])
+        )
+    with pytest.raises(ValueError):
+        savings.CompactFits(
+            coefficients=np.zeros((2, 4)),
+            n=np.array([1, 1]),
+            n_params=np.array([2, 2]),
+            cvrmse=np.zeros(2),
+            X=np.zeros(2),
+            y=np.zeros(2),
+        )
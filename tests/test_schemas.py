@@ -156,3 +156,76 @@ def test_MandVDataModel_ordering():
             sensor_reading_timestamps=timestamp_data,
             order=test_ordering,
         )
+
+
+def test_MandVDataModel_sorts_sigma_and_counts_with_X():
+    test = schemas.MandVDataModel(
+        X=[3.0, 1.0, 2.0],
+        y=[30.0, 10.0, 20.0],
+        sigma=[0.3, 0.1, 0.2],
+        counts=[24, 12, 18],
+        sensor_reading_timestamps=np.arange("2024-01-01", 3, dtype="datetime64[D]"),
+    )
+    np.testing.assert_array_equal(test.sigma, [0.1, 0.2, 0.3])
+    np.testing.assert_array_equal(test.counts, [12, 18, 24])
+    np.testing.assert_array_equal(test.fit_sigma(), [0.1, 0.2, 0.3])
+
+
+def test_MandVDataModel_fit_sigma_from_counts():
+    kwargs = dict(
+        X=[1.0, 2.0, 3.0],
+        y=[10.0, 20.0, 30.0],
+        sensor_reading_timestamps=np.arange("2024-01-01", 3, dtype="datetime64[D]"),
+    )
+    assert schemas.MandVDataModel(**kwargs).fit_sigma() is None
+    test = schemas.MandVDataModel(counts=[4, 16, 24], **kwargs)
+    np.testing.assert_allclose(test.fit_sigma() ** -2, [4, 16, 24])
+
+
+@pytest.mark.parametrize("counts", [[1, 2], [1, 0, 2], [1, np.nan, 2]])
+def test_MandVDataModel_raise_validationerror_on_invalid_counts(counts):
+    with pytest.raises(pydantic.ValidationError):
+        schemas.MandVDataModel(
+            X=[1.0, 2.0, 3.0],
+            y=[10.0, 20.0, 30.0],
+            counts=counts,
+            sensor_reading_timestamps=np.arange("2024-01-01", 3, dtype="datetime64[D]"),
+        )
+
+
+def _daily_model(n=400, **kwargs):
+    rng = np.random.default_rng(5)
+    return schemas.MandVDataModel(
+        X=rng.uniform(0, 100, n),
+        y=rng.uniform(0, 10, n),
+        sensor_reading_timestamps=np.arange("2023-01-01", n, dtype="datetime64[D]"),
+        **kwargs,
+    )
+
+
+def test_MandVDataModel_slice_by_date_matches_a_boolean_mask():
+    data = _daily_model(sigma=np.linspace(1, 2, 400))
+    window = data.slice_by_date("2023-03-01", np.datetime64("2023-06-01"))
+
+    mask = (data.sensor_reading_timestamps >= np.datetime64("2023-03-01")) & (
+        data.sensor_reading_timestamps < np.datetime64("2023-06-01")
+    )
+    assert isinstance(window, schemas.MandVDataModel)
+    np.testing.assert_array_equal(window.X, data.X[mask])
+    np.testing.assert_array_equal(window.y, data.y[mask])
+    np.testing.assert_array_equal(window.sigma, data.sigma[mask])
+    np.testing.assert_array_equal(
+        window.sensor_reading_timestamps, data.sensor_reading_timestamps[mask]
+    )
+    np.testing.assert_array_equal(window.order, data.order[mask])
+    assert np.all(np.diff(window.X.squeeze()) >= 0)
+
+
+def test_MandVDataModel_slice_by_date_bounds():
+    data = _daily_model()
+    assert len(data.slice_by_date().X) == 400
+    assert len(data.slice_by_date(end="2023-01-01").X) == 0
+    assert len(data.slice_by_date("2023-12-31T12:00").X) == 400 - 365
+    assert len(data.slice_by_date("2023-06-01", "2023-05-01").X) == 0
+    # the time index is built once
+    assert data.time_index() is data.time_index()
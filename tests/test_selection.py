@@ -0,0 +1,207 @@
+import copy
+import pickle
+
+import numpy as np
+import pytest
+
+from mandvmodeling.core.budget import FitBudget
+from mandvmodeling.core.estimator import (
+    MandVCurvefitEstimator,
+    MandVEnergyChangepointEstimator,
+)
+from mandvmodeling.core.pmodels import create_model_function, get_model_function
+from mandvmodeling.core.schemas import MandVDataModel
+from mandvmodeling.core.selection import ModelFilter, fit_stream, select_model
+
+from changepointmodel.core.calc import models as ChangepointModelModels
+
+
+def _data_model(y):
+    X = np.linspace(20, 90, 120)
+    sensor_reading_timestamps = np.arange(
+        "2024-01-01", "2024-04-30", dtype="datetime64[D]"
+    )
+    return MandVDataModel(
+        X=X, y=y(X), sensor_reading_timestamps=sensor_reading_timestamps
+    )
+
+
+def test_create_model_function():
+    model = create_model_function("3PC", bounds="daily", use_initial_guesses=True)
+    assert model.name == "3PC"
+    assert model.f is ChangepointModelModels.threepc
+    assert model.initial_guesses is not None
+
+    with pytest.raises(ValueError):
+        create_model_function("6P")
+
+    with pytest.raises(ValueError):
+        create_model_function("2P", bounds="hourly")
+
+
+def test_get_model_function_is_shared_and_immutable():
+    model = get_model_function("3PC", bounds="daily")
+    assert model is get_model_function("3PC", bounds="daily")
+    assert model is not get_model_function("3PC")
+    assert model.f is ChangepointModelModels.threepc
+    assert model.initial_guesses is not None
+    assert pickle.loads(pickle.dumps(model)) is model
+    assert copy.deepcopy(model) is model
+
+    with pytest.raises(AttributeError):
+        model._fit_budget = FitBudget(max_nfev=10)
+    with pytest.raises(ValueError):
+        get_model_function("6P")
+    with pytest.raises(ValueError):
+        get_model_function("2P", bounds="hourly")
+
+    est = MandVEnergyChangepointEstimator(model).fit(
+        _data_model(lambda X: ChangepointModelModels.threepc(X, 500.0, 10.0, 60.0))
+    )
+    assert est.name == "3PC"
+
+
+def test_select_model_skips_expensive_models_once_simpler_one_passes(mocker):
+    rng = np.random.default_rng(1729)
+    data_model = _data_model(
+        lambda X: (
+            ChangepointModelModels.threepc(X, 500.0, 10.0, 60.0)
+            + rng.normal(0, 5, len(X))
+        )
+    )
+    spy = mocker.spy(MandVEnergyChangepointEstimator, "fit")
+
+    res = select_model(data_model)
+
+    assert res.best.name == "3PC"
+    assert set(res.estimators) == {"2P", "3PC", "3PH"}
+    assert res.skipped == ["4P", "5P"]
+    assert res.passed["3PC"]
+    assert spy.call_count == 3
+
+
+def test_select_model_orders_candidates_by_cost():
+    data_model = _data_model(lambda X: 100.0 + 2.0 * X)
+    models = [create_model_function(name) for name in ("5P", "4P", "2P")]
+
+    res = select_model(data_model, models=models)
+    assert list(res.estimators) == ["2P"]
+    assert res.best.name == "2P"
+    assert res.skipped == ["4P", "5P"]
+
+
+def test_select_model_no_candidate_passes():
+    data_model = _data_model(lambda X: 100.0 + 2.0 * X)
+
+    res = select_model(
+        data_model,
+        models=[create_model_function("2P")],
+        model_filter=ModelFilter(r2=1.1),
+    )
+    assert res.best is None
+    assert res.passed == {"2P": False}
+
+
+def test_select_model_timeout_skips_remaining_candidates():
+    data_model = _data_model(lambda X: 100.0 + 2.0 * X)
+
+    res = select_model(data_model, timeout=1e-9)
+    assert res.best is None
+    assert res.estimators == {}
+    assert res.skipped == ["2P", "3PC", "3PH", "4P", "5P"]
+
+
+def test_model_filter_checks_tstat_and_dpop():
+    data_model = _data_model(lambda X: 100.0 + 2.0 * X)
+    est = MandVEnergyChangepointEstimator(create_model_function("2P"))
+    est.fit(data_model, budget=FitBudget(max_nfev=1000))
+
+    assert ModelFilter().passes(est)
+    assert not ModelFilter(dpop=len(data_model.X) + 1).passes(est)
+    assert ModelFilter(dpop=None, tstat=None, r2=None, cvrmse=None).passes(est)
+
+
+def test_fit_stream_is_lazy():
+    consumed = []
+
+    def meters():
+        for name, y in [
+            ("flat", lambda X: ChangepointModelModels.threepc(X, 500.0, 10.0, 60.0)),
+            ("heat", lambda X: ChangepointModelModels.threeph(X, 500.0, -10.0, 60.0)),
+        ]:
+            consumed.append(name)
+            yield name, _data_model(y)
+
+    fits = fit_stream(meters(), model="3PC")
+    meter_id, est = next(fits)
+    assert meter_id == "flat"
+    assert est.name == "3PC"
+    assert consumed == ["flat"]
+    assert [m for m, _ in fits] == ["heat"]
+
+
+def test_registered_initial_guesses_are_clipped_into_the_bounds():
+    rng = np.random.default_rng(0)
+    X = rng.uniform(20, 90, 30)
+    y = ChangepointModelModels.fivep(X.reshape(-1, 1), 300, -5, 8, 45, 65)
+    data_model = MandVDataModel(
+        X=X,
+        y=y + rng.normal(0, 3, 30),
+        sensor_reading_timestamps=np.arange("2024-01-01", 30, dtype="datetime64[D]"),
+    )
+    # the 5P initial guess of the right changepoint is above its default upper bound here
+    est = MandVEnergyChangepointEstimator(get_model_function("5P")).fit(data_model)
+    assert est.r2() > 0.9
+
+
+def test_a_user_supplied_initial_guess_is_not_clipped():
+    X = np.linspace(20, 90, 30).reshape(-1, 1)
+    y = ChangepointModelModels.threepc(X, 100, 3, 55)
+    bounds = ((0, 0, 40), (np.inf, np.inf, 70))
+    est = MandVCurvefitEstimator(
+        model_func=ChangepointModelModels.threepc, bounds=bounds, p0=(100, 3, 80)
+    )
+    # trf rejects an infeasible initial guess
+    with pytest.raises(ValueError):
+        est.fit(X, y)
+
+    est = MandVCurvefitEstimator(
+        model_func=ChangepointModelModels.threepc, bounds=None, p0=(90, 2, 50)
+    )
+    est.fit(X, y)
+    np.testing.assert_allclose(est.popt_, (100, 3, 55), rtol=1e-3)
+
+
+def test_registered_initial_guesses_respect_the_bounds():
+    from mandvmodeling.core.calc.init_guesses import BoundedInitialGuess
+
+    model = get_model_function("5P")
+    assert isinstance(model.initial_guesses, BoundedInitialGuess)
+    X = np.linspace(20, 90, 30).reshape(-1, 1)
+    lower, upper = model.bounds(X)
+    guess = model.initial_guesses(X, np.linspace(100, 200, 30))
+    assert np.all(np.asarray(lower) <= guess) and np.all(guess <= np.asarray(upper))
+    assert create_model_function("5P").initial_guesses is None
+
+
+@pytest.mark.parametrize(
+    "y",
+    [
+        lambda X: 100 + 2 * X,
+        lambda X: (
+            100 + np.abs(np.random.default_rng(0).normal(0, 1, len(X))) * (X > 20)
+        ),
+    ],
+    ids=["monotonic", "flat"],
+)
+def test_registered_models_fit_when_a_guess_is_not_finite(y):
+    data_model = _data_model(y)
+    # the lowest reading is on the coldest day, so the 4P guess of the left slope is 0 / 0
+    model = get_model_function("4P")
+    guess = model.initial_guesses(data_model.X, data_model.y)
+    assert np.isfinite(guess).all()
+
+    est = MandVEnergyChangepointEstimator(model).fit(data_model)
+    assert est.fit_status.value == "ok"
+    result = select_model(data_model)
+    assert all(e.fit_status.value == "ok" for e in result.estimators.values())
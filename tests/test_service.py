@@ -0,0 +1,140 @@
+import asyncio
+import json
+import threading
+
+import numpy as np
+import pytest
+
+from mandvmodeling.service import FittingService, ServiceConfig, run_batch
+
+from changepointmodel.core.calc import models as ChangepointModelModels
+
+
+def _payload(scale=1.0, n=60, seed=1729):
+    rng = np.random.default_rng(seed)
+    X = rng.uniform(20, 90, n)
+    y = scale * ChangepointModelModels.threepc(X, 500.0, 10.0, 60.0)
+    y = y + rng.normal(0, 5, n)
+    dates = np.arange("2024-01-01", n, dtype="datetime64[D]").astype(str)
+    return {"X": X.tolist(), "y": y.tolist(), "dates": dates.tolist(), "model": "3PC"}
+
+
+def test_run_batch():
+    fits = run_batch("fit", [_payload(), {**_payload(), "model": "6P"}])
+    assert fits[0]["name"] == "3PC"
+    assert fits[0]["status"] == "ok"
+    assert len(fits[0]["coeffs"]) == 3
+    assert "error" in fits[1]
+
+    preds = run_batch(
+        "predict", [{"model": "3PC", "coeffs": fits[0]["coeffs"], "X": [50, 70]}]
+    )
+    assert len(preds[0]["pred_y"]) == 2
+
+    post = _payload(scale=0.8, seed=1)
+    savings = run_batch(
+        "savings",
+        [
+            {"pre": _payload(), "post": post},
+            {"pre": _payload(), "post": post, "norms": list(range(30, 80))},
+            {"pre": _payload(), "post": {}},
+        ],
+    )
+    assert savings[0]["adjusted_total_savings"] > 0
+    assert savings[0]["normalized_total_savings"] is None
+    assert savings[1]["normalized_total_savings"] > 0
+    assert savings[1]["pre"]["name"] == "3PC"
+    assert "error" in savings[2]
+
+    with pytest.raises(ValueError):
+        run_batch("refit", [])
+
+
+async def _request(port, method, path, body=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    data = b"" if body is None else json.dumps(body).encode()
+    writer.write(
+        "{} {} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {}\r\n\r\n".format(
+            method, path, len(data)
+        ).encode()
+        + data
+    )
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(body)
+
+
+def test_service_endpoints_and_batching():
+    async def scenario():
+        service = FittingService(
+            ServiceConfig(port=0, executor="thread", workers=1, batch_window=0.2)
+        )
+        await service.start()
+        try:
+            port = service.port
+            assert await _request(port, "GET", "/health") == (200, {"status": "ok"})
+
+            responses = await asyncio.gather(
+                *[_request(port, "POST", "/fit", _payload(seed=i)) for i in range(4)]
+            )
+            assert [status for status, _ in responses] == [200] * 4
+
+            status, body = await _request(port, "POST", "/fit", {"model": "3PC"})
+            assert status == 400 and "error" in body
+            assert (await _request(port, "GET", "/fit"))[0] == 405
+            assert (await _request(port, "GET", "/nothing"))[0] == 404
+
+            status, metrics = await _request(port, "GET", "/metrics")
+            assert status == 200
+            assert metrics["requests"]["/fit"] == 6
+            # the four concurrent fits arrived within one batch window
+            assert metrics["batched_requests"] == 5
+            assert metrics["batches"] == 2
+        finally:
+            await service.stop()
+
+    asyncio.run(scenario())
+
+
+def test_service_rejects_requests_when_the_queue_is_full(mocker):
+    release = threading.Event()
+
+    def blocking_run_batch(operation, payloads, confidence):
+        release.wait(10)
+        return [{} for _ in payloads]
+
+    mocker.patch("mandvmodeling.service.run_batch", side_effect=blocking_run_batch)
+
+    async def scenario():
+        service = FittingService(
+            ServiceConfig(port=0, max_queue=1, workers=1, executor="thread")
+        )
+        await service.start()
+        try:
+            # the first request occupies the only worker, the second fills the queue
+            first = asyncio.create_task(service.submit("predict", {}))
+            await asyncio.sleep(0.1)
+            second = asyncio.create_task(service.submit("predict", {}))
+            await asyncio.sleep(0.1)
+
+            status, _ = await _request(service.port, "POST", "/predict", {})
+            assert status == 503
+            assert service.metrics.rejected == 1
+
+            release.set()
+            assert await first == {}
+            assert await second == {}
+        finally:
+            release.set()
+            await service.stop()
+
+    asyncio.run(scenario())
+
+
+def test_service_config_validation():
+    with pytest.raises(ValueError):
+        ServiceConfig(executor="fork")
+    with pytest.raises(ValueError):
+        ServiceConfig(max_queue=0)
@@ -0,0 +1,131 @@
+import numpy as np
+import pytest
+from sklearn.exceptions import NotFittedError
+
+from mandvmodeling.core.estimator import TOWTEstimator
+from mandvmodeling.core.pmodels.towt import (
+    HOURS_PER_WEEK,
+    TOWTModelFunction,
+    temperature_segments,
+    time_of_week,
+)
+from mandvmodeling.core.schemas import MandVDataModel
+
+
+def test_time_of_week():
+    # 2024-01-01 was a Monday
+    timestamps = np.array(
+        [
+            "2024-01-01T00:00",
+            "2024-01-01T05:30",
+            "2024-01-07T23:00",
+            "2024-01-08T01:00",
+        ],
+        dtype="datetime64[m]",
+    )
+    np.testing.assert_array_equal(time_of_week(timestamps), [0, 5, 167, 1])
+
+
+def test_temperature_segments_sum_to_the_temperature():
+    T = np.array([10.0, 30.0, 50.0, 70.0, 100.0])
+    segments = temperature_segments(T, (30.0, 60.0))
+    np.testing.assert_array_equal(
+        segments, [[10, 0, 0], [30, 0, 0], [30, 20, 0], [30, 30, 10], [30, 30, 40]]
+    )
+    np.testing.assert_allclose(segments.sum(axis=1), T)
+    with pytest.raises(ValueError):
+        temperature_segments(T, (60.0, 30.0))
+
+
+def _hourly_data(weeks=8, occupancy=None, noise=1.0):
+    rng = np.random.default_rng(3)
+    timestamps = np.arange(
+        "2024-01-01T00", weeks * HOURS_PER_WEEK, dtype="datetime64[h]"
+    )
+    tow = time_of_week(timestamps)
+    T = (
+        60
+        + 25 * np.sin(np.arange(len(tow)) * 2 * np.pi / 24)
+        + rng.normal(0, 5, len(tow))
+    )
+    alpha = 50 + 30 * ((tow % 24 >= 8) & (tow % 24 < 18))
+    y = alpha + 2.0 * np.maximum(T - 65, 0) + rng.normal(0, noise, len(tow))
+    return MandVDataModel(X=T, y=y, sensor_reading_timestamps=timestamps), alpha[
+        np.argsort(T, kind="stable")
+    ]
+
+
+def test_towt_design_matrix_matches_dense_construction():
+    model = TOWTModelFunction(knots=(40.0, 65.0))
+    data_model, _ = _hourly_data(weeks=1)
+    A = model.design_matrix(data_model.X, data_model.sensor_reading_timestamps)
+    assert A.shape == (HOURS_PER_WEEK, HOURS_PER_WEEK + 3)
+
+    dense = np.zeros(A.shape)
+    dense[
+        np.arange(HOURS_PER_WEEK), time_of_week(data_model.sensor_reading_timestamps)
+    ] = 1
+    dense[:, HOURS_PER_WEEK:] = temperature_segments(data_model.X, model.knots)
+    np.testing.assert_array_equal(A.toarray(), dense)
+
+    occupied = np.zeros(HOURS_PER_WEEK, dtype=bool)
+    occupied[:84] = True
+    model = TOWTModelFunction(knots=(40.0, 65.0), occupancy=occupied)
+    A = model.design_matrix(data_model.X, data_model.sensor_reading_timestamps)
+    assert A.shape == (HOURS_PER_WEEK, HOURS_PER_WEEK + 6)
+    tow = time_of_week(data_model.sensor_reading_timestamps)
+    assert A[occupied[tow]][:, HOURS_PER_WEEK + 3 :].nnz == 0
+    assert A[~occupied[tow]][:, HOURS_PER_WEEK : HOURS_PER_WEEK + 3].nnz == 0
+
+
+def test_towt_estimator_matches_dense_least_squares():
+    data_model, _ = _hourly_data()
+    model = TOWTModelFunction(knots=(45.0, 65.0, 80.0))
+    est = TOWTEstimator(model).fit(data_model)
+
+    A = model.design_matrix(data_model.X, data_model.sensor_reading_timestamps)
+    expected = np.linalg.lstsq(A.toarray(), data_model.y, rcond=None)[0]
+    np.testing.assert_allclose(est.coeffs, expected, rtol=1e-6, atol=1e-6)
+    assert est.name == "TOWT"
+    assert est.r2() > 0.95
+    np.testing.assert_allclose(est.temperature_coeffs, [0.0, 0.0, 2.0, 2.0], atol=0.1)
+
+
+def test_towt_estimator_recovers_the_load_profile():
+    data_model, alpha = _hourly_data(noise=0.1)
+    est = TOWTEstimator(TOWTModelFunction(knots=(65.0,))).fit(data_model)
+    tow = time_of_week(data_model.sensor_reading_timestamps)
+    # the first segment min(T, 65) shares its level with the indicators, so compare the fitted load profiles
+    np.testing.assert_allclose(
+        est.pred_y, est.predict(data_model.X, data_model.sensor_reading_timestamps)
+    )
+    base = est.time_of_week_coeffs[tow] + est.temperature_coeffs[0] * np.minimum(
+        data_model.X.reshape(-1), 65.0
+    )
+    np.testing.assert_allclose(base - base.mean(), alpha - alpha.mean(), atol=0.5)
+
+
+def test_towt_estimator_missing_hours_and_weights():
+    data_model, _ = _hourly_data(weeks=2)
+    keep = time_of_week(data_model.sensor_reading_timestamps) != 3
+    partial = MandVDataModel(
+        X=data_model.X[keep],
+        y=data_model.y[keep],
+        sensor_reading_timestamps=data_model.sensor_reading_timestamps[keep],
+        counts=np.linspace(1, 4, keep.sum()),
+    )
+    est = TOWTEstimator().fit(partial)
+    assert est.time_of_week_coeffs[3] == 0.0
+    assert est.statistics.n_params == est.model.n_params - 1
+    assert np.isfinite(est.coeffs).all()
+
+
+def test_towt_validation():
+    with pytest.raises(ValueError):
+        TOWTModelFunction(occupancy=np.ones(24, dtype=bool))
+    with pytest.raises(ValueError):
+        TOWTModelFunction(knots=())
+    with pytest.raises(NotFittedError):
+        TOWTEstimator().coeffs
+    with pytest.raises(TypeError):
+        TOWTEstimator().fit(np.arange(3))
@@ -0,0 +1,125 @@
+import numpy as np
+import pytest
+
+from mandvmodeling.core import degree_days
+from mandvmodeling.core.cache import LRUCache
+from mandvmodeling.core.schemas import MandVDataModel
+from mandvmodeling.core.weather import WeatherStore, align_indices
+
+
+def _store(**kwargs):
+    store = WeatherStore(**kwargs)
+    timestamps = np.arange("2024-01-01T00", 48, dtype="datetime64[h]")
+    temperatures = np.arange(48, dtype=float)
+    rng = np.random.default_rng(0)
+    order = rng.permutation(48)
+    temperatures[5] = np.nan
+    store.add("KBOS", timestamps[order], temperatures[order])
+    return store
+
+
+def test_station_series_is_sorted_without_nan():
+    store = _store()
+    series = store.series("KBOS")
+    assert len(series.timestamps) == 47
+    assert np.all(np.diff(series.seconds) > 0)
+    np.testing.assert_array_equal(series.temperatures, np.delete(np.arange(48.0), 5))
+    assert not series.temperatures.flags.writeable
+    with pytest.raises(KeyError):
+        store.series("KJFK")
+
+
+def test_align_indices():
+    station = np.array([0, 10, 20, 30])
+    times = np.array([-5, 0, 4, 5, 6, 31, 45])
+    np.testing.assert_array_equal(
+        align_indices(station, times, "previous"), [-1, 0, 0, 0, 0, 3, 3]
+    )
+    np.testing.assert_array_equal(
+        align_indices(station, times, "next"), [0, 0, 1, 1, 1, -1, -1]
+    )
+    np.testing.assert_array_equal(
+        align_indices(station, times, "nearest"), [0, 0, 0, 0, 1, 3, 3]
+    )
+    np.testing.assert_array_equal(
+        align_indices(station, times, "nearest", tolerance=4),
+        [-1, 0, 0, -1, 1, 3, -1],
+    )
+    with pytest.raises(ValueError):
+        align_indices(station, times, "linear")
+
+
+def test_align_meter_timestamps():
+    store = _store()
+    timestamps = np.array(
+        [
+            "2024-01-01T02:20",
+            "2024-01-01T05:00",
+            "2024-01-01T01:40",
+            "2024-01-05T00:00",
+        ],
+        dtype="datetime64[m]",
+    )
+    np.testing.assert_array_equal(
+        store.align("KBOS", timestamps, tolerance="1h"), [2.0, 4.0, 2.0, np.nan]
+    )
+    np.testing.assert_array_equal(
+        store.align("KBOS", timestamps, method="previous"), [2.0, 4.0, 1.0, 47.0]
+    )
+    np.testing.assert_array_equal(
+        store.align(
+            "KBOS", timestamps, method="next", tolerance=np.timedelta64(30, "m")
+        ),
+        [np.nan, np.nan, 2.0, np.nan],
+    )
+
+
+def test_alignments_are_cached_and_shared():
+    store = _store()
+    timestamps = np.arange("2024-01-01T00", 24, dtype="datetime64[h]")
+    first = store.align("KBOS", timestamps)
+    assert store.align("KBOS", timestamps.copy()) is first
+    assert store.cache.hits == 1
+    assert store.align("KBOS", timestamps, method="previous") is not first
+    with pytest.raises(ValueError):
+        first[0] = 1.0
+
+    # replacing a station drops its alignments
+    store.add("KBOS", timestamps, np.zeros(24))
+    np.testing.assert_array_equal(store.align("KBOS", timestamps), 0.0)
+
+    uncached = _store(cache_size=0)
+    assert uncached.cache is None
+    assert uncached.align("KBOS", timestamps) is not uncached.align("KBOS", timestamps)
+
+
+def test_data_model_drops_unmatched_readings():
+    store = _store()
+    timestamps = np.arange("2024-01-01", 4, dtype="datetime64[D]")
+    data_model = store.data_model(
+        "KBOS", [1.0, 2.0, 3.0, 4.0], timestamps, tolerance="1h"
+    )
+    assert isinstance(data_model, MandVDataModel)
+    np.testing.assert_array_equal(data_model.X.reshape(-1), [0.0, 24.0, 47.0])
+    np.testing.assert_array_equal(data_model.y, [1.0, 2.0, 3.0])
+
+
+def test_degree_day_table_of_a_station():
+    store = _store()
+    table = store.degree_day_table("KBOS")
+    assert isinstance(table, degree_days.DegreeDayTable)
+    assert store.degree_day_table("KBOS") is table
+    assert table.n_periods == 2
+
+
+def test_lru_cache():
+    cache = LRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert len(cache) == 2
+    assert (cache.hits, cache.misses) == (1, 1)
+    with pytest.raises(ValueError):
+        LRUCache(maxsize=0)